@@ -0,0 +1,73 @@
+"""
+Calibrate the local/remote fit policy: time local fits of the test nk data for a few numbers of
+poles and data points, fit the seconds per cost unit, and with ``--remote`` time a fit on the
+server, whose round trip is the threshold below which fitting locally is faster.
+
+    python benchmarks/bench_fit_policy.py [--remote]
+"""
+import sys
+import time
+from os.path import dirname, join
+
+import numpy as np
+from tidy3d.plugins import DispersionFitter
+
+from tidy3d_webapi.fit_policy import FitPolicy
+from tidy3d_webapi.material_fitter import FitterOptions, MaterialFitterTask
+
+NK_DATA = join(dirname(dirname(__file__)), "data", "nk_data.csv")
+NUM_TRIES = 3
+
+
+def _subsample(fitter: DispersionFitter, num_points: int) -> DispersionFitter:
+    index = np.linspace(0, len(fitter.wvl_um) - 1, num_points).astype(int)
+    return DispersionFitter(
+        wvl_um=fitter.wvl_um[index], n_data=fitter.n_data[index], k_data=fitter.k_data[index]
+    )
+
+
+def calibrate_local(fitter: DispersionFitter) -> float:
+    """Print the local fit times and return the least squares seconds per cost unit."""
+    units, seconds = [], []
+    for num_points in (50, 150, 300):
+        data = _subsample(fitter, num_points)
+        for num_poles in (1, 2, 3, 4):
+            # a zero tolerance runs every try
+            options = FitterOptions(num_poles=num_poles, num_tries=NUM_TRIES, tolerance_rms=0)
+            start = time.perf_counter()
+            data.fit(num_poles=num_poles, num_tries=NUM_TRIES, tolerance_rms=0)
+            elapsed = time.perf_counter() - start
+            units.append(FitPolicy.cost_units(data, options))
+            seconds.append(elapsed)
+            print(
+                f"{num_points:>4} points, {num_poles} poles: {elapsed:8.2f} s, {units[-1]:8.0f} units"
+            )
+    units, seconds = np.array(units), np.array(seconds)
+    return float(units @ seconds / (units @ units))
+
+
+def time_remote(fitter: DispersionFitter) -> float:
+    """Seconds to submit a fit and wait for its result on the server."""
+    start = time.perf_counter()
+    task = MaterialFitterTask.submit(
+        fitter, FitterOptions(num_poles=1, num_tries=1), use_cache=False
+    )
+    task.wait()
+    return time.perf_counter() - start
+
+
+def main(remote: bool):
+    """Print the calibrated policy."""
+    fitter = DispersionFitter.from_file(NK_DATA, skiprows=1, delimiter=",")
+    seconds_per_unit = calibrate_local(fitter)
+    print(f"seconds_per_unit = {seconds_per_unit:.2e}")
+    if remote:
+        threshold = time_remote(fitter)
+        print(f"remote round trip = {threshold:.1f} s")
+        print(
+            f"FitPolicy(local_threshold={threshold:.1f}, seconds_per_unit={seconds_per_unit:.2e})"
+        )
+
+
+if __name__ == "__main__":
+    main("--remote" in sys.argv[1:])
@@ -0,0 +1,52 @@
+"""
+Time the simulation encoders on the test simulation scaled up by replicating its structures.
+
+    python benchmarks/bench_serialization.py [scale ...]
+"""
+import sys
+import time
+from os.path import dirname, join
+
+from tidy3d import Simulation
+
+from tidy3d_webapi.serialization import JSON_ENCODERS, encode_many, encode_simulation
+from tidy3d_webapi.simulation_task import SimulationTask
+
+SIMULATION = join(dirname(dirname(__file__)), "data", "simulation_1_7_1.json")
+REPEAT = 5
+BATCH_SIZE = 32
+
+
+def _best_of(func, repeat=REPEAT) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(scales):
+    """Print the encoding time of each encoder and of a memoized re-encode for each scale."""
+    base = Simulation.from_file(SIMULATION)
+    for scale in scales:
+        sim = base.copy(update={"structures": list(base.structures) * scale})
+        task = SimulationTask.construct(task_id="bench", simulation=sim)
+        size = len(task.encoded_simulation())
+        print(f"{len(sim.structures)} structures, {size / 1e3:.0f} kB")
+        for name, encoder in JSON_ENCODERS.items():
+            print(f"  {name:>10}: {_best_of(lambda: encoder(sim)) * 1e3:8.2f} ms")
+        print(f"  {'memoized':>10}: {_best_of(task.encoded_simulation) * 1e3:8.4f} ms")
+
+        sims = {
+            f"sim_{i}": sim.copy(update={"run_time": (i + 1) * 1e-12}) for i in range(BATCH_SIZE)
+        }
+        print(f"  {BATCH_SIZE} simulations")
+        serial = _best_of(lambda: [encode_simulation(sim) for sim in sims.values()], 1)
+        threads = _best_of(lambda: dict(encode_many(sims)), 1)
+        print(f"  {'serial':>10}: {serial * 1e3:8.2f} ms")
+        print(f"  {'threads':>10}: {threads * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1, 10, 100])
@@ -0,0 +1,26 @@
+import pytest
+
+from tidy3d_webapi.cost import clear_cost_estimates
+from tidy3d_webapi.folder_registry import folders
+from tidy3d_webapi.progress import clear_progress_histories
+from tidy3d_webapi.simulation_task import clear_simulation_cache
+from tidy3d_webapi.solver_version import solver_versions
+from tidy3d_webapi.task_handle import clear_handles
+
+
+@pytest.fixture(autouse=True)
+def _clear_task_handles():
+    """Task handles and caches are shared by the process, don't leak them between tests."""
+    clear_handles()
+    clear_simulation_cache()
+    folders.clear()
+    solver_versions.clear()
+    clear_progress_histories()
+    clear_cost_estimates()
+    yield
+    clear_handles()
+    clear_simulation_cache()
+    folders.clear()
+    solver_versions.clear()
+    clear_progress_histories()
+    clear_cost_estimates()
@@ -0,0 +1,118 @@
+import responses
+from responses import matchers
+from tidy3d import Simulation
+
+from tidy3d_webapi.batch import Batch
+from tidy3d_webapi.environment import Env
+from tidy3d_webapi.task_handle import get_handle
+
+Env.dev.active()
+
+
+class _FakeSimulationData:
+    @classmethod
+    def from_file(cls, path):
+        return path
+
+
+def _add_task_responses(task_id, task_name, status="success", detail_status=200):
+    responses.add(
+        responses.POST,
+        f"{Env.current.web_api_endpoint}/tidy3d/projects/1234/tasks",
+        match=[matchers.json_params_matcher({"task_name": task_name, "call_back_url": None})],
+        json={"data": {"taskId": task_id, "taskName": task_name}},
+        status=200,
+    )
+    responses.add(
+        responses.POST,
+        f"{Env.current.web_api_endpoint}/tidy3d/tasks/{task_id}/submit",
+        json={"data": {"taskId": task_id}},
+        status=200,
+    )
+    responses.add(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/tasks/{task_id}/detail",
+        json={"data": {"taskId": task_id, "status": status}},
+        status=detail_status,
+    )
+
+
+@responses.activate
+def test_batch_run(monkeypatch, tmp_path):
+    responses.add(
+        responses.POST,
+        f"{Env.current.web_api_endpoint}/tidy3d/projects",
+        match=[matchers.json_params_matcher({"projectName": "batch folder"})],
+        json={"data": {"projectId": "1234", "projectName": "batch folder"}},
+        status=200,
+    )
+    _add_task_responses("task_0", "sim_0")
+    _add_task_responses("task_1", "sim_1", status="error")
+
+    uploaded = {}
+    monkeypatch.setattr(
+        "tidy3d_webapi.simulation_task.upload_string",
+        lambda task_id, content, *args: uploaded.update({task_id: content}),
+    )
+    monkeypatch.setattr("tidy3d_webapi.simulation_task.download_file", lambda *a, **k: None)
+    monkeypatch.setattr("tidy3d_webapi.batch.SimulationData", _FakeSimulationData)
+
+    sim = Simulation.from_file("data/simulation_1_7_1.json")
+    batch = Batch(
+        simulations={"sim_0": sim, "sim_1": sim},
+        folder_name="batch folder",
+        path_dir=str(tmp_path),
+        poll_interval=0,
+        serialize_workers=2,
+    )
+    results = dict(batch.run_iter())
+
+    assert results == {"sim_0": str(tmp_path / "task_0.hdf5")}
+    assert set(uploaded) == {"task_0", "task_1"}
+    assert "sim_1" in batch.errors
+    assert batch.task_ids == {"sim_0": "task_0", "sim_1": "task_1"}
+    assert batch.stats.stages["serialize"].count == 2
+    assert batch.stats.stages["upload"].count == 2
+    assert batch.stats.stages["wait"].failed == 1
+    assert batch.stats.stages["load"].count == 1
+    assert "load" in batch.stats.summary()
+    # identical simulations, estimated once
+    assert get_handle("task_0").peek().fingerprint == get_handle("task_1").peek().fingerprint
+
+
+@responses.activate
+def test_batch_run_polling_errors(monkeypatch, tmp_path):
+    responses.add(
+        responses.POST,
+        f"{Env.current.web_api_endpoint}/tidy3d/projects",
+        match=[matchers.json_params_matcher({"projectName": "batch folder"})],
+        json={"data": {"projectId": "1234", "projectName": "batch folder"}},
+        status=200,
+    )
+    # the first status request fails, the task is polled again next round
+    responses.add(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/tasks/task_0/detail",
+        json={"error": "unavailable"},
+        status=503,
+    )
+    _add_task_responses("task_0", "sim_0")
+    # deleted remotely, not found
+    _add_task_responses("task_1", "sim_1", detail_status=404)
+
+    monkeypatch.setattr("tidy3d_webapi.simulation_task.upload_string", lambda *args: None)
+    monkeypatch.setattr("tidy3d_webapi.simulation_task.download_file", lambda *a, **k: None)
+    monkeypatch.setattr("tidy3d_webapi.batch.SimulationData", _FakeSimulationData)
+    monkeypatch.setattr("tidy3d_webapi.batch.MIN_POLL_INTERVAL", 0.01)
+
+    sim = Simulation.from_file("data/simulation_1_7_1.json")
+    batch = Batch(
+        simulations={"sim_0": sim, "sim_1": sim},
+        folder_name="batch folder",
+        path_dir=str(tmp_path),
+        poll_interval=0,
+    )
+    results = batch.run()
+
+    assert results == {"sim_0": str(tmp_path / "task_0.hdf5")}
+    assert "not found" in batch.errors["sim_1"]
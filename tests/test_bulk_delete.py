@@ -0,0 +1,83 @@
+import responses
+from responses import matchers
+
+from tidy3d_webapi.bulk_delete import delete_tasks
+from tidy3d_webapi.cache import BATCH_DELETE_UNSUPPORTED
+from tidy3d_webapi.environment import Env
+
+Env.dev.active()
+
+
+@responses.activate
+def test_delete_tasks_in_batches():
+    BATCH_DELETE_UNSUPPORTED.clear()
+    records = [{"taskId": f"task{i}", "uploadPath": f"path{i}"} for i in range(5)]
+    for batch in (records[:3], records[3:]):
+        responses.add(
+            responses.DELETE,
+            f"{Env.current.web_api_endpoint}/tidy3d/tasks",
+            match=[matchers.json_params_matcher({"tasks": batch})],
+            status=200,
+        )
+    progress = []
+    result = delete_tasks(records, batch_size=3, on_progress=lambda *args: progress.append(args))
+    assert sorted(result.deleted) == [f"task{i}" for i in range(5)]
+    assert not result.failed
+    assert len(responses.calls) == 2
+    assert progress[-1] == (5, 5)
+
+
+@responses.activate
+def test_delete_tasks_falls_back_to_single_deletes():
+    BATCH_DELETE_UNSUPPORTED.clear()
+    responses.add(responses.DELETE, f"{Env.current.web_api_endpoint}/tidy3d/tasks", status=405)
+    responses.add(
+        responses.DELETE, f"{Env.current.web_api_endpoint}/tidy3d/tasks/task0", status=200
+    )
+    responses.add(
+        responses.DELETE, f"{Env.current.web_api_endpoint}/tidy3d/tasks/task1", status=500
+    )
+    result = delete_tasks(["task0", "task1"], batch_size=1)
+    assert result.deleted == ["task0"]
+    assert list(result.failed) == ["task1"]
+    assert Env.current.name in BATCH_DELETE_UNSUPPORTED
+    # only the first batch probed the endpoint
+    assert [call.request.url for call in responses.calls].count(
+        f"{Env.current.web_api_endpoint}/tidy3d/tasks"
+    ) == 1
+    BATCH_DELETE_UNSUPPORTED.clear()
+
+
+@responses.activate
+def test_delete_tasks_bad_batch():
+    BATCH_DELETE_UNSUPPORTED.clear()
+    url = f"{Env.current.web_api_endpoint}/tidy3d/tasks"
+    # a bad task in the first batch, the endpoint is still used for the next one
+    responses.add(responses.DELETE, url, status=400)
+    responses.add(responses.DELETE, url, status=200)
+    responses.add(responses.DELETE, f"{url}/task0", status=200)
+    responses.add(responses.DELETE, f"{url}/task1", status=400)
+    result = delete_tasks(["task0", "task1", "task2"], batch_size=2)
+    assert sorted(result.deleted) == ["task0", "task2"]
+    assert list(result.failed) == ["task1"]
+    assert Env.current.name not in BATCH_DELETE_UNSUPPORTED
+
+
+def test_delete_tasks_dry_run():
+    result = delete_tasks(["task0", {"taskId": "task1"}], dry_run=True)
+    assert result.dry_run
+    assert result.deleted == ["task0", "task1"]
+
+
+@responses.activate
+def test_delete_tasks_batch_not_found():
+    BATCH_DELETE_UNSUPPORTED.clear()
+    responses.add(responses.DELETE, f"{Env.current.web_api_endpoint}/tidy3d/tasks", status=404)
+    responses.add(
+        responses.DELETE, f"{Env.current.web_api_endpoint}/tidy3d/tasks/task0", status=200
+    )
+    result = delete_tasks(["task0"])
+    assert result.deleted == ["task0"]
+    assert [call.request.url for call in responses.calls][-1].endswith("/tidy3d/tasks/task0")
+    assert Env.current.name in BATCH_DELETE_UNSUPPORTED
+    BATCH_DELETE_UNSUPPORTED.clear()
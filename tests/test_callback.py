@@ -0,0 +1,65 @@
+import pytest
+import requests
+
+from tidy3d_webapi.callback import CallbackReceiver
+
+
+def test_callback_receiver():
+    with CallbackReceiver(host="127.0.0.1") as receiver:
+        future = receiver.register("abcd")
+        resp = requests.put(receiver.url, json={"id": "abcd", "status": "running"}, timeout=5)
+        assert resp.status_code == 200
+        assert not future.done()
+
+        assert requests.put(receiver.url + "x", json={}, timeout=5).status_code == 404
+
+        requests.put(
+            receiver.url,
+            json={"id": "abcd", "status": "SUCCESS", "name": "task", "workUnit": 1.0},
+            timeout=5,
+        )
+        events = receiver.wait(["abcd"], timeout=5)
+        assert events["abcd"]["status"] == "success"
+        assert events["abcd"]["name"] == "task"
+
+        # never registered
+        requests.put(receiver.url, json={"id": "other", "status": "success"}, timeout=5)
+        assert "other" not in receiver._futures
+
+
+def test_callback_receiver_public_url():
+    receiver = CallbackReceiver()
+    assert receiver.url.startswith("http://127.0.0.1:")
+    with pytest.raises(ValueError):
+        receiver.create_task(None, "task")
+    receiver.stop()
+
+    receiver = CallbackReceiver(public_url="https://my-host/")
+    assert receiver.url == "https://my-host" + receiver.path
+    receiver.stop()
+
+
+def test_callback_receiver_polling_fallback(monkeypatch):
+    receiver = CallbackReceiver(host="127.0.0.1", fallback_interval=0)
+    monkeypatch.setattr(
+        receiver._poller, "poll", lambda task_ids: {task_id: "error" for task_id in task_ids}
+    )
+    assert receiver.wait(["efgh"], timeout=5) == {"efgh": {"id": "efgh", "status": "error"}}
+    receiver.stop()
+
+
+def test_callback_receiver_fallback_errors(monkeypatch):
+    receiver = CallbackReceiver(fallback_interval=0)
+    polls = iter([ConnectionError("offline"), {"abcd": None}])
+
+    def poll(task_ids):
+        result = next(polls)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(receiver._poller, "poll", poll)
+    # a failed poll doesn't abort the wait, a task not found is resolved as deleted
+    assert receiver.wait(["abcd"], timeout=5) == {"abcd": {"id": "abcd", "status": "deleted"}}
+    assert not receiver._futures
+    receiver.stop()
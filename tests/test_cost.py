@@ -0,0 +1,50 @@
+import responses
+
+from tidy3d_webapi.cache import COST_ESTIMATES
+from tidy3d_webapi.cost import estimate_costs
+from tidy3d_webapi.environment import Env
+from tidy3d_webapi.simulation_task import SimulationTask
+
+Env.dev.active()
+
+
+def _task(task_id: str, fingerprint: str) -> SimulationTask:
+    task = SimulationTask.construct(task_id=task_id)
+    task._fingerprint = fingerprint
+    return task
+
+
+@responses.activate
+def test_estimate_costs_once_per_simulation():
+    COST_ESTIMATES.clear()
+    for task_id, cost in (("task0", 2.0), ("task2", 3.0), ("task3", 4.0)):
+        responses.add(
+            responses.POST,
+            f"{Env.current.web_api_endpoint}/tidy3d/tasks/{task_id}/metadata",
+            json={"data": {"flex_unit": cost}},
+            status=200,
+        )
+    tasks = [_task("task0", "sim0"), _task("task1", "sim0"), _task("task2", "sim1"), "task3"]
+    summary = estimate_costs(tasks, budget=10)
+    assert summary.costs == {"task0": 2.0, "task1": 2.0, "task2": 3.0, "task3": 4.0}
+    assert summary.requests == 3
+    assert summary.total == 11.0
+    assert not summary.within_budget
+    assert "budget 10.00 exceeded" in summary.summary()
+
+    # memoized per content, tasks without known content are estimated again
+    summary = estimate_costs([_task("task4", "sim1"), "task3"])
+    assert summary.costs == {"task4": 3.0, "task3": 4.0}
+    assert summary.requests == 1
+
+
+@responses.activate
+def test_estimate_costs_failed():
+    COST_ESTIMATES.clear()
+    responses.add(
+        responses.POST, f"{Env.current.web_api_endpoint}/tidy3d/tasks/task0/metadata", status=404
+    )
+    summary = estimate_costs(["task0"])
+    assert not summary.costs
+    assert "task0" in summary.failed
+    assert summary.within_budget
@@ -0,0 +1,106 @@
+import os
+
+import numpy as np
+import pytest
+import responses
+import tidy3d as td
+from tidy3d.plugins import DispersionFitter
+
+from tidy3d_webapi.environment import Env
+from tidy3d_webapi.fit_cache import FitResultCache, fit_key, use_fit_cache
+from tidy3d_webapi.material_fitter import FitterOptions, MaterialFitterTask
+
+Env.dev.active()
+
+MEDIUM = td.Medium(permittivity=2.0).json()
+
+
+@pytest.fixture
+def fitter():
+    return DispersionFitter.from_file("data/nk_data.csv", skiprows=1, delimiter=",")
+
+
+@pytest.fixture
+def fit_cache():
+    yield use_fit_cache(":memory:")
+    use_fit_cache(None)
+
+
+def record(task_id, size=0):
+    return {"id": task_id, "fileName": "nk_data.csv", "resourcePath": "path", "pad": "x" * size}
+
+
+def test_fit_key(fitter):
+    key = fit_key(fitter, FitterOptions())
+    same = DispersionFitter(
+        wvl_um=list(fitter.wvl_um), n_data=np.repeat(fitter.n_data, 2)[::2], k_data=fitter.k_data
+    )
+    assert fit_key(same, FitterOptions(num_poles=1)) == key
+    assert fit_key(fitter, FitterOptions(num_poles=2)) != key
+    shifted = fitter.copy(update={"n_data": fitter.n_data + 1e-9})
+    assert fit_key(shifted, FitterOptions()) != key
+
+
+def test_limits_and_persistence(tmp_path):
+    path = os.path.join(tmp_path, "fits.sqlite")
+    cache = FitResultCache(path, max_entries=2)
+    cache.put("a", record("a"))
+    cache.put("b", record("b"))
+    assert cache.get("a")["id"] == "a"
+    cache.put("c", record("c"))
+    # "b" is the least recently used
+    assert cache.get("b") is None
+    assert len(cache) == 2
+    cache.close()
+
+    cache = FitResultCache(path, max_bytes=1000)
+    assert cache.get("c")["id"] == "c"
+    cache.put("big", record("big", size=800))
+    assert cache.get("big") is not None and cache.get("a") is None
+    cache.forget("big")
+    assert len(cache) == 1
+    try:
+        Env.prod.active()
+        assert cache.get("c") is None
+    finally:
+        Env.dev.active()
+    cache.clear()
+    assert len(cache) == 0
+
+
+@responses.activate
+def test_submit_cached(fitter, fit_cache, monkeypatch):
+    responses.add(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/fitter/fit_id/signedUrl",
+        json={"data": "https://example.com"},
+        status=200,
+    )
+    responses.add(responses.PUT, "https://example.com", status=200)
+    responses.add(
+        responses.POST,
+        f"{Env.current.web_api_endpoint}/tidy3d/fitter/fit",
+        json={"data": {**record("1234"), "status": "RUNNING"}},
+        status=200,
+    )
+    responses.add(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/fitter/1234",
+        json={"data": {"status": "COMPLETED", "calcResult": MEDIUM}},
+        status=200,
+    )
+    monkeypatch.setattr("tidy3d_webapi.material_fitter.uuid4", lambda: "fit_id")
+    task = MaterialFitterTask.submit(fitter, FitterOptions())
+    assert task.medium is None
+    task.sync_status()
+    assert task.medium == td.Medium(permittivity=2.0)
+    calls = len(responses.calls)
+
+    cached = MaterialFitterTask.submit(fitter, FitterOptions())
+    assert len(responses.calls) == calls
+    assert cached.id == "1234" and cached.status == "COMPLETED"
+    assert cached.medium == task.medium
+
+    assert MaterialFitterTask.submit(fitter, FitterOptions(), use_cache=False).status == "RUNNING"
+    fit_cache.invalidate(fitter, FitterOptions())
+    assert MaterialFitterTask.submit(fitter, FitterOptions()).status == "RUNNING"
@@ -0,0 +1,134 @@
+import json
+import re
+
+import pytest
+import responses
+import tidy3d as td
+from tidy3d.plugins import DispersionFitter
+
+from tidy3d_webapi.environment import Env
+from tidy3d_webapi.fit_policy import FitPolicy, fit, fit_many
+from tidy3d_webapi.material_fitter import ConstraintEnum, FitterOptions
+
+Env.dev.active()
+
+MEDIUM = td.Medium(permittivity=2.0)
+
+
+@pytest.fixture
+def fitter():
+    return DispersionFitter.from_file("data/nk_data.csv", skiprows=1, delimiter=",")
+
+
+def test_policy(fitter):
+    policy = FitPolicy(local_threshold=10, seconds_per_unit=1e-3)
+    small = FitterOptions(num_poles=1, num_tries=10)
+    large = FitterOptions(num_poles=4, num_tries=100)
+    assert policy.estimate_local_seconds(fitter, large) > policy.estimate_local_seconds(
+        fitter, small
+    )
+    assert policy.runs_locally(fitter, small)
+    assert not policy.runs_locally(fitter, large)
+    assert not policy.runs_locally(fitter, small.copy(update={"constraint": ConstraintEnum.SOFT}))
+    assert not policy.runs_locally(fitter, small.copy(update={"bound_amp": 10.0}))
+
+
+@responses.activate
+def test_fit_many(fitter):
+    responses.add(
+        responses.GET,
+        re.compile(f"{Env.current.web_api_endpoint}/tidy3d/fitter/.*/signedUrl.*"),
+        json={"data": "https://example.com"},
+        status=200,
+    )
+    responses.add(responses.PUT, "https://example.com", status=200)
+    responses.add(
+        responses.POST,
+        f"{Env.current.web_api_endpoint}/tidy3d/fitter/fit",
+        json={
+            "data": {
+                "id": "remote1",
+                "status": "RUNNING",
+                "fileName": "nk_data.csv",
+                "resourcePath": "path",
+            }
+        },
+        status=200,
+    )
+    responses.add(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/fitter/remote1",
+        json={"data": {"status": "COMPLETED", "calcResult": MEDIUM.json()}},
+        status=200,
+    )
+    options = [
+        FitterOptions(num_poles=1, num_tries=1, tolerance_rms=1e3),
+        FitterOptions(num_poles=1, num_tries=1, bound_f=10.0),
+    ]
+    local, remote = fit_many([fitter, fitter], options, max_local_workers=1)
+    assert local.location == "local" and local.rms_error < 1e3
+    assert isinstance(local.medium, td.PoleResidue)
+    assert remote.location == "remote" and remote.task_id == "remote1"
+    assert remote.medium == MEDIUM
+    posted = [call for call in responses.calls if call.request.url.endswith("/fit")]
+    assert len(posted) == 1
+    assert json.loads(json.loads(posted[0].request.body)["jsonInput"])["bound_f"] == 10.0
+
+    assert fit(fitter, options[0]).location == "local"
+
+
+def test_cost_units_wavelength_range(fitter):
+    options = FitterOptions(num_poles=1, num_tries=1)
+    wvl_um = sorted(fitter.wvl_um)
+    ranged = options.copy(update={"min_wvl": wvl_um[0], "max_wvl": wvl_um[3]})
+    assert FitPolicy.cost_units(fitter, options) == pytest.approx(len(wvl_um) ** 0.5)
+    assert FitPolicy.cost_units(fitter, ranged) == pytest.approx(2.0)
+
+
+@responses.activate
+def test_fit_many_deleted(fitter, monkeypatch):
+    responses.add(
+        responses.GET,
+        re.compile(f"{Env.current.web_api_endpoint}/tidy3d/fitter/.*/signedUrl.*"),
+        json={"data": "https://example.com"},
+        status=200,
+    )
+    responses.add(responses.PUT, "https://example.com", status=200)
+    responses.add(
+        responses.POST,
+        f"{Env.current.web_api_endpoint}/tidy3d/fitter/fit",
+        json={
+            "data": {
+                "id": "remote1",
+                "status": "RUNNING",
+                "fileName": "nk_data.csv",
+                "resourcePath": "path",
+            }
+        },
+        status=200,
+    )
+    # deleted on the server
+    responses.add(
+        responses.GET, f"{Env.current.web_api_endpoint}/tidy3d/fitter/remote1", status=404
+    )
+    monkeypatch.setattr("tidy3d_webapi.material_fitter.time.sleep", lambda seconds: None)
+
+    options = FitterOptions(num_poles=1, num_tries=1, bound_f=10.0)
+    (result,) = fit_many([fitter], options, max_errors=2)
+    assert result.location == "remote" and result.task_id == "remote1"
+    assert result.medium is None and "ERROR" in result.error
+    with pytest.raises(ValueError):
+        fit(fitter, options)
+
+
+def test_fit_many_local_executor(fitter, monkeypatch):
+    def no_processes(*args):
+        raise AssertionError("No process pool expected.")
+
+    monkeypatch.setattr("tidy3d_webapi.fit_policy.ProcessPoolExecutor", no_processes)
+    assert fit_many([], FitterOptions()) == []
+    # spawned workers would re-import the main module, threads are used instead
+    monkeypatch.setattr("multiprocessing.get_start_method", lambda: "spawn")
+    options = FitterOptions(num_poles=1, num_tries=1, tolerance_rms=1e3)
+    results = fit_many([fitter, fitter], options, max_local_workers=2)
+    assert [result.location for result in results] == ["local", "local"]
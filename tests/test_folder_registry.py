@@ -0,0 +1,62 @@
+import os
+
+import responses
+from responses import matchers
+
+from tidy3d_webapi import Folder
+from tidy3d_webapi.environment import Env
+from tidy3d_webapi.folder_registry import FolderRegistry, folders
+
+Env.dev.active()
+
+RECORD = {"projectId": "1234", "projectName": "sweep"}
+
+
+def test_registry_scoped_to_environment(monkeypatch):
+    registry = FolderRegistry()
+    registry.put("sweep", RECORD)
+    assert registry.get("sweep") == RECORD
+    try:
+        Env.prod.active()
+        assert registry.get("sweep") is None
+    finally:
+        Env.dev.active()
+    monkeypatch.setenv("SIMCLOUD_APIKEY", "other account")
+    assert registry.get("sweep") is None
+
+
+def test_registry_ttl_and_persistence(tmp_path):
+    path = os.path.join(tmp_path, "folders.json")
+    FolderRegistry(path=path).put("sweep", RECORD)
+    assert FolderRegistry(path=path).get("sweep") == RECORD
+
+    expired = FolderRegistry(ttl=-1, path=os.path.join(tmp_path, "expired.json"))
+    expired.put("sweep", RECORD)
+    assert expired.get("sweep") is None
+
+    # an expired entry is reloaded from the file, e.g. refreshed by another process
+    stale = FolderRegistry(path=path)
+    assert stale.get("sweep") == RECORD
+    stale._entries[stale._key("sweep")]["expires_at"] = 0
+    FolderRegistry(path=path).put("sweep", {**RECORD, "projectId": "5678"})
+    assert stale.get("sweep")["projectId"] == "5678"
+
+    FolderRegistry(path=path).forget("sweep")
+    assert FolderRegistry(path=path).get("sweep") is None
+
+
+@responses.activate
+def test_get_or_create():
+    responses.add(
+        responses.POST,
+        f"{Env.current.web_api_endpoint}/tidy3d/projects",
+        match=[matchers.json_params_matcher({"projectName": "sweep"})],
+        json={"data": RECORD},
+        status=200,
+    )
+    folder = Folder.get_or_create("sweep")
+    assert folder.folder_id == "1234"
+    assert Folder.get_or_create("sweep").folder_id == "1234"
+    # one round trip on a miss, none on a hit
+    assert len(responses.calls) == 1
+    assert folders.get("sweep") == RECORD
@@ -1,10 +1,18 @@
+import json
 import re
 
+import numpy as np
+import pytest
 import responses
+from responses import matchers
 from tidy3d.plugins import DispersionFitter
 
 from tidy3d_webapi.environment import Env
-from tidy3d_webapi.material_fitter import FitterOptions, MaterialFitterTask
+from tidy3d_webapi.material_fitter import (
+    FitterOptions,
+    MaterialFitterTask,
+    encode_nk_data,
+)
 
 Env.dev.active()
 
@@ -60,3 +68,114 @@ def test_material_fitter(monkeypatch):
     )
     task.status = "COMPLETED"
     assert task.save_to_library("test")
+
+
+def test_encode_nk_data():
+    fitter = DispersionFitter.from_file("data/nk_data.csv", skiprows=1, delimiter=",")
+    content = encode_nk_data(fitter)
+    assert content.startswith(b"# Wavelength,n,k\n")
+    data = np.loadtxt(content.decode().splitlines(), delimiter=",")
+    np.testing.assert_array_equal(data[:, 0], fitter.wvl_um)
+    np.testing.assert_array_equal(data[:, 1], fitter.n_data)
+    np.testing.assert_array_equal(data[:, 2], fitter.k_data)
+
+
+@responses.activate
+def test_submit_many():
+    fitter = DispersionFitter.from_file("data/nk_data.csv", skiprows=1, delimiter=",")
+    responses.add(
+        responses.GET,
+        re.compile(f"{Env.current.web_api_endpoint}/tidy3d/fitter/.*/signedUrl.*"),
+        json={"data": "https://example.com"},
+        status=200,
+    )
+    responses.add(responses.PUT, "https://example.com", status=200)
+
+    def fit(request):
+        options = json.loads(json.loads(request.body)["jsonInput"])
+        if options["num_poles"] == 3:
+            return 500, {}, ""
+        record = {"id": f"fit{options['num_poles']}", "status": "RUNNING"}
+        record.update(fileName="nk_data.csv", resourcePath="path")
+        return 200, {}, json.dumps({"data": record})
+
+    responses.add_callback(
+        responses.POST, f"{Env.current.web_api_endpoint}/tidy3d/fitter/fit", callback=fit
+    )
+    options = [FitterOptions(num_poles=num_poles) for num_poles in (1, 2, 3)]
+    tasks = MaterialFitterTask.submit_many([fitter] * 3, options, max_workers=3)
+    assert [task.id if task else None for task in tasks] == ["fit1", "fit2", None]
+    uploads = [call for call in responses.calls if call.request.method == "PUT"]
+    assert len(uploads) == 3
+    assert "simcloud-api-key" not in uploads[0].request.headers
+
+
+@responses.activate
+def test_as_completed(monkeypatch):
+    fitter = DispersionFitter.from_file("data/nk_data.csv", skiprows=1, delimiter=",")
+    sleeps = []
+    monkeypatch.setattr("tidy3d_webapi.material_fitter.time.sleep", sleeps.append)
+    statuses = {"fit1": ["RUNNING", "COMPLETED"], "fit2": ["RUNNING"] * 3 + ["FAILED"]}
+    for task_id, task_statuses in statuses.items():
+        for status in task_statuses:
+            responses.add(
+                responses.GET,
+                f"{Env.current.web_api_endpoint}/tidy3d/fitter/{task_id}",
+                json={"data": {"status": status}},
+                status=200,
+            )
+    responses.add(
+        responses.POST,
+        f"{Env.current.web_api_endpoint}/tidy3d/fitter/save",
+        match=[matchers.json_params_matcher({"id": "fit1", "fitterName": "material1"})],
+        json={"data": True},
+        status=200,
+    )
+    tasks = [
+        MaterialFitterTask(
+            id=task_id,
+            dispersion_fitter=fitter,
+            status="RUNNING",
+            fileName="nk_data.csv",
+            resourcePath="path",
+        )
+        for task_id in statuses
+    ]
+    names = {"fit1": "material1", "fit2": "material2"}
+    finished = MaterialFitterTask.as_completed(tasks, library_names=names)
+    assert [task.id for task in finished] == ["fit1", "fit2"]
+    assert [task.status for task in tasks] == ["COMPLETED", "FAILED"]
+    # the interval grows while nothing finishes
+    assert sleeps == [5.0, 5.0, 7.5]
+    assert len([call for call in responses.calls if "save" in call.request.url]) == 1
+
+    with pytest.raises(TimeoutError):
+        tasks[0].status = "RUNNING"
+        responses.replace(
+            responses.GET,
+            f"{Env.current.web_api_endpoint}/tidy3d/fitter/fit1",
+            json={"data": {"status": "RUNNING"}},
+            status=200,
+        )
+        tasks[0].wait(timeout=1)
+
+
+@responses.activate
+def test_wait_deleted_fit(monkeypatch):
+    fitter = DispersionFitter.from_file("data/nk_data.csv", skiprows=1, delimiter=",")
+    sleeps = []
+    monkeypatch.setattr("tidy3d_webapi.material_fitter.time.sleep", sleeps.append)
+    responses.add(
+        responses.GET, f"{Env.current.web_api_endpoint}/tidy3d/fitter/deleted", status=404
+    )
+    task = MaterialFitterTask(
+        id="deleted",
+        dispersion_fitter=fitter,
+        status="RUNNING",
+        fileName="nk_data.csv",
+        resourcePath="path",
+    )
+    with pytest.raises(ValueError, match="not found"):
+        task.sync_status()
+    assert MaterialFitterTask.wait_all([task], max_errors=3)[0].status == "ERROR"
+    assert len(sleeps) == 2
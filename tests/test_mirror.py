@@ -0,0 +1,130 @@
+from datetime import datetime
+
+import pytz
+import requests
+import responses
+
+from tidy3d_webapi.bulk_delete import delete_tasks
+from tidy3d_webapi.cache import BATCH_DELETE_UNSUPPORTED
+from tidy3d_webapi.environment import Env
+from tidy3d_webapi.mirror import TaskMirror, use_mirror
+from tidy3d_webapi.simulation_task import Folder
+from tidy3d_webapi.webapi import delete, get_info, get_tasks
+
+Env.dev.active()
+
+
+def _record(task_id, status="success", day=1, updated=None):
+    return {
+        "taskId": task_id,
+        "taskName": f"name {task_id}",
+        "projectId": "f1",
+        "status": status,
+        "createdAt": f"2022-01-0{day}T00:00:00.000Z",
+        "updatedAt": updated or f"2022-01-0{day}T00:00:00.000Z",
+    }
+
+
+def _listing(records):
+    responses.add(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/projects/f1/tasks",
+        json={"data": records},
+        status=200,
+    )
+
+
+@responses.activate
+def test_sync_incremental_and_query():
+    responses.add(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/projects",
+        json={"data": [{"projectId": "f1", "projectName": "default"}]},
+        status=200,
+    )
+    _listing([_record("t1", day=1), _record("t2", "running", day=2), _record("t3", day=3)])
+    mirror = TaskMirror(max_age=0)
+    assert mirror.sync()
+    assert [task["taskId"] for task in mirror.query(order="new")] == ["t3", "t2", "t1"]
+    assert [task["taskId"] for task in mirror.query(status="running")] == ["t2"]
+    assert [task["taskId"] for task in mirror.query(name="%t1")] == ["t1"]
+    created_after = datetime(2022, 1, 2, tzinfo=pytz.utc)
+    assert len(mirror.query(created_after=created_after, folder_id="f1")) == 2
+
+    # only the changed and removed tasks are written
+    responses.replace(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/projects/f1/tasks",
+        json={"data": [_record("t1", day=1), _record("t2", "success", day=2)]},
+        status=200,
+    )
+    assert mirror.sync_folder(Folder(projectId="f1", projectName="default")) == 2
+    assert mirror.get("t2")["status"] == "success"
+    assert mirror.get("t3") is None
+
+
+@responses.activate
+def test_mirror_offline():
+    _listing([_record("t1")])
+    mirror = TaskMirror(max_age=0)
+    mirror.sync_folder(Folder(projectId="f1", projectName="default"))
+    responses.add(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/project?projectName=default",
+        body=requests.ConnectionError("offline"),
+    )
+    assert [task["taskId"] for task in mirror.list_tasks("default")] == ["t1"]
+
+
+@responses.activate
+def test_read_through():
+    mirror = use_mirror(":memory:", max_age=60)
+    try:
+        responses.add(
+            responses.GET,
+            f"{Env.current.web_api_endpoint}/tidy3d/project?projectName=default",
+            json={"data": {"projectId": "f1", "projectName": "default"}},
+            status=200,
+        )
+        _listing([_record("t1", day=1), _record("t2", day=2)])
+        assert [task["task_id"] for task in get_tasks(1)] == ["t2"]
+        # synced less than max_age ago, served from the mirror without looking up the folder
+        assert [task["task_id"] for task in get_tasks(order="old")] == ["t1", "t2"]
+        assert len(responses.calls) == 2
+
+        # finished tasks are not fetched again
+        assert get_info("t1").status == "success"
+        assert len(responses.calls) == 2
+
+        # stale, synced again
+        mirror.max_age = 0
+        _listing([_record("t1", day=1), _record("t2", day=2), _record("t3", day=3)])
+        assert len(list(get_tasks())) == 3
+    finally:
+        use_mirror(None)
+
+
+@responses.activate
+def test_deleted_tasks_forgotten():
+    mirror = use_mirror(":memory:", max_age=60)
+    try:
+        for task_id in ("t1", "t2"):
+            mirror.put(_record(task_id))
+            responses.add(
+                responses.DELETE, f"{Env.current.web_api_endpoint}/tidy3d/tasks/{task_id}"
+            )
+        responses.add(
+            responses.GET,
+            f"{Env.current.web_api_endpoint}/tidy3d/tasks/t1/detail",
+            json={"data": _record("t1")},
+            status=200,
+        )
+        delete("t1")
+        assert mirror.get("t1") is None
+        # the batch endpoint is not found, deleted one by one
+        responses.add(responses.DELETE, f"{Env.current.web_api_endpoint}/tidy3d/tasks", status=404)
+        assert delete_tasks(["t2"]).deleted == ["t2"]
+        assert mirror.get("t2") is None
+    finally:
+        use_mirror(None)
+        BATCH_DELETE_UNSUPPORTED.clear()
@@ -0,0 +1,51 @@
+import responses
+
+from tidy3d_webapi.environment import Env
+from tidy3d_webapi.polling import PollingPolicy, ProgressRate, StatusPoller
+
+Env.dev.active()
+
+
+def test_polling_policy():
+    policy = PollingPolicy(min_interval=1, max_interval=30)
+    assert policy.next_interval("queued") == 10
+    assert policy.next_interval("queued", previous=10, changed=False) == 15
+    assert policy.next_interval("queued", previous=25, changed=False) == 30
+    assert policy.next_interval("running", previous=30, changed=True) == 5
+    assert policy.next_interval("running", eta=8) == 2
+    assert policy.next_interval("running", eta=0) == 1
+
+
+def test_progress_rate():
+    rate = ProgressRate()
+    rate.add(10, when=0)
+    assert rate.eta() is None
+    rate.add(20, when=10)
+    assert rate.eta() == 80
+
+
+@responses.activate
+def test_status_poller_uses_folder_listing():
+    task_ids = [f"task{i}" for i in range(4)]
+    for task_id in task_ids:
+        responses.add(
+            responses.GET,
+            f"{Env.current.web_api_endpoint}/tidy3d/tasks/{task_id}/detail",
+            json={"data": {"taskId": task_id, "projectId": "folder1", "status": "queued"}},
+            status=200,
+        )
+    responses.add(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/projects/folder1/tasks",
+        json={
+            "data": [{"taskId": task_id, "status": "SUCCESS"} for task_id in task_ids]
+            + [{"taskId": "other", "status": "running"}]
+        },
+        status=200,
+    )
+    poller = StatusPoller(bulk_threshold=4)
+    assert set(poller.poll(task_ids).values()) == {"queued"}
+    assert len(responses.calls) == 4
+
+    assert set(poller.poll(task_ids).values()) == {"success"}
+    assert len(responses.calls) == 5
@@ -0,0 +1,132 @@
+import io
+
+import numpy as np
+import pytest
+
+from tidy3d_webapi.environment import Env
+from tidy3d_webapi.progress import BatchProgress, ProgressHistory, get_progress_history
+
+Env.dev.active()
+
+
+class GrowingFile:
+    """solver_progress.csv of a running task, served from the requested offset."""
+
+    def __init__(self):
+        self.content = b""
+        self.offsets = []
+
+    def get_object(self, task_id, remote_filename, start_byte=None):
+        self.offsets.append(start_byte)
+        if (start_byte or 0) >= len(self.content):
+            return None
+        return {"Body": io.BytesIO(self.content[start_byte or 0 :])}
+
+
+def rows(perc_done):
+    # the field peaks at 10% then decays one decade every 10%
+    return b"".join(
+        f"{perc:.1f},{10.0 ** (-(perc - 10) / 10) if perc >= 10 else perc / 10:.6e}\n".encode()
+        for perc in perc_done
+    )
+
+
+@pytest.fixture
+def progress_file(monkeypatch):
+    remote = GrowingFile()
+    monkeypatch.setattr("tidy3d_webapi.progress.get_object", remote.get_object)
+    return remote
+
+
+def test_incremental_update(progress_file):
+    history = get_progress_history("abcd")
+    assert history.update() == 0
+    assert history.forecast() is None
+
+    progress_file.content += rows([0, 5, 10]) + b"15.0,3.16"
+    assert history.update() == 3
+    np.testing.assert_allclose(history.perc_done, [0, 5, 10])
+
+    # the partial row is completed by the next update
+    progress_file.content += b"2e-01\n" + rows([20])
+    assert history.update() == 2
+    np.testing.assert_allclose(history.perc_done, [0, 5, 10, 15, 20])
+    assert history.field_decay[3] == pytest.approx(0.3162)
+    assert progress_file.offsets[-1] == len(rows([0, 5, 10])) + len("15.0,3.16")
+    assert get_progress_history("abcd") is history
+
+
+def test_malformed_rows(progress_file):
+    history = get_progress_history("abcd")
+    # three fields per line must not be flattened into mis-paired columns
+    progress_file.content += b"1,2,3\n4,5,6\n" + rows([10]) + b"perc_done\n"
+    assert history.update() == 1
+    np.testing.assert_allclose(history.perc_done, [10])
+
+
+def test_forecast(progress_file, monkeypatch):
+    clock = iter(range(0, 1000, 10))
+    monkeypatch.setattr("tidy3d_webapi.polling.time.monotonic", lambda: next(clock))
+    history = ProgressHistory("abcd")
+    for perc_done in ([0, 10, 20], [30], [40]):
+        progress_file.content += rows(perc_done)
+        history.update()
+
+    forecast = history.forecast(shutoff=1e-5)
+    assert forecast.decay_rate == pytest.approx(-0.1)
+    assert forecast.shutoff_perc_done == pytest.approx(60.0)
+    assert forecast.reaches_shutoff
+    # 10% every 10 seconds, 20% left before the shutoff
+    assert forecast.eta == pytest.approx(20.0)
+
+    forecast = history.forecast(shutoff=1e-12)
+    assert not forecast.reaches_shutoff
+    assert forecast.eta == pytest.approx(60.0)
+
+
+def test_batch_progress(progress_file, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("tidy3d_webapi.progress.time.monotonic", lambda: now[0])
+    monkeypatch.setattr("tidy3d_webapi.progress.time.sleep", lambda _: None)
+    rounds = iter(
+        [
+            {"a": "running", "b": "queued", "c": "success", "d": None},
+            {"a": "running", "b": "running"},
+            {"a": "success", "b": "error"},
+        ]
+    )
+    polled = []
+
+    def poll(self, task_ids):
+        polled.append(sorted(task_ids))
+        return next(rounds)
+
+    monkeypatch.setattr("tidy3d_webapi.progress.StatusPoller.poll", poll)
+    progress = BatchProgress(["a", "b", "c", "d"])
+
+    progress_file.content = rows([0, 10, 20])
+    progress.update()
+    np.testing.assert_allclose(progress.perc_done, [20, 0, 100, 0])
+    assert progress.counts() == {"missing": 1, "queued": 1, "running": 1, "success": 1}
+    assert progress.completion == pytest.approx(55.0)
+    assert progress.eta is None
+
+    progress_file.content += rows([30, 40, 50, 60])
+    now[0] = 60.0
+    progress.update()
+    # both running tasks read the same file, "b" gets it whole
+    np.testing.assert_allclose(progress.perc_done, [60, 60, 100, 0])
+    assert progress.completion == pytest.approx(80.0)
+    # 25% of the batch in a minute, 20% left
+    assert progress.eta == pytest.approx(48.0)
+    assert "2 running, 0 queued, 80.0% complete, 0.0 tasks/min, ETA 0:00:48" in progress.summary()
+
+    assert progress.watch(verbose=False) == {
+        "a": "success",
+        "b": "error",
+        "c": "success",
+        "d": "missing",
+    }
+    assert polled == [["a", "b", "c", "d"], ["a", "b"], ["a", "b"]]
+    assert progress.summary().startswith("2/4 succeeded, 2 failed, 0 running")
+    assert "running" not in progress.table()
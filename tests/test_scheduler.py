@@ -0,0 +1,85 @@
+import pytest
+import responses
+
+from tidy3d_webapi.environment import Env
+from tidy3d_webapi.scheduler import AimdLimit, SubmissionScheduler
+
+Env.dev.active()
+
+
+def _account(credit):
+    responses.add(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/account",
+        json={"data": {"credit": credit, "accountType": "paid"}},
+        status=200,
+    )
+
+
+def test_aimd_limit():
+    limit = AimdLimit(initial=4, maximum=5, cooldown=60)
+    for _ in range(4):
+        limit.on_success()
+    assert limit.limit == pytest.approx(5.0, abs=0.1)
+    limit.on_throttle()
+    limit.on_throttle()
+    # a burst of throttling within the cooldown decreases the limit once
+    assert 2 <= limit.limit < 3
+    limit.acquire()
+    limit.acquire()
+    assert limit.in_flight == limit.peak == 2
+    limit.release()
+    assert limit.in_flight == 1
+
+
+@responses.activate
+def test_submit_all_retries_throttled():
+    _account(100)
+    url = f"{Env.current.web_api_endpoint}/tidy3d/tasks/task0/submit"
+    responses.add(responses.POST, url, status=429, headers={"Retry-After": "0"})
+    responses.add(responses.POST, url, json={"data": {"taskId": "task0"}}, status=200)
+    responses.add(
+        responses.POST,
+        f"{Env.current.web_api_endpoint}/tidy3d/tasks/task1/submit",
+        json={"data": {"taskId": "task1"}},
+        status=200,
+    )
+    responses.add(
+        responses.POST, f"{Env.current.web_api_endpoint}/tidy3d/tasks/task2/submit", status=400
+    )
+    result = SubmissionScheduler(backoff=0).submit_all(["task0", "task1", "task2"])
+    assert sorted(result.submitted) == ["task0", "task1"]
+    assert list(result.failed) == ["task2"]
+    assert result.throttled == 1
+    assert 1 <= result.peak_concurrency <= 4
+
+
+@responses.activate
+def test_submit_all_server_errors():
+    _account(100)
+    for task_id, status in (("task0", "queued"), ("task1", "draft")):
+        responses.add(
+            responses.GET,
+            f"{Env.current.web_api_endpoint}/tidy3d/tasks/{task_id}/detail",
+            json={"data": {"taskId": task_id, "status": status}},
+            status=200,
+        )
+    url0 = f"{Env.current.web_api_endpoint}/tidy3d/tasks/task0/submit"
+    url1 = f"{Env.current.web_api_endpoint}/tidy3d/tasks/task1/submit"
+    # submitted despite the gateway timeout, not submitted again
+    responses.add(responses.POST, url0, status=504)
+    # still a draft, retried
+    responses.add(responses.POST, url1, status=502)
+    responses.add(responses.POST, url1, json={"data": {"taskId": "task1"}}, status=200)
+    result = SubmissionScheduler(backoff=0).submit_all(["task0", "task1"])
+    assert sorted(result.submitted) == ["task0", "task1"]
+    posts = [call.request.url for call in responses.calls if call.request.method == "POST"]
+    assert posts.count(url0) == 1
+    assert posts.count(url1) == 2
+
+
+@responses.activate
+def test_submit_all_without_credit():
+    _account(0)
+    with pytest.raises(ValueError):
+        SubmissionScheduler().submit_all(["task0"])
@@ -0,0 +1,39 @@
+import pytest
+from tidy3d import Simulation
+
+from tidy3d_webapi.serialization import (
+    JSON_ENCODERS,
+    encode_many,
+    encode_simulation,
+    get_json_encoder,
+    register_json_encoder,
+    set_json_encoder,
+)
+
+
+@pytest.mark.parametrize("name", list(JSON_ENCODERS))
+def test_encoders_round_trip(name):
+    sim = Simulation.from_file("data/simulation_1_7_1.json")
+    content = JSON_ENCODERS[name](sim)
+    assert isinstance(content, bytes)
+    assert Simulation.parse_raw(content) == sim
+
+
+def test_set_json_encoder():
+    previous = get_json_encoder()
+    register_json_encoder("constant", lambda model: b"{}")
+    try:
+        set_json_encoder("constant")
+        assert encode_simulation(None) == b"{}"
+        with pytest.raises(ValueError):
+            set_json_encoder("unknown")
+    finally:
+        set_json_encoder(previous)
+        del JSON_ENCODERS["constant"]
+
+
+def test_encode_many():
+    sim = Simulation.from_file("data/simulation_1_7_1.json")
+    sims = {f"sim_{i}": sim.copy(update={"run_time": (i + 1) * 1e-12}) for i in range(3)}
+    encoded = dict(encode_many(sims, max_workers=2))
+    assert encoded == {name: encode_simulation(sim) for name, sim in sims.items()}
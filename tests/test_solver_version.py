@@ -0,0 +1,64 @@
+import os
+
+import responses
+from responses import matchers
+
+from tidy3d_webapi.environment import Env
+from tidy3d_webapi.solver_version import SolverVersionResolver, resolve_solver_version
+
+Env.dev.active()
+
+URL = f"{Env.current.web_api_endpoint}/tidy3d/version/solver"
+
+
+@responses.activate
+def test_resolved_once_per_environment():
+    responses.add(
+        responses.GET,
+        URL,
+        match=[matchers.query_param_matcher({"protocolVersion": "1.7.1"})],
+        json={"data": {"solverVersion": "release-1.7.1"}},
+        status=200,
+    )
+    assert resolve_solver_version(None, "1.7.1") == "release-1.7.1"
+    assert resolve_solver_version(None, "1.7.1") == "release-1.7.1"
+    assert len(responses.calls) == 1
+
+    try:
+        Env.prod.active()
+        responses.add(
+            responses.GET,
+            f"{Env.current.web_api_endpoint}/tidy3d/version/solver",
+            json={"data": {"solverVersion": "release-1.7.0"}},
+            status=200,
+        )
+        assert resolve_solver_version(None, "1.7.1") == "release-1.7.0"
+    finally:
+        Env.dev.active()
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_resolved_version_passed_on():
+    responses.add(responses.GET, URL, json={"data": {"solverVersion": "release-1.7.1"}}, status=200)
+    resolved = resolve_solver_version(None, "1.7.1")
+    # e.g. a batch resolves its version then each task submits with it
+    assert resolve_solver_version(resolved, "1.7.1") == resolved
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_fallback_not_cached():
+    responses.add(responses.GET, URL, status=500)
+    assert resolve_solver_version("custom", "1.7.1") == "custom"
+    responses.replace(responses.GET, URL, json={"data": {"solverVersion": "custom-2"}}, status=200)
+    assert resolve_solver_version("custom", "1.7.1") == "custom-2"
+
+
+@responses.activate
+def test_persisted(tmp_path):
+    responses.add(responses.GET, URL, json={"data": {"solverVersion": "release-1.7.1"}}, status=200)
+    path = os.path.join(tmp_path, "solver_versions.json")
+    assert SolverVersionResolver(path=path).resolve(None, "1.7.1") == "release-1.7.1"
+    assert SolverVersionResolver(path=path).resolve(None, "1.7.1") == "release-1.7.1"
+    assert len(responses.calls) == 1
@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+import responses
+
+from tidy3d_webapi.environment import Env
+from tidy3d_webapi.streaming import as_completed, as_completed_async
+
+Env.dev.active()
+
+DELAYS = {"t1": 0.3, "t3": 0.0}
+
+
+def _add_detail(task_id, status):
+    responses.add(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/tasks/{task_id}/detail",
+        json={"data": {"taskId": task_id, "status": status}},
+        status=200,
+    )
+
+
+def _fake_load(task_id, path):
+    time.sleep(DELAYS[task_id])
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(task_id)
+    return f"data {task_id}"
+
+
+@responses.activate
+def test_as_completed(monkeypatch, tmp_path):
+    _add_detail("t1", "success")
+    _add_detail("t2", "error")
+    _add_detail("t3", "success")
+    monkeypatch.setattr("tidy3d_webapi.streaming._download_and_load", _fake_load)
+    results = list(as_completed(["t1", "t2", "t3"], path_dir=str(tmp_path), free_data=True))
+    assert results == [("t2", None), ("t3", "data t3"), ("t1", "data t1")]
+    assert not list(tmp_path.iterdir())
+
+
+@responses.activate
+def test_as_completed_async(monkeypatch, tmp_path):
+    _add_detail("t1", "success")
+    _add_detail("t3", "success")
+    monkeypatch.setattr("tidy3d_webapi.streaming._download_and_load", _fake_load)
+
+    async def _collect():
+        return [
+            task_id
+            async for task_id, _ in as_completed_async(
+                ["t1", "t3"], path_dir=str(tmp_path), max_in_flight=1
+            )
+        ]
+
+    assert sorted(asyncio.run(_collect())) == ["t1", "t3"]
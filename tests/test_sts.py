@@ -5,7 +5,7 @@ from botocore.exceptions import ClientError
 
 from tidy3d_webapi.environment import Env
 from tidy3d_webapi.s3_utils import download_file
-from tidy3d_webapi.sts_token import get_s3_sts_token
+from tidy3d_webapi.sts_token import _S3STSToken, get_s3_sts_token
 
 Env.dev.active()
 
@@ -44,3 +44,23 @@ def test_sts_cross():
             Key="users/AIDAU77I6BZ227VL4JXAN/6054d460-ea30-47f8-96c1-c8baf617668d/cylinder.cgns",
         )
     assert err_info.value.response["Error"] == {"Code": "403", "Message": "Forbidden"}
+
+
+def _token(expiration):
+    return _S3STSToken.parse_obj(
+        {
+            "cloudpath": "s3://bucket/users/abcd/simulation.json",
+            "userCredentials": {
+                "accessKeyId": "key",
+                "expiration": expiration,
+                "secretAccessKey": "secret",
+                "sessionToken": "session",
+            },
+        }
+    )
+
+
+def test_client_shared_until_refresh():
+    client = _token("2030-01-01T00:00:00Z").get_client()
+    assert _token("2030-01-01T00:00:00Z").get_client() is client
+    assert _token("2030-01-01T01:00:00Z").get_client() is not client
@@ -0,0 +1,76 @@
+import json
+import re
+
+import pytest
+import responses
+
+from tidy3d_webapi.environment import Env
+from tidy3d_webapi.submission_queue import SubmissionQueue
+
+Env.dev.active()
+
+
+class _FakeServer:
+    """Record the submissions in arrival order."""
+
+    def __init__(self):
+        self.submissions = []
+
+    def submit(self, request):
+        task_id = request.url.split("/")[-2]
+        self.submissions.append((task_id, json.loads(request.body)["workerGroup"]))
+        if task_id == "broken":
+            return 500, {}, json.dumps({"error": "boom"})
+        return 200, {}, json.dumps({"data": {"taskId": task_id}})
+
+
+@responses.activate
+def test_weighted_fair_queues():
+    server = _FakeServer()
+    responses.add_callback(
+        responses.POST,
+        re.compile(f"{Env.current.web_api_endpoint}/tidy3d/tasks/.*/submit"),
+        callback=server.submit,
+    )
+    queue = SubmissionQueue(max_workers=1)
+    queue.add_queue("sweep", weight=1, worker_group="batch")
+    queue.add_queue("interactive", weight=3, worker_group="fast")
+    for i in range(8):
+        queue.put(f"sweep{i}", "sweep")
+    queue.put("urgent_sweep", "sweep", priority=5)
+    for i in range(4):
+        queue.put(f"interactive{i}", "interactive")
+    queue.put("broken", "interactive")
+    with queue:
+        pass
+
+    order = [task_id for task_id, _ in server.submissions]
+    assert len(order) == 14
+    # interactive tasks get three submissions for every sweep submission
+    assert order[:7] == [
+        "interactive0",
+        "urgent_sweep",
+        "interactive1",
+        "interactive2",
+        "interactive3",
+        "sweep0",
+        "broken",
+    ]
+    assert dict(server.submissions)["sweep3"] == "batch"
+    assert dict(server.submissions)["interactive0"] == "fast"
+
+    stats = queue.stats
+    assert stats["interactive"].submitted == 4
+    assert stats["interactive"].failed == 1
+    assert stats["sweep"].submitted == 9
+    assert stats["sweep"].max_wait >= stats["interactive"].max_wait
+    assert "broken" in queue.errors
+    assert "interactive" in queue.summary()
+
+
+def test_unknown_queue():
+    queue = SubmissionQueue()
+    with pytest.raises(ValueError):
+        queue.put("task", "missing")
+    with pytest.raises(ValueError):
+        queue.add_queue("zero", weight=0)
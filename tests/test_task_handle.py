@@ -0,0 +1,54 @@
+import responses
+from tidy3d import Simulation
+
+from tidy3d_webapi.environment import Env
+from tidy3d_webapi.simulation_task import SimulationTask, TaskState
+from tidy3d_webapi.task_handle import get_handle
+
+Env.dev.active()
+
+
+def _add_detail(status):
+    responses.add(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/tasks/abcd/detail",
+        json={"data": {"taskId": "abcd", "taskName": "name", "status": status}},
+        status=200,
+    )
+
+
+@responses.activate
+def test_handle_memoizes_detail(monkeypatch):
+    _add_detail("running")
+    _add_detail("success")
+    handle = get_handle("abcd")
+    assert get_handle("abcd") is handle
+    task = handle.task
+    assert handle.task is task
+    assert handle.status == "running"
+    assert len(responses.calls) == 1
+
+    monkeypatch.setattr("tidy3d_webapi.task_handle.STATUS_TTL", {"running": 0.0})
+    assert handle.status == "success"
+    assert handle.task is task
+    assert len(responses.calls) == 2
+
+    # finished tasks never change
+    assert handle.status == "success"
+    assert len(responses.calls) == 2
+
+
+def test_handles_release_simulations(monkeypatch):
+    monkeypatch.setattr("tidy3d_webapi.task_handle.MAX_HANDLE_SIMULATIONS", 2)
+    sim = Simulation.from_file("data/simulation_1_7_1.json")
+    uploaded = SimulationTask.construct(task_id="t0", simulation=sim, status="draft")
+    uploaded._state = TaskState.UPLOADED
+    draft = SimulationTask.construct(task_id="t1", simulation=sim, status="draft")
+    handles = [get_handle(uploaded), get_handle(draft)]
+    for index in range(2, 4):
+        get_handle(f"t{index}")
+    # the uploaded task is kept as metadata, the draft still needs its simulation to upload
+    assert handles[0].peek().simulation is None
+    assert handles[0].peek().task_id == "t0"
+    assert uploaded.simulation is sim
+    assert handles[1].peek() is draft
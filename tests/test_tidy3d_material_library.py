@@ -1,4 +1,7 @@
+import json
+
 import responses
+import tidy3d as td
 
 from tidy3d_webapi.environment import Env
 from tidy3d_webapi.material_libray import MaterialLibray
@@ -17,3 +20,53 @@ def test_lib():
     libs = MaterialLibray.list()
     lib = libs[0]
     assert lib.name == "medium1"
+
+
+@responses.activate
+def test_lazy_parsing(monkeypatch):
+    medium = td.Medium(permittivity=2.0)
+    responses.add(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/libraries",
+        json={
+            "data": [
+                {
+                    "id": "1",
+                    "name": "medium1",
+                    "calcResult": medium.json(),
+                    "jsonInput": json.dumps({"num_poles": 1}),
+                },
+                {"id": "2", "name": "medium2", "calcResult": None},
+            ]
+        },
+        status=200,
+    )
+    assert MaterialLibray.list_names() == ["medium1", "medium2"]
+
+    lib, empty = MaterialLibray.list()
+    parsed = []
+    loads = json.loads
+    monkeypatch.setattr(
+        "tidy3d_webapi.material_libray.json.loads",
+        lambda value: parsed.append(value) or loads(value),
+    )
+    assert lib.medium == medium
+    assert lib.medium is lib.medium
+    assert lib.json_input == {"num_poles": 1}
+    assert len(parsed) == 2
+    assert empty.medium is None and empty.json_input is None
+    assert list(lib.dict()) == ["id", "name", "medium", "medium_type", "json_input"]
+    assert lib.copy(update={"medium": None}).medium is None
+    assert MaterialLibray(id="3", name="medium3", medium=medium).medium == medium
+
+
+@responses.activate
+def test_list_empty():
+    responses.add(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/libraries",
+        json={"data": []},
+        status=200,
+    )
+    assert MaterialLibray.list() is None
+    assert MaterialLibray.list_names() is None
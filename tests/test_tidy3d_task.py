@@ -1,11 +1,14 @@
 import os
 import tempfile
 
+import pytest
 import responses
 from responses import matchers
+from tidy3d import Simulation
+from tidy3d.version import __version__
 
 from tidy3d_webapi.environment import Env
-from tidy3d_webapi.simulation_task import Folder, SimulationTask
+from tidy3d_webapi.simulation_task import Folder, SimulationTask, TaskState
 
 Env.dev.active()
 
@@ -115,9 +118,9 @@ def test_upload(monkeypatch):
 @responses.activate
 def test_create():
     responses.add(
-        responses.GET,
-        f"{Env.current.web_api_endpoint}/tidy3d/project",
-        match=[matchers.query_param_matcher({"projectName": "test folder2"})],
+        responses.POST,
+        f"{Env.current.web_api_endpoint}/tidy3d/projects",
+        match=[matchers.json_params_matcher({"projectName": "test folder2"})],
         json={"data": {"projectId": "1234", "projectName": "test folder2"}},
         status=200,
     )
@@ -141,9 +144,9 @@ def test_create():
 @responses.activate
 def test_submit():
     responses.add(
-        responses.GET,
-        f"{Env.current.web_api_endpoint}/tidy3d/project",
-        match=[matchers.query_param_matcher({"projectName": "test folder1"})],
+        responses.POST,
+        f"{Env.current.web_api_endpoint}/tidy3d/projects",
+        match=[matchers.json_params_matcher({"projectName": "test folder1"})],
         json={"data": {"projectId": "1234", "projectName": "test folder1"}},
         status=200,
     )
@@ -198,6 +201,9 @@ def test_estimate_cost():
     responses.add(
         responses.POST,
         f"{Env.current.web_api_endpoint}/tidy3d/tasks/3eb06d16-208b-487b-864b-e9b1d3e010a7/metadata",
+        match=[
+            matchers.json_params_matcher({"solverVersion": None, "protocolVersion": __version__})
+        ],
         json={"data": {"flexUnit": 2.33}},
         status=200,
     )
@@ -249,3 +255,88 @@ def test_get_log(monkeypatch):
     with tempfile.NamedTemporaryFile() as temp:
         task.get_log(temp.name)
         assert os.path.getsize(temp.name) > 0
+
+
+@responses.activate
+def test_submit_skips_redundant_upload(monkeypatch):
+    responses.add(
+        responses.POST,
+        f"{Env.current.web_api_endpoint}/tidy3d/projects",
+        match=[matchers.json_params_matcher({"projectName": "test folder1"})],
+        json={"data": {"projectId": "1234", "projectName": "test folder1"}},
+        status=200,
+    )
+    responses.add(
+        responses.POST,
+        f"{Env.current.web_api_endpoint}/tidy3d/projects/1234/tasks",
+        json={"data": {"taskId": "1234", "taskName": "test task", "status": "draft"}},
+        status=200,
+    )
+    responses.add(
+        responses.POST,
+        f"{Env.current.web_api_endpoint}/tidy3d/tasks/1234/submit",
+        json={"data": {"taskId": "1234"}},
+        status=200,
+    )
+    uploads = []
+    monkeypatch.setattr(
+        "tidy3d_webapi.simulation_task.upload_string", lambda *args: uploads.append(args)
+    )
+    sim = Simulation.from_file("data/simulation_1_7_1.json")
+    task = SimulationTask.create(sim, "test task", "test folder1")
+    assert task.state == TaskState.CREATED
+
+    task.upload_simulation()
+    assert task.state == TaskState.UPLOADED
+    assert task.fingerprint
+    # the uploaded json is not kept
+    assert task._encoded is None
+    task.submit()
+    assert len(uploads) == 1
+    assert task.state == TaskState.SUBMITTED
+    assert {"create", "serialize", "upload", "submit"} <= set(task.timings)
+
+    with pytest.raises(ValueError):
+        task.submit()
+    with pytest.raises(ValueError):
+        task.upload_simulation()
+
+
+def test_state_of_fetched_task():
+    assert SimulationTask(taskId="1234", status="draft").state == TaskState.CREATED
+    assert SimulationTask(taskId="1234", status="running").state == TaskState.SUBMITTED
+
+
+def test_encoded_simulation_memoized(monkeypatch):
+    calls = []
+
+    def _encode(simulation):
+        calls.append(simulation)
+        return simulation.json().encode("utf-8")
+
+    monkeypatch.setattr("tidy3d_webapi.simulation_task.encode_simulation", _encode)
+    sim = Simulation.from_file("data/simulation_1_7_1.json")
+    task = SimulationTask.construct(task_id="1234", simulation=sim)
+    content = task.encoded_simulation()
+    assert task.encoded_simulation() is content
+    assert len(calls) == 1
+
+    task.simulation = sim.copy(update={"run_time": 2e-12})
+    assert task.encoded_simulation() != content
+    assert len(calls) == 2
+
+
+def test_get_simulation_revalidates_draft(monkeypatch):
+    conditions = []
+
+    def _get_object(*args, if_none_match=None):
+        conditions.append(if_none_match)
+        if if_none_match == '"etag"':
+            return None
+        return {"ETag": '"etag"', "Body": open("data/simulation_1_7_1.json", "rb")}
+
+    monkeypatch.setattr("tidy3d_webapi.simulation_task.get_object", _get_object)
+    sim = SimulationTask.construct(task_id="1234", status="draft").get_simulation()
+    assert sim == Simulation.from_file("data/simulation_1_7_1.json")
+    assert SimulationTask.construct(task_id="1234", status="draft").get_simulation() is sim
+    assert conditions == [None, '"etag"']
@@ -1,11 +1,14 @@
 import tempfile
+from datetime import datetime
 
+import pytz
 import responses
 import tidy3d
 from responses import matchers
 from tidy3d import Simulation
 
 from tidy3d_webapi.environment import Env
+from tidy3d_webapi.task_handle import clear_handles
 from tidy3d_webapi.webapi import (
     delete,
     delete_old,
@@ -13,11 +16,15 @@ from tidy3d_webapi.webapi import (
     download_json,
     download_log,
     estimate_cost,
+    estimate_cost_many,
     get_info,
     get_run_info,
     get_tasks,
+    iter_tasks,
     load,
     load_simulation,
+    monitor,
+    monitor_many,
     start,
     upload,
 )
@@ -26,9 +33,9 @@ from tidy3d_webapi.webapi import (
 @responses.activate
 def test_upload(monkeypatch):
     responses.add(
-        responses.GET,
-        f"{Env.current.web_api_endpoint}/tidy3d/project",
-        match=[matchers.query_param_matcher({"projectName": "test webapi folder"})],
+        responses.POST,
+        f"{Env.current.web_api_endpoint}/tidy3d/projects",
+        match=[matchers.json_params_matcher({"projectName": "test webapi folder"})],
         json={"data": {"projectId": "1234", "projectName": "test webapi folder"}},
         status=200,
     )
@@ -259,7 +266,7 @@ def test_download_json(monkeypatch):
 
 
 @responses.activate
-def test_load_simulation(monkeypatch):
+def test_load_simulation(monkeypatch, tmp_path):
     responses.add(
         responses.GET,
         f"{Env.current.web_api_endpoint}/tidy3d/tasks/abcd/detail",
@@ -267,16 +274,30 @@ def test_load_simulation(monkeypatch):
             "data": {
                 "taskId": "abcd",
                 "createdAt": "2022-01-01T00:00:00.000Z",
+                "status": "success",
             }
         },
         status=200,
     )
 
-    def mock_download(*args, **kwargs):
-        pass
+    requested = []
 
-    monkeypatch.setattr("tidy3d_webapi.simulation_task.download_file", mock_download)
-    assert load_simulation("abcd", "data/simulation_1_7_1.json")
+    def mock_get_object(*args, **kwargs):
+        requested.append(args)
+        return {"ETag": '"etag"', "Body": open("data/simulation_1_7_1.json", "rb")}
+
+    monkeypatch.setattr("tidy3d_webapi.simulation_task.get_object", mock_get_object)
+    sim = load_simulation("abcd", in_memory=True)
+    assert sim
+    clear_handles()
+    # submitted tasks are loaded from the cache without download
+    assert load_simulation("abcd", in_memory=True) is sim
+    assert len(requested) == 1
+    # by default the simulation is still saved to a file
+    monkeypatch.chdir(tmp_path)
+    assert load_simulation("abcd") is sim
+    assert (tmp_path / "simulation.json").exists()
+    assert len(requested) == 1
 
 
 @responses.activate
@@ -352,4 +373,199 @@ def test_get_tasks():
         status=200,
     )
 
-    assert get_tasks(1)[0]["task_id"] == "abcd"
+    assert next(get_tasks(1))["task_id"] == "abcd"
+
+
+@responses.activate
+def test_get_tasks_top_k():
+    responses.add(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/project",
+        match=[matchers.query_param_matcher({"projectName": "default"})],
+        json={"data": {"projectId": "abcd", "projectName": "default"}},
+        status=200,
+    )
+    responses.add(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/projects/abcd/tasks",
+        json={
+            "data": [
+                {"taskId": f"task{day}", "createdAt": f"2022-01-{day:02d}T00:00:00.000Z"}
+                for day in (3, 1, 4, 2, 5)
+            ]
+            + [{"taskId": "undated"}]
+        },
+        status=200,
+    )
+
+    tasks = get_tasks(2)
+    assert [task["task_id"] for task in tasks] == ["task5", "task4"]
+    assert [task["task_id"] for task in get_tasks(2, order="old")] == ["undated", "task1"]
+    assert len(list(get_tasks())) == 6
+
+
+@responses.activate
+def test_monitor(monkeypatch):
+    monkeypatch.setattr("tidy3d_webapi.webapi.time.sleep", lambda _: None)
+    responses.add(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/tasks/abcd/detail",
+        json={"data": {"taskId": "abcd", "status": "queued"}},
+        status=200,
+    )
+    responses.add(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/tasks/abcd/detail",
+        json={"data": {"taskId": "abcd", "status": "success"}},
+        status=200,
+    )
+    assert monitor("abcd") == "success"
+
+
+@responses.activate
+def test_monitor_many(monkeypatch):
+    monkeypatch.setattr("tidy3d_webapi.webapi.time.sleep", lambda _: None)
+    for task_id, status in (("abcd", "success"), ("efgh", "error")):
+        responses.add(
+            responses.GET,
+            f"{Env.current.web_api_endpoint}/tidy3d/tasks/{task_id}/detail",
+            json={"data": {"taskId": task_id, "status": "running"}},
+            status=200,
+        )
+        responses.add(
+            responses.GET,
+            f"{Env.current.web_api_endpoint}/tidy3d/tasks/{task_id}/detail",
+            json={"data": {"taskId": task_id, "status": status}},
+            status=200,
+        )
+    assert monitor_many(["abcd", "efgh"]) == {"abcd": "success", "efgh": "error"}
+
+
+@responses.activate
+def test_task_handle_reuse(monkeypatch):
+    responses.add(
+        responses.POST,
+        f"{Env.current.web_api_endpoint}/tidy3d/projects",
+        match=[matchers.json_params_matcher({"projectName": "test webapi folder"})],
+        json={"data": {"projectId": "1234", "projectName": "test webapi folder"}},
+        status=200,
+    )
+    responses.add(
+        responses.POST,
+        f"{Env.current.web_api_endpoint}/tidy3d/projects/1234/tasks",
+        json={"data": {"taskId": "1234", "taskName": "test task", "status": "draft"}},
+        status=200,
+    )
+    responses.add(
+        responses.POST,
+        f"{Env.current.web_api_endpoint}/tidy3d/tasks/1234/submit",
+        json={"data": {"taskId": "1234"}},
+        status=200,
+    )
+    responses.add(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/tasks/1234/detail",
+        json={"data": {"taskId": "1234", "taskName": "test task", "status": "success"}},
+        status=200,
+    )
+
+    def mock(*args, **kwargs):
+        with open(kwargs["to_file"], "w") as f:
+            f.write("0.3,5.7")
+
+    monkeypatch.setattr("tidy3d_webapi.simulation_task.upload_string", lambda *a, **k: None)
+    monkeypatch.setattr("tidy3d_webapi.simulation_task.download_file", mock)
+
+    sim = Simulation.from_file("data/simulation_1_7_1.json")
+    task_id = upload(sim, "test task", "test webapi folder")
+    start(task_id)
+    assert get_run_info(task_id) == (0.3, 5.7)
+    with tempfile.NamedTemporaryFile() as f:
+        download_log(task_id, f.name)
+    detail_calls = [call for call in responses.calls if call.request.url.endswith("/detail")]
+    assert not detail_calls
+
+    assert get_info(task_id).status == "success"
+    assert get_info(task_id).status == "success"
+    detail_calls = [call for call in responses.calls if call.request.url.endswith("/detail")]
+    assert len(detail_calls) == 1
+
+
+@responses.activate
+def test_delete_old_all_folders_dry_run():
+    responses.add(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/projects",
+        json={
+            "data": [
+                {"projectId": "f1", "projectName": "a"},
+                {"projectId": "f2", "projectName": "b"},
+            ]
+        },
+        status=200,
+    )
+    for folder_id in ("f1", "f2"):
+        responses.add(
+            responses.GET,
+            f"{Env.current.web_api_endpoint}/tidy3d/projects/{folder_id}/tasks",
+            json={
+                "data": [
+                    {"taskId": f"{folder_id}_old", "createdAt": "2022-01-01T00:00:00.000Z"},
+                    {"taskId": f"{folder_id}_new", "createdAt": "2099-01-01T00:00:00.000Z"},
+                ]
+            },
+            status=200,
+        )
+    assert delete_old(100, folder=None, dry_run=True) == 2
+
+
+@responses.activate
+def test_estimate_cost_many():
+    for task_id in ("abcd", "efgh"):
+        responses.add(
+            responses.POST,
+            f"{Env.current.web_api_endpoint}/tidy3d/tasks/{task_id}/metadata",
+            json={"data": {"flex_unit": 1.5}},
+            status=200,
+        )
+    summary = estimate_cost_many(["abcd", "efgh"], budget=5)
+    assert summary.total == 3.0
+    assert summary.within_budget
+
+
+@responses.activate
+def test_iter_tasks():
+    responses.add(
+        responses.GET,
+        f"{Env.current.web_api_endpoint}/tidy3d/projects",
+        json={"data": [{"projectId": f"f{i}", "projectName": f"folder {i}"} for i in range(3)]},
+        status=200,
+    )
+    for i in range(3):
+        responses.add(
+            responses.GET,
+            f"{Env.current.web_api_endpoint}/tidy3d/projects/f{i}/tasks",
+            json={
+                "data": [
+                    {
+                        "taskId": f"f{i}_run",
+                        "status": "running",
+                        "createdAt": "2022-01-01T00:00:00Z",
+                    },
+                    {
+                        "taskId": f"f{i}_new",
+                        "status": "running",
+                        "createdAt": "2099-01-01T00:00:00Z",
+                    },
+                    {
+                        "taskId": f"f{i}_done",
+                        "status": "success",
+                        "createdAt": "2022-01-01T00:00:00Z",
+                    },
+                ]
+            },
+            status=200,
+        )
+    before = datetime(2023, 1, 1, tzinfo=pytz.utc)
+    tasks = iter_tasks(status="RUNNING", created_before=before, max_workers=2)
+    assert sorted(task["taskId"] for task in tasks) == ["f0_run", "f1_run", "f2_run"]
@@ -1,6 +1,7 @@
 """
 tidy3d-webapi for Python interact with tidy3d platform.
 """
+from .batch import Batch
 from .cli import tidy3d_cli
 from .material_fitter import MaterialFitterTask
 from .material_libray import MaterialLibray
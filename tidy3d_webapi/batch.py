@@ -0,0 +1,276 @@
+"""
+Batch engine for running many simulations concurrently.
+"""
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from threading import Lock
+from typing import Dict, Iterator, Optional, Tuple
+
+from pydantic import BaseModel, Field, PrivateAttr
+from tidy3d import Simulation, SimulationData
+
+from tidy3d_webapi.polling import StatusPoller
+from tidy3d_webapi.serialization import encoding_executor, submit_encode
+from tidy3d_webapi.simulation_task import ERROR_STATES, SUCCESS_STATES, SimulationTask
+from tidy3d_webapi.solver_version import resolve_solver_version
+from tidy3d_webapi.task_handle import get_handle
+
+BATCH_STAGES = ("serialize", "upload", "submit", "wait", "download", "load")
+# seconds between status checks when poll_interval is lower, so waiting doesn't spin
+MIN_POLL_INTERVAL = 0.5
+
+
+class StageStats(BaseModel):
+    """
+    Counters of one stage of the batch pipeline.
+    """
+
+    count: int = Field(0, title="count", description="Number of tasks finished this stage.")
+    failed: int = Field(0, title="failed", description="Number of tasks failed in this stage.")
+    busy_time: float = Field(
+        0.0, title="busy time", description="Sum of the time spent by each task in this stage."
+    )
+    first_start: Optional[float] = Field(title="first start", description="perf_counter time.")
+    last_end: Optional[float] = Field(title="last end", description="perf_counter time.")
+
+    @property
+    def elapsed(self) -> float:
+        """Wall time between the first task entering and the last task leaving this stage."""
+        if self.first_start is None or self.last_end is None:
+            return 0.0
+        return self.last_end - self.first_start
+
+    @property
+    def throughput(self) -> float:
+        """Tasks per second through this stage."""
+        return self.count / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class BatchStats(BaseModel):
+    """
+    Per-stage statistics of a :class:`Batch` run, safe to update from worker threads.
+    """
+
+    stages: Dict[str, StageStats] = Field(
+        default_factory=lambda: {stage: StageStats() for stage in BATCH_STAGES}
+    )
+    _lock: Lock = PrivateAttr(default_factory=Lock)
+
+    def record(self, stage: str, start: float, end: float, success: bool = True):
+        """
+        Record one task passing through a stage.
+        Parameters
+        ----------
+        stage: str
+            stage name, one of ``BATCH_STAGES``.
+        start: float
+            ``time.perf_counter()`` when the task entered the stage.
+        end: float
+            ``time.perf_counter()`` when the task left the stage.
+        success: bool
+            whether the stage succeeded.
+        """
+        with self._lock:
+            stats = self.stages[stage]
+            if success:
+                stats.count += 1
+            else:
+                stats.failed += 1
+            stats.busy_time += end - start
+            stats.first_start = (
+                start if stats.first_start is None else min(stats.first_start, start)
+            )
+            stats.last_end = end if stats.last_end is None else max(stats.last_end, end)
+
+    def summary(self) -> str:
+        """
+        One line per stage with its count and throughput.
+        """
+        return "\n".join(
+            f"{stage:>9}: {stats.count:>5} done, {stats.failed:>3} failed, "
+            f"{stats.throughput:8.2f} tasks/s, {stats.busy_time:8.2f} s busy"
+            for stage, stats in self.stages.items()
+        )
+
+
+class Batch(BaseModel):
+    """
+    Run a dictionary of named :class:`.Simulation` as a pipelined, bounded-concurrency workflow:
+    serialize -> upload -> submit -> wait -> download -> load.
+
+    For example:
+        batch = Batch(simulations={"sim_0": sim_0, "sim_1": sim_1}, folder_name="sweep")
+        for task_name, sim_data in batch.run_iter():
+            ...
+        print(batch.stats.summary())
+    """
+
+    simulations: Dict[str, Simulation] = Field(
+        ..., title="simulations", description="Mapping of task name to simulation."
+    )
+    folder_name: str = Field("default", title="folder name", description="Folder of the tasks.")
+    callback_url: str = Field(
+        None,
+        title="Callback URL",
+        description="Http PUT url to receive simulation finish event of every task.",
+    )
+    solver_version: str = Field(None, title="solver version", description="Solver version.")
+    worker_group: str = Field(None, title="worker group", description="Worker group.")
+    path_dir: str = Field(".", title="path dir", description="Directory to download results.")
+    max_workers: int = Field(
+        8, title="max workers", description="Maximum concurrent uploads and submissions.", gt=0
+    )
+    max_downloads: int = Field(
+        4, title="max downloads", description="Maximum concurrent downloads and loads.", gt=0
+    )
+    serialize_workers: int = Field(
+        None,
+        title="serialize workers",
+        description="Maximum threads encoding simulations, the number of cpus if None.",
+        gt=0,
+    )
+    poll_interval: float = Field(
+        5.0,
+        title="poll interval",
+        description="Seconds between status checks, at least MIN_POLL_INTERVAL.",
+        ge=0,
+    )
+
+    stats: BatchStats = Field(default_factory=BatchStats, title="stats")
+    errors: Dict[str, str] = Field(
+        {}, title="errors", description="Mapping of task name to the reason it failed."
+    )
+
+    _tasks: Dict[str, SimulationTask] = PrivateAttr(default_factory=dict)
+    _resolved_solver_version: Optional[str] = PrivateAttr(None)
+
+    @property
+    def task_ids(self) -> Dict[str, str]:
+        """Mapping of task name to task id of the tasks created so far."""
+        return {name: task.task_id for name, task in self._tasks.items()}
+
+    def _timed(self, stage: str, func, *args):
+        start = time.perf_counter()
+        try:
+            result = func(*args)
+        except Exception:
+            self.stats.record(stage, start, time.perf_counter(), success=False)
+            raise
+        self.stats.record(stage, start, time.perf_counter())
+        return result
+
+    def _upload_and_submit(self, task_name: str, content: bytes) -> str:
+        """Upload and submit one encoded simulation, return its task id."""
+        # the simulation is uploaded by this stage, don't let submit upload it again
+        task = SimulationTask.create(None, task_name, self.folder_name, self.callback_url)
+        self._tasks[task_name] = task
+        self._timed("upload", task.upload_json, content, False)
+        # the handle keeps the fingerprint, e.g. for estimate_costs(batch.task_ids.values())
+        get_handle(task)
+        self._timed("submit", task.submit, self._resolved_solver_version, self.worker_group)
+        return task.task_id
+
+    def _download_and_load(self, task_name: str) -> SimulationData:
+        """Download the results of one task and load them."""
+        task = self._tasks[task_name]
+        path = os.path.join(self.path_dir, f"{task.task_id}.hdf5")
+        self._timed("download", task.get_simulation_hdf5, path, False)
+        return self._timed("load", SimulationData.from_file, path)
+
+    def _fail(self, task_name: str, reason: str):
+        self.errors[task_name] = reason
+        print(f"Task {task_name} failed: {reason}")
+
+    # pylint:disable=too-many-locals,too-many-branches,too-many-statements
+    def run_iter(self) -> Iterator[Tuple[str, SimulationData]]:
+        """
+        Run the batch, yielding ``(task_name, SimulationData)`` as each task completes.
+        Tasks that fail at any stage are skipped and recorded in :attr:`errors`.
+        """
+        os.makedirs(self.path_dir, exist_ok=True)
+        # resolved once, every task of the batch runs on the same solver
+        self._resolved_solver_version = resolve_solver_version(self.solver_version)
+        with encoding_executor(
+            len(self.simulations), self.serialize_workers
+        ) as encode_pool, ThreadPoolExecutor(self.max_workers) as upload_pool, ThreadPoolExecutor(
+            self.max_downloads
+        ) as download_pool:
+            # simulations are encoded in parallel, each upload starts as soon as its bytes are ready
+            encoding = {
+                submit_encode(encode_pool, simulation): name
+                for name, simulation in self.simulations.items()
+            }
+            uploading = {}
+            downloading = {}
+            running = {}
+            poller = StatusPoller(max_workers=self.max_workers)
+            next_poll = time.perf_counter()
+            while encoding or uploading or running or downloading:
+                timeout = max(0.0, next_poll - time.perf_counter()) if running else None
+                futures = set(encoding) | set(uploading) | set(downloading)
+                if futures:
+                    done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+                else:
+                    done = set()
+                    time.sleep(timeout)
+
+                for future in done:
+                    if future in encoding:
+                        name = encoding.pop(future)
+                        end = time.perf_counter()
+                        if future.exception():
+                            self.stats.record("serialize", end, end, success=False)
+                            self._fail(name, str(future.exception()))
+                            continue
+                        content, elapsed = future.result()
+                        self.stats.record("serialize", end - elapsed, end)
+                        uploading[upload_pool.submit(self._upload_and_submit, name, content)] = name
+                    elif future in uploading:
+                        name = uploading.pop(future)
+                        if future.exception():
+                            self._fail(name, str(future.exception()))
+                        else:
+                            running[future.result()] = (name, time.perf_counter())
+                    else:
+                        name = downloading.pop(future)
+                        if future.exception():
+                            self._fail(name, str(future.exception()))
+                        else:
+                            yield name, future.result()
+
+                if running and time.perf_counter() >= next_poll:
+                    next_poll = time.perf_counter() + max(self.poll_interval, MIN_POLL_INTERVAL)
+                    try:
+                        statuses = poller.poll(running)
+                    except Exception as err:  # pylint:disable=broad-except
+                        # transient, the tasks in flight are checked again next round
+                        print(f"Failed to poll the task statuses: {err}")
+                        statuses = {}
+                    for task_id, status in statuses.items():
+                        if (
+                            status is not None
+                            and status not in SUCCESS_STATES
+                            and status not in ERROR_STATES
+                        ):
+                            continue
+                        name, start = running.pop(task_id)
+                        success = status in SUCCESS_STATES
+                        self.stats.record("wait", start, time.perf_counter(), success)
+                        if success:
+                            downloading[download_pool.submit(self._download_and_load, name)] = name
+                        elif status is None:
+                            self._fail(name, f"task {task_id} not found")
+                        else:
+                            self._fail(name, f"task {task_id} status is {status}")
+
+    def run(self) -> Dict[str, SimulationData]:
+        """
+        Run the batch to completion.
+
+        Returns
+        -------
+        Dict[str, SimulationData]
+            Mapping of task name to loaded results of the tasks that succeeded.
+        """
+        return dict(self.run_iter())
@@ -0,0 +1,152 @@
+"""
+Bulk deletion of simulation tasks.
+"""
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+import requests
+from pydantic import BaseModel, Field
+
+from tidy3d_webapi.cache import BATCH_DELETE_UNSUPPORTED
+from tidy3d_webapi.concurrency import DEFAULT_MAX_WORKERS, bounded_map
+from tidy3d_webapi.environment import Env
+from tidy3d_webapi.http_management import api_key_auth, http
+from tidy3d_webapi.mirror import current_mirror
+from tidy3d_webapi.simulation_task import SimulationTask
+from tidy3d_webapi.task_handle import forget_handle
+
+BATCH_DELETE_SIZE = 100
+
+# status codes meaning the server has no batch delete endpoint, a 400 is a bad task of the batch
+_UNSUPPORTED_STATUS = (404, 405, 501)
+
+
+class DeleteResult(BaseModel):
+    """
+    Outcome of a bulk deletion.
+    """
+
+    dry_run: bool = Field(False, title="dry run", description="Nothing was deleted if True.")
+    deleted: List[str] = Field(
+        [], title="deleted", description="Ids of the deleted tasks, or to delete if dry run."
+    )
+    failed: Dict[str, str] = Field(
+        {}, title="failed", description="Mapping of task id to the reason it was not deleted."
+    )
+
+    @property
+    def total(self) -> int:
+        """Number of tasks processed."""
+        return len(self.deleted) + len(self.failed)
+
+
+def _delete_record(task) -> dict:
+    if isinstance(task, str):
+        return {"taskId": task}
+    if isinstance(task, SimulationTask):
+        return {"taskId": task.task_id, "uploadPath": getattr(task, "uploadPath", None)}
+    return {"taskId": task["taskId"], "uploadPath": task.get("uploadPath")}
+
+
+def _delete_batch(records: List[dict]):
+    # not through the interceptor, which maps a 404 to None as if the tasks were deleted
+    resp = http.session.delete(
+        Env.current.get_real_url("tidy3d/tasks"), json={"tasks": records}, auth=api_key_auth
+    )
+    resp.raise_for_status()
+
+
+def _probe_batch(records: List[dict]) -> Optional[BaseException]:
+    try:
+        _delete_batch(records)
+    except Exception as err:  # pylint:disable=broad-except
+        return err
+    return None
+
+
+def _unsupported(error: Optional[BaseException]) -> bool:
+    return (
+        isinstance(error, requests.HTTPError)
+        and error.response is not None
+        and error.response.status_code in _UNSUPPORTED_STATUS
+    )
+
+
+def _delete_one(record: dict):
+    SimulationTask.construct(task_id=record["taskId"]).delete()
+
+
+def delete_tasks(  # pylint:disable=too-many-arguments,too-many-locals
+    tasks: Iterable[Union[str, dict, SimulationTask]],
+    dry_run: bool = False,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    batch_size: int = BATCH_DELETE_SIZE,
+    on_progress: Callable[[int, int], None] = None,
+) -> DeleteResult:
+    """
+    Delete many tasks with the batch delete endpoint, ``batch_size`` tasks per request. The first
+    batch probes the endpoint, if it is unavailable all tasks fall back to bounded concurrent
+    single deletes. The tasks of a failed batch are deleted one by one too, so the failing tasks
+    are isolated.
+    Parameters
+    ----------
+    tasks: Iterable[Union[str, dict, SimulationTask]]
+        task ids, raw task records or tasks.
+    dry_run: bool
+        only report the tasks which would be deleted.
+    max_workers: int
+        maximum number of concurrent requests.
+    batch_size: int
+        number of tasks per batch delete request.
+    on_progress: Callable[[int, int], None]
+        called with the number of processed tasks and the total after each request.
+    Returns
+    -------
+    DeleteResult
+        the deleted and failed task ids.
+    """
+    records = [_delete_record(task) for task in tasks]
+    result = DeleteResult(dry_run=dry_run)
+    if dry_run:
+        result.deleted = [record["taskId"] for record in records]
+        return result
+
+    def _report():
+        if on_progress:
+            on_progress(result.total, len(records))
+
+    singles = []
+
+    def _batch_done(batch: List[dict], error: Optional[BaseException]):
+        if error is None:
+            result.deleted.extend(record["taskId"] for record in batch)
+            _report()
+        else:
+            singles.extend(batch)
+
+    batches = [records[i : i + batch_size] for i in range(0, len(records), batch_size)]
+    if batches and Env.current.name not in BATCH_DELETE_UNSUPPORTED:
+        # the first batch probes the endpoint before the others are sent
+        error = _probe_batch(batches[0])
+        if _unsupported(error):
+            BATCH_DELETE_UNSUPPORTED.add(Env.current.name)
+        else:
+            _batch_done(batches.pop(0), error)
+    if Env.current.name in BATCH_DELETE_UNSUPPORTED:
+        singles.extend(record for batch in batches for record in batch)
+    else:
+        for batch, _, error in bounded_map(_delete_batch, batches, max_workers):
+            _batch_done(batch, error)
+
+    for record, _, error in bounded_map(_delete_one, singles, max_workers):
+        if error is None:
+            result.deleted.append(record["taskId"])
+        else:
+            result.failed[record["taskId"]] = str(error)
+        _report()
+
+    for task_id in result.deleted:
+        forget_handle(task_id)
+    mirror = current_mirror()
+    if mirror is not None:
+        mirror.forget(result.deleted)
+    return result
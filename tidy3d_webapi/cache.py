@@ -1,6 +1,12 @@
 """
 Local caches
 """
+from collections import OrderedDict
 
-FOLDER_CACHE = {}
 S3_STS_TOKENS = {}
+S3_CLIENTS = OrderedDict()
+TASK_HANDLES = OrderedDict()
+BATCH_DELETE_UNSUPPORTED = set()
+SIMULATIONS = OrderedDict()
+COST_ESTIMATES = OrderedDict()
+PROGRESS_HISTORIES = OrderedDict()
@@ -0,0 +1,224 @@
+"""
+Local http receiver of task finish callbacks.
+"""
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Dict, Iterable, List
+from uuid import uuid4
+
+from tidy3d import Simulation
+
+from tidy3d_webapi.concurrency import DEFAULT_MAX_WORKERS
+from tidy3d_webapi.polling import StatusPoller
+from tidy3d_webapi.simulation_task import FINAL_STATES, SimulationTask
+
+
+class _CallbackHandler(BaseHTTPRequestHandler):
+    """Accept the json body PUT by the server when a task is finished."""
+
+    def _receive(self):
+        if self.path.rstrip("/") != self.server.receiver.path:
+            self.send_error(404)
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self.send_error(400)
+            return
+        self.server.receiver.resolve(payload)
+        self.send_response(200)
+        self.end_headers()
+
+    # pylint:disable=invalid-name
+    def do_PUT(self):
+        """Handle the callback of a task."""
+        self._receive()
+
+    # pylint:disable=invalid-name
+    def do_POST(self):
+        """Handle the callback of a task."""
+        self._receive()
+
+    # pylint:disable=redefined-builtin
+    def log_message(self, format, *args):
+        """Keep the console quiet."""
+
+
+# pylint:disable=too-many-instance-attributes
+class CallbackReceiver:
+    """
+    Embedded http server which resolves one future per task when the server calls back on task
+    completion. Polling is only used as a slow fallback for callbacks that never arrive.
+
+    The receiver only listens on the loopback interface by default, listen on ``0.0.0.0`` and give
+    the ``public_url`` the server calls back to create tasks.
+
+    For example:
+        with CallbackReceiver("0.0.0.0", 8123, public_url="http://my-host:8123") as receiver:
+            task = receiver.create_task(sim, "task name")
+            task.submit()
+            events = receiver.wait([task.task_id])
+    """
+
+    def __init__(  # pylint:disable=too-many-arguments
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        public_url: str = None,
+        fallback_interval: float = 300.0,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ):
+        """
+        Parameters
+        ----------
+        host: str
+            interface to listen on.
+        port: int
+            port to listen on, a free port if 0.
+        public_url: str
+            url at which the server can reach this receiver, e.g. behind NAT or a tunnel.
+            Required by :meth:`create_task`.
+        fallback_interval: float
+            seconds between status checks of the tasks without callback.
+        max_workers: int
+            maximum number of concurrent status requests of the fallback.
+        """
+        # unguessable path, callbacks to any other path are rejected
+        self.path = f"/tidy3d/callback/{uuid4().hex}"
+        self.fallback_interval = fallback_interval
+        self._public_url = public_url.rstrip("/") if public_url else None
+        self._poller = StatusPoller(max_workers=max_workers)
+        self._futures: Dict[str, Future] = {}
+        self._lock = Lock()
+        self._server = ThreadingHTTPServer((host, port), _CallbackHandler)
+        self._server.daemon_threads = True
+        self._server.receiver = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Callback url, the local one built from the listening address without ``public_url``."""
+        if self._public_url:
+            return self._public_url + self.path
+        host, port = self._server.server_address[:2]
+        return f"http://{'127.0.0.1' if host == '0.0.0.0' else host}:{port}{self.path}"
+
+    def start(self):
+        """Start listening in a daemon thread."""
+        if not self._thread:
+            self._thread = Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop listening."""
+        if self._thread:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def register(self, task_id: str) -> Future:
+        """
+        Get the future resolved with the callback body of a task.
+        Parameters
+        ----------
+        task_id: str
+            task id.
+        """
+        with self._lock:
+            return self._futures.setdefault(task_id, Future())
+
+    def resolve(self, payload: dict):
+        """
+        Resolve the future of the task of a callback body, ignore unfinished statuses and tasks
+        which were not registered.
+        Parameters
+        ----------
+        payload: dict
+            callback body ``{'id', 'status', 'name', 'workUnit', 'solverVersion'}``.
+        """
+        task_id = payload.get("id")
+        status = (payload.get("status") or "").lower()
+        if not task_id or status not in FINAL_STATES:
+            return
+        with self._lock:
+            future = self._futures.get(task_id)
+        if future and not future.done():
+            future.set_result({**payload, "status": status})
+
+    def create_task(
+        self, simulation: Simulation, task_name: str, folder_name: str = "default"
+    ) -> SimulationTask:
+        """
+        Create a task calling back this receiver on completion, see :meth:`SimulationTask.create`.
+        """
+        if not self._public_url:
+            raise ValueError("A public_url the server can reach is required to create tasks.")
+        task = SimulationTask.create(simulation, task_name, folder_name, self.url)
+        self.register(task.task_id)
+        return task
+
+    def _poll_fallback(self, task_ids: List[str]):
+        try:
+            statuses = self._poller.poll(task_ids)
+        except Exception as err:  # pylint:disable=broad-except
+            # keep waiting for the callbacks, polled again next fallback
+            print(f"Failed to poll the task statuses: {err}")
+            return
+        for task_id, status in statuses.items():
+            if status is None:
+                # not found, e.g. deleted, no callback will ever come
+                self.resolve({"id": task_id, "status": "deleted"})
+            elif status in FINAL_STATES:
+                self.resolve({"id": task_id, "status": status})
+
+    def wait(self, task_ids: Iterable[str], timeout: float = None) -> Dict[str, dict]:
+        """
+        Wait until all tasks are finished, then forget them.
+        Parameters
+        ----------
+        task_ids: Iterable[str]
+            task ids, registered if not already.
+        timeout: float
+            maximum seconds to wait, wait forever if None.
+        Returns
+        -------
+        Dict[str, dict]
+            Mapping of task id to its callback body, or ``{'id', 'status'}`` if found by polling,
+            with the ``deleted`` status if the task is not found.
+        """
+        futures = {task_id: self.register(task_id) for task_id in task_ids}
+        deadline = None if timeout is None else time.monotonic() + timeout
+        next_fallback = time.monotonic() + self.fallback_interval
+        while True:
+            pending = [task_id for task_id, future in futures.items() if not future.done()]
+            if not pending:
+                with self._lock:
+                    # resolved, forget them so a long running receiver doesn't grow
+                    for task_id in futures:
+                        self._futures.pop(task_id, None)
+                return {task_id: future.result() for task_id, future in futures.items()}
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                raise TimeoutError(
+                    f"{len(pending)} tasks are not finished after {timeout} seconds."
+                )
+            if now >= next_fallback:
+                self._poll_fallback(pending)
+                next_fallback = now + self.fallback_interval
+                continue
+            wait_for = next_fallback - now
+            if deadline is not None:
+                wait_for = min(wait_for, deadline - now)
+            wait([futures[task_id] for task_id in pending], wait_for, FIRST_COMPLETED)
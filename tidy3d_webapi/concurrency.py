@@ -0,0 +1,40 @@
+"""
+Bounded concurrency helpers shared by the bulk operations.
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+DEFAULT_MAX_WORKERS = 8
+
+
+def bounded_map(
+    func: Callable, items: Iterable, max_workers: int = DEFAULT_MAX_WORKERS
+) -> Iterator[Tuple[Any, Any, Optional[BaseException]]]:
+    """
+    Call ``func`` on every item with at most ``max_workers`` calls in flight.
+    Parameters
+    ----------
+    func: Callable
+        function of one item, called from worker threads.
+    items: Iterable
+        items to process.
+    max_workers: int
+        maximum number of concurrent calls.
+    Returns
+    -------
+    Iterator[Tuple[item, result, error]]
+        one tuple per item in completion order, ``error`` is the raised exception or None.
+    """
+    items = list(items)
+    if not items:
+        return
+    with ThreadPoolExecutor(min(max_workers, len(items))) as pool:
+        futures = {pool.submit(func, item): item for item in items}
+        try:
+            for future in as_completed(futures):
+                error = future.exception()
+                yield futures[future], None if error else future.result(), error
+        finally:
+            # the consumer stopped early, don't run the calls which have not started
+            for future in futures:
+                future.cancel()
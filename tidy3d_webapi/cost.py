@@ -0,0 +1,150 @@
+"""
+Concurrent cost estimation of many tasks.
+"""
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Union
+
+from pydantic import BaseModel, Field
+
+from tidy3d_webapi.cache import COST_ESTIMATES
+from tidy3d_webapi.concurrency import DEFAULT_MAX_WORKERS, bounded_map
+from tidy3d_webapi.environment import Env
+from tidy3d_webapi.simulation_task import SimulationTask
+from tidy3d_webapi.solver_version import resolve_solver_version
+from tidy3d_webapi.task_handle import TaskHandle, get_handle
+
+MAX_COST_ESTIMATES = 4096
+
+_COST_ESTIMATES_LOCK = Lock()
+
+
+class CostSummary(BaseModel):
+    """
+    Estimated costs of many tasks.
+    """
+
+    costs: Dict[str, float] = Field(
+        {}, title="costs", description="Mapping of task id to its maximum flex unit cost."
+    )
+    failed: Dict[str, str] = Field(
+        {}, title="failed", description="Mapping of task id to the reason it was not estimated."
+    )
+    requests: int = Field(
+        0,
+        title="requests",
+        description="Number of estimate requests, identical simulations are estimated once.",
+    )
+    budget: Optional[float] = Field(None, title="budget", description="Flex unit budget.")
+
+    @property
+    def total(self) -> float:
+        """Total flex unit cost of the estimated tasks."""
+        return sum(self.costs.values())
+
+    @property
+    def max_cost(self) -> float:
+        """Cost of the most expensive task."""
+        return max(self.costs.values(), default=0.0)
+
+    @property
+    def within_budget(self) -> bool:
+        """Whether the total cost fits the budget, always True without budget."""
+        return self.budget is None or self.total <= self.budget
+
+    def summary(self) -> str:
+        """
+        One line with the number of tasks, the total and the budget.
+        """
+        line = (
+            f"{len(self.costs)} tasks, {self.total:.2f} flex units total, "
+            f"{self.max_cost:.2f} max, {len(self.failed)} failed"
+        )
+        if self.budget is not None:
+            line += f", budget {self.budget:.2f} {'ok' if self.within_budget else 'exceeded'}"
+        return line
+
+
+def _content_key(handle: TaskHandle, solver_version: str):
+    # the fingerprint is only known for tasks uploaded by this process
+    task = handle.peek()
+    if task is None or task.fingerprint is None:
+        return None
+    return Env.current.name, solver_version, task.fingerprint
+
+
+def _cached_cost(key: tuple) -> Optional[float]:
+    with _COST_ESTIMATES_LOCK:
+        if key not in COST_ESTIMATES:
+            return None
+        COST_ESTIMATES.move_to_end(key)
+        return COST_ESTIMATES[key]
+
+
+def _cache_cost(key: tuple, cost: float):
+    with _COST_ESTIMATES_LOCK:
+        COST_ESTIMATES[key] = cost
+        COST_ESTIMATES.move_to_end(key)
+        while len(COST_ESTIMATES) > MAX_COST_ESTIMATES:
+            COST_ESTIMATES.popitem(last=False)
+
+
+def clear_cost_estimates():
+    """Drop the memoized cost estimates."""
+    with _COST_ESTIMATES_LOCK:
+        COST_ESTIMATES.clear()
+
+
+def estimate_costs(
+    tasks: Iterable[Union[str, TaskHandle, SimulationTask]],
+    solver_version: str = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    budget: float = None,
+) -> CostSummary:
+    """
+    Estimate the cost of many tasks with bounded concurrency. Tasks uploaded by this process with
+    identical simulations are estimated once per solver version, and the estimates are memoized.
+    Parameters
+    ----------
+    tasks: Iterable[Union[str, TaskHandle, SimulationTask]]
+        task ids, handles or tasks.
+    solver_version: str
+        target solver version, the server default if None.
+    max_workers: int
+        maximum number of concurrent requests.
+    budget: float
+        flex unit budget to compare the total with.
+    Returns
+    -------
+    CostSummary
+        the cost of each task and the total.
+    """
+    summary = CostSummary(budget=budget)
+    # memoized estimates are shared by the requested and the resolved version
+    solver_version = resolve_solver_version(solver_version)
+    groups: Dict[tuple, List[str]] = {}
+    for task in tasks:
+        handle = get_handle(task)
+        key = _content_key(handle, solver_version) or ("task", handle.task_id)
+        cached = _cached_cost(key)
+        if cached is not None:
+            summary.costs[handle.task_id] = cached
+        else:
+            groups.setdefault(key, []).append(handle.task_id)
+
+    def _estimate(key) -> float:
+        task_id = groups[key][0]
+        resp = SimulationTask.construct(task_id=task_id).estimate_cost(solver_version)
+        if not resp:
+            raise ValueError(f"Failed to estimate cost of task {task_id}.")
+        return resp.get("flex_unit") or 0.0
+
+    for key, cost, error in bounded_map(_estimate, list(groups), max_workers):
+        summary.requests += 1
+        for task_id in groups[key]:
+            if error is None:
+                summary.costs[task_id] = cost
+            else:
+                summary.failed[task_id] = str(error)
+        if error is None and key[0] != "task":
+            _cache_cost(key, cost)
+    return summary
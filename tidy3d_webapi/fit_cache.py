@@ -0,0 +1,203 @@
+"""
+Persistent cache of dispersion fit results, keyed by the fitted data and options.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from os.path import expanduser
+from threading import Lock
+from typing import Optional
+
+import numpy as np
+from pydantic import BaseModel
+from tidy3d.plugins import DispersionFitter
+
+from tidy3d_webapi.environment import Env
+
+FIT_CACHE_FILE = os.path.join(expanduser("~"), ".tidy3d", "fit_cache.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fits (
+    env TEXT NOT NULL,
+    fit_key TEXT NOT NULL,
+    record TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    used_at REAL NOT NULL,
+    PRIMARY KEY (env, fit_key)
+);
+CREATE INDEX IF NOT EXISTS fits_used_at ON fits (env, used_at);
+"""
+
+
+def fit_key(fitter: DispersionFitter, options: BaseModel) -> str:
+    """
+    Hash of the wavelength, n and k data of a fitter and of its options.
+    Parameters
+    ----------
+    fitter: DispersionFitter
+        material fitter data.
+    options: FitterOptions
+        fitter options.
+    """
+    digest = hashlib.sha256()
+    for values in (fitter.wvl_um, fitter.n_data, fitter.k_data):
+        # the same values hash the same whether they were lists, float32 or strided arrays
+        array = np.ascontiguousarray(
+            np.zeros_like(fitter.n_data) if values is None else values, dtype="<f8"
+        )
+        digest.update(str(array.shape).encode("utf-8"))
+        digest.update(array.tobytes())
+    digest.update(json.dumps(options.dict(), sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class FitResultCache:
+    """
+    Records of completed fits in a SQLite database, least recently used first evicted.
+
+    For example:
+        cache = use_fit_cache(FIT_CACHE_FILE)
+        task = MaterialFitterTask.submit(fitter, options)  # completed immediately if cached
+        cache.invalidate(fitter, options)  # fit again next time
+    """
+
+    def __init__(
+        self, path: str = ":memory:", max_entries: int = 1024, max_bytes: int = 64 * 1024**2
+    ):
+        """
+        Parameters
+        ----------
+        path: str
+            database file, in memory if ":memory:".
+        max_entries: int
+            maximum number of cached fits.
+        max_bytes: int
+            maximum total size of the cached records.
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._lock = Lock()
+
+    def close(self):
+        """Close the database."""
+        self._db.close()
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Get the record of a completed fit.
+        Parameters
+        ----------
+        key: str
+            key of the fit, see :func:`fit_key`.
+        """
+        with self._lock, self._db:
+            params = (Env.current.name, key)
+            rows = self._db.execute(
+                "SELECT record FROM fits WHERE env = ? AND fit_key = ?", params
+            ).fetchall()
+            if not rows:
+                return None
+            self._db.execute(
+                "UPDATE fits SET used_at = ? WHERE env = ? AND fit_key = ?", (time.time(),) + params
+            )
+            return json.loads(rows[0][0])
+
+    def put(self, key: str, record: dict):
+        """
+        Cache the record of a completed fit, then evict the least recently used fits beyond the
+        limits.
+        Parameters
+        ----------
+        key: str
+            key of the fit, see :func:`fit_key`.
+        record: dict
+            fitter task record with its ``calcResult``.
+        """
+        content = json.dumps(record, default=str)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO fits VALUES (?, ?, ?, ?, ?)",
+                (Env.current.name, key, content, len(content), time.time()),
+            )
+            self._evict()
+
+    def _evict(self):
+        rows = self._db.execute(
+            "SELECT env, fit_key, size FROM fits ORDER BY used_at DESC"
+        ).fetchall()
+        total = 0
+        evicted = []
+        for index, (env, key, size) in enumerate(rows):
+            total += size
+            if index >= self.max_entries or total > self.max_bytes:
+                evicted.append((env, key))
+        self._db.executemany("DELETE FROM fits WHERE env = ? AND fit_key = ?", evicted)
+
+    def forget(self, key: str):
+        """
+        Drop a fit.
+        Parameters
+        ----------
+        key: str
+            key of the fit, see :func:`fit_key`.
+        """
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM fits WHERE env = ? AND fit_key = ?", (Env.current.name, key)
+            )
+
+    def invalidate(self, fitter: DispersionFitter, options: BaseModel):
+        """
+        Drop the fit of some data with some options, so it is fitted again.
+        Parameters
+        ----------
+        fitter: DispersionFitter
+            material fitter data.
+        options: FitterOptions
+            fitter options.
+        """
+        self.forget(fit_key(fitter, options))
+
+    def clear(self):
+        """Drop all fits."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM fits")
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM fits").fetchone()[0]
+
+
+_CURRENT_FIT_CACHE = {"cache": None}
+
+
+def use_fit_cache(
+    path: Optional[str] = FIT_CACHE_FILE, max_entries: int = 1024, max_bytes: int = 64 * 1024**2
+) -> Optional[FitResultCache]:
+    """
+    Cache the fit results in a SQLite database, no caching if ``path`` is None.
+    Parameters
+    ----------
+    path: str
+        database file, in memory if ":memory:".
+    max_entries: int
+        maximum number of cached fits.
+    max_bytes: int
+        maximum total size of the cached records.
+    """
+    if _CURRENT_FIT_CACHE["cache"] is not None:
+        _CURRENT_FIT_CACHE["cache"].close()
+    _CURRENT_FIT_CACHE["cache"] = FitResultCache(path, max_entries, max_bytes) if path else None
+    return _CURRENT_FIT_CACHE["cache"]
+
+
+def current_fit_cache() -> Optional[FitResultCache]:
+    """The fit cache in use, None if fit results are not cached."""
+    return _CURRENT_FIT_CACHE["cache"]
@@ -0,0 +1,234 @@
+"""
+Run small dispersion fits locally and large ones on the server.
+"""
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from pydantic import BaseModel, Field
+from tidy3d.components.medium import MediumType
+from tidy3d.plugins import DispersionFitter
+from typing_extensions import Literal
+
+from tidy3d_webapi.concurrency import DEFAULT_MAX_WORKERS
+from tidy3d_webapi.material_fitter import (
+    FITTER_SUCCESS_STATES,
+    ConstraintEnum,
+    FitterOptions,
+    MaterialFitterTask,
+)
+
+# seconds of one local fit try per cost unit, calibrated with benchmarks/bench_fit_policy.py
+LOCAL_SECONDS_PER_UNIT = 1.4e-2
+# fits expected to run locally within this many seconds don't go to the server, which costs an
+# upload, a queue and polling
+LOCAL_THRESHOLD = 30.0
+
+
+class FitResult(BaseModel, smart_union=True):
+    """
+    Result of a dispersion fit, run locally or on the server.
+    """
+
+    medium: Optional[MediumType] = Field(
+        title="medium", description="Fitted medium, None if the server didn't return it."
+    )
+    rms_error: Optional[float] = Field(
+        title="rms error", description="RMS error of the fit, only known for local fits."
+    )
+    location: Literal["local", "remote"] = Field(
+        title="location", description="Where the fit was run."
+    )
+    task_id: Optional[str] = Field(title="task id", description="Fitter task id of remote fits.")
+    error: Optional[str] = Field(
+        title="error", description="Why the fit failed, None if it didn't."
+    )
+
+
+def _fit_locally(fitter: DispersionFitter, options: FitterOptions) -> Tuple[MediumType, float]:
+    if options.min_wvl is not None or options.max_wvl is not None:
+        fitter = fitter.copy(update={"wvl_range": (options.min_wvl, options.max_wvl)})
+    return fitter.fit(
+        num_poles=options.num_poles,
+        num_tries=options.num_tries,
+        tolerance_rms=options.tolerance_rms,
+    )
+
+
+def _local_executor(workers: int) -> Executor:
+    # spawned workers re-import the main module, which fails in scripts without an
+    # ``if __name__ == "__main__"`` guard
+    if workers > 1 and multiprocessing.get_start_method() == "fork":
+        return ProcessPoolExecutor(workers)
+    return ThreadPoolExecutor(workers)
+
+
+class FitPolicy(BaseModel):
+    """
+    Decide where to run a fit from its estimated local run time. Fits using options only the
+    server supports always run on the server.
+    """
+
+    local_threshold: float = Field(
+        LOCAL_THRESHOLD,
+        title="local threshold",
+        description="Maximum estimated seconds of a fit run locally.",
+        ge=0,
+    )
+    seconds_per_unit: float = Field(
+        LOCAL_SECONDS_PER_UNIT,
+        title="seconds per unit",
+        description="Seconds of local fitting per cost unit.",
+        gt=0,
+    )
+
+    @staticmethod
+    def cost_units(fitter: DispersionFitter, options: FitterOptions) -> float:
+        """
+        Cost of a fit, ``num_tries * num_poles ** 1.5 * sqrt(num_points)``: each try optimizes
+        4 coefficients per pole, over the data points.
+        """
+        wvl_um = np.asarray(fitter.wvl_um)
+        min_wvl = -np.inf if options.min_wvl is None else options.min_wvl
+        max_wvl = np.inf if options.max_wvl is None else options.max_wvl
+        # only the points within the wavelength range are fitted
+        num_points = np.count_nonzero((wvl_um >= min_wvl) & (wvl_um <= max_wvl))
+        return options.num_tries * options.num_poles**1.5 * np.sqrt(num_points)
+
+    def estimate_local_seconds(self, fitter: DispersionFitter, options: FitterOptions) -> float:
+        """
+        Upper bound of the local run time of a fit, which stops early once below
+        ``tolerance_rms``.
+        """
+        return self.cost_units(fitter, options) * self.seconds_per_unit
+
+    @staticmethod
+    def supported_locally(options: FitterOptions) -> bool:
+        """
+        Whether the local fitter honors the options: it has no amplitude or frequency bounds, no
+        soft constraint and no evaluation limit.
+        """
+        defaults = FitterOptions()
+        return (
+            options.bound_amp is None
+            and options.bound_f is None
+            and options.bound_eps_inf in (None, defaults.bound_eps_inf)
+            and options.constraint == ConstraintEnum.HARD
+            and options.nlopt_maxeval == defaults.nlopt_maxeval
+        )
+
+    def runs_locally(self, fitter: DispersionFitter, options: FitterOptions) -> bool:
+        """
+        Whether to run a fit locally.
+        """
+        return (
+            self.supported_locally(options)
+            and self.estimate_local_seconds(fitter, options) <= self.local_threshold
+        )
+
+
+# pylint:disable=too-many-arguments,too-many-locals
+def fit_many(
+    fitters: Iterable[DispersionFitter],
+    options: Union[FitterOptions, Iterable[FitterOptions]],
+    policy: FitPolicy = None,
+    max_local_workers: int = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    timeout: float = None,
+    max_errors: int = 3,
+) -> List[FitResult]:
+    """
+    Fit many datasets, the small fits in a local process pool, or threads where workers are not
+    forked, while the large ones run on the server.
+    Parameters
+    ----------
+    fitters: Iterable[DispersionFitter]
+        material fitter data.
+    options: Union[FitterOptions, Iterable[FitterOptions]]
+        fitter options shared by all fits, or one per fit.
+    policy: FitPolicy
+        where to run each fit, the default policy if None.
+    max_local_workers: int
+        maximum number of local fitting workers, the number of cpus if None.
+    max_workers: int
+        maximum number of concurrent requests.
+    timeout: float
+        maximum seconds to wait for the remote fits, wait forever if None.
+    max_errors: int
+        consecutive failed status requests after which a remote fit fails.
+    Returns
+    -------
+    List[FitResult]
+        the results in the order of ``fitters``, with an ``error`` for the fits which failed.
+    """
+    policy = policy or FitPolicy()
+    fitters = list(fitters)
+    options = [options] * len(fitters) if isinstance(options, FitterOptions) else list(options)
+    if len(options) != len(fitters):
+        raise ValueError(f"Got {len(options)} options for {len(fitters)} fitters.")
+    local = [
+        index
+        for index in range(len(fitters))
+        if policy.runs_locally(fitters[index], options[index])
+    ]
+    remote = sorted(set(range(len(fitters))) - set(local))
+
+    results: List[FitResult] = [None] * len(fitters)
+    workers = max(1, min(max_local_workers or os.cpu_count() or 1, len(local)))
+    with _local_executor(workers) if local else nullcontext() as pool:
+        # the local fits run while the remote ones are submitted and polled, the pool is forked
+        # before the request threads start
+        futures = {
+            index: pool.submit(_fit_locally, fitters[index], options[index]) for index in local
+        }
+        tasks = MaterialFitterTask.submit_many(
+            [fitters[index] for index in remote], [options[index] for index in remote], max_workers
+        )
+        submitted = {}
+        for index, task in zip(remote, tasks):
+            if task:
+                submitted[task.id] = index
+            else:
+                results[index] = FitResult(location="remote", error="The submission failed.")
+        for task in MaterialFitterTask.as_completed(
+            [task for task in tasks if task],
+            timeout=timeout,
+            max_workers=max_workers,
+            max_errors=max_errors,
+        ):
+            if task.status.upper() not in FITTER_SUCCESS_STATES:
+                print(f"Fit {submitted[task.id]} failed on the server: {task.status}")
+                results[submitted[task.id]] = FitResult(
+                    location="remote", task_id=task.id, error=f"The fit status is {task.status}."
+                )
+                continue
+            results[submitted[task.id]] = FitResult(
+                medium=task.medium, location="remote", task_id=task.id
+            )
+        for index, future in futures.items():
+            try:
+                medium, rms_error = future.result()
+            except Exception as err:  # pylint:disable=broad-except
+                print(f"Fit {index} failed locally: {err}")
+                results[index] = FitResult(location="local", error=str(err))
+                continue
+            results[index] = FitResult(medium=medium, rms_error=rms_error, location="local")
+    return results
+
+
+def fit(
+    fitter: DispersionFitter,
+    options: FitterOptions,
+    policy: FitPolicy = None,
+    timeout: float = None,
+) -> FitResult:
+    """
+    Fit a dataset locally or on the server, see :func:`fit_many`.
+    """
+    result = fit_many([fitter], options, policy, timeout=timeout)[0]
+    if result.error:
+        raise ValueError(f"The fit failed: {result.error}")
+    return result
@@ -0,0 +1,77 @@
+"""
+Folder ids cached per environment and account, optionally persisted across processes.
+"""
+import hashlib
+import os
+from os.path import expanduser
+from typing import Optional
+
+from tidy3d_webapi.environment import Env
+from tidy3d_webapi.http_management import api_key
+from tidy3d_webapi.ttl_store import TtlStore
+
+FOLDER_TTL = 3600.0
+FOLDER_REGISTRY_FILE = os.path.join(expanduser("~"), ".tidy3d", "folders.json")
+
+
+class FolderRegistry(TtlStore):
+    """
+    Mapping of folder name to folder record, ``{'projectId', 'projectName'}``, scoped to the
+    current environment and api key. Records expire after ``ttl`` seconds, e.g. in case the
+    folder is deleted from the web UI.
+
+    For example, to share the folders between processes:
+        folders.path = FOLDER_REGISTRY_FILE
+    """
+
+    def __init__(self, ttl: float = FOLDER_TTL, path: str = None):
+        """
+        Parameters
+        ----------
+        ttl: float
+            seconds a folder record is trusted.
+        path: str
+            json file the records are persisted to, in memory only if None.
+        """
+        super().__init__(ttl, path)
+
+    @staticmethod
+    def _key(folder_name: str) -> str:
+        # the api key is hashed, the registry file must not leak it
+        account = hashlib.sha256((api_key() or "").encode("utf-8")).hexdigest()[:16]
+        return f"{Env.current.name}:{account}:{folder_name}"
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Get the unexpired record of a folder.
+        Parameters
+        ----------
+        key: str
+            folder name.
+        """
+        return super().get(self._key(key))
+
+    def put(self, key: str, value: dict):
+        """
+        Cache the record of a folder.
+        Parameters
+        ----------
+        key: str
+            folder name.
+        value: dict
+            folder record with ``projectId`` and ``projectName``.
+        """
+        super().put(self._key(key), value)
+
+    def forget(self, key: str):
+        """
+        Drop the record of a folder, e.g. after it is deleted.
+        Parameters
+        ----------
+        key: str
+            folder name.
+        """
+        super().forget(self._key(key))
+
+
+folders = FolderRegistry()
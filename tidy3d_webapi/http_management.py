@@ -12,6 +12,7 @@ from .environment import Env
 from .version import __version__
 
 SIMCLOUD_APIKEY = "SIMCLOUD_APIKEY"
+HTTP_POOL_SIZE = 64
 
 
 def api_key():
@@ -115,13 +116,27 @@ class HttpSessionManager:
         )
 
     @http_interceptor
-    def delete(self, path: str):
+    def delete(self, path: str, json=None):
         """
         Delete the resource.
         :param path:
+        :param json:
         :return:
         """
-        return self.session.delete(Env.current.get_real_url(path), auth=api_key_auth)
+        return self.session.delete(Env.current.get_real_url(path), json=json, auth=api_key_auth)
+
+
+def pooled_session(pool_size: int = HTTP_POOL_SIZE) -> requests.Session:
+    """
+    Create a session whose connection pool is large enough for concurrent callers, e.g. batches.
+    :param pool_size: maximum number of connections kept alive per host.
+    :return:
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
 
-http = HttpSessionManager(requests.Session())
+http = HttpSessionManager(pooled_session())
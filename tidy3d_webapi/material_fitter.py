@@ -1,20 +1,29 @@
 """
 Material Fitter API
 """
-import os
-import tempfile
+import io
+import json
+import time
 from enum import Enum
-from typing import Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Union
 from uuid import uuid4
 
 import numpy as np
-import requests
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr, parse_obj_as, validator
+from tidy3d.components.medium import MediumType
 from tidy3d.plugins import DispersionFitter
 
+from tidy3d_webapi.concurrency import DEFAULT_MAX_WORKERS, bounded_map
+from tidy3d_webapi.fit_cache import current_fit_cache, fit_key
 from tidy3d_webapi.http_management import http
+from tidy3d_webapi.polling import PollingPolicy
 from tidy3d_webapi.tidy3d_types import Submittable
 
+FITTER_DATA_FILE = "nk_data.csv"
+FITTER_SUCCESS_STATES = ("COMPLETED",)
+FITTER_ERROR_STATES = ("FAILED", "ERROR", "CANCELLED")
+FITTER_FINAL_STATES = FITTER_SUCCESS_STATES + FITTER_ERROR_STATES
+
 
 class ConstraintEnum(str, Enum):
     """
@@ -42,15 +51,28 @@ class FitterOptions(BaseModel):
     nlopt_maxeval: int = 5000
 
 
+def encode_nk_data(fitter: DispersionFitter) -> bytes:
+    """
+    Encode the wavelength, n and k data of a fitter as the csv uploaded to the server.
+    Parameters
+    ----------
+    fitter: DispersionFitter
+        material fitter data.
+    """
+    k_data = fitter.k_data if fitter.k_data is not None else np.zeros_like(fitter.n_data)
+    data = np.column_stack((fitter.wvl_um, fitter.n_data, k_data))
+    buffer = io.BytesIO()
+    np.savetxt(buffer, data, delimiter=",", header="Wavelength,n,k")
+    return buffer.getvalue()
+
+
 class _FitterRequest(BaseModel):
     fileName: str
     jsonInput: str
     resourcePath: str
 
 
-class MaterialFitterTask(
-    Submittable,
-):
+class MaterialFitterTask(Submittable, smart_union=True):
     """
     Material Fitter Task
     """
@@ -66,9 +88,22 @@ class MaterialFitterTask(
     resource_path: str = Field(
         ..., title="resource path", description="resource path", alias="resourcePath"
     )
+    medium: Optional[MediumType] = Field(
+        None, title="medium", description="fitted medium, once completed", alias="calcResult"
+    )
+
+    _fit_key: Optional[str] = PrivateAttr(None)
+
+    # pylint: disable=no-self-argument
+    @validator("medium", pre=True)
+    def parse_medium(cls, value):
+        """
+        Automatically parsing medium from string to object
+        """
+        return json.loads(value) if isinstance(value, str) else value
 
     @classmethod
-    def submit(cls, fitter: DispersionFitter, options: FitterOptions):
+    def submit(cls, fitter: DispersionFitter, options: FitterOptions, use_cache: bool = True):
         """
         Create and kickoff fitter task.
         Parameters
@@ -77,39 +112,223 @@ class MaterialFitterTask(
             material fitter data.
         options: FitterOptions
             fitter options
+        use_cache: bool
+            return the completed fit of the same data and options from the fit cache, if enabled
+            with :func:`use_fit_cache`.
         """
         assert fitter
         assert options
-        data = np.asarray(list(zip(fitter.wvl_um, fitter.n_data, fitter.k_data)))
-        with tempfile.NamedTemporaryFile(suffix=".csv") as temp:
-            np.savetxt(temp, data, delimiter=",", header="Wavelength,n,k")
-            uid = str(uuid4())
-            url = http.get(
-                f"tidy3d/fitter/{uid}/signedUrl?filepath={os.path.basename(temp.name)}&method=PUT"
-            )
-            temp.seek(0)
-            resp = requests.put(
-                url,
-                data=temp.read(),
-                headers={"Content-Type": "application/octet-stream"},
-                timeout=60,
-            )
-            if resp.raise_for_status():
-                raise resp.raise_for_status()
-            fitter_req = _FitterRequest(
-                fileName=os.path.basename(temp.name),
-                jsonInput=options.json(exclude_none=True),
-                resourcePath=uid,
-            )
-            resp = http.post("tidy3d/fitter/fit", json=fitter_req.dict())
-            return cls(dispersion_fitter=fitter, **resp)
+        cache = current_fit_cache()
+        key = fit_key(fitter, options) if cache is not None else None
+        record = cache.get(key) if cache is not None and use_cache else None
+        if record is not None:
+            task = cls(dispersion_fitter=fitter, **record)
+            task._fit_key = key  # pylint:disable=protected-access
+            return task
+
+        content = encode_nk_data(fitter)
+        uid = str(uuid4())
+        url = http.get(f"tidy3d/fitter/{uid}/signedUrl?filepath={FITTER_DATA_FILE}&method=PUT")
+        # signed url, the pooled connections are reused but the api key is not sent
+        resp = http.session.put(
+            url,
+            data=content,
+            headers={"Content-Type": "application/octet-stream"},
+            timeout=60,
+        )
+        resp.raise_for_status()
+        fitter_req = _FitterRequest(
+            fileName=FITTER_DATA_FILE,
+            jsonInput=options.json(exclude_none=True),
+            resourcePath=uid,
+        )
+        resp = http.post("tidy3d/fitter/fit", json=fitter_req.dict())
+        task = cls(dispersion_fitter=fitter, **resp)
+        task._fit_key = key  # pylint:disable=protected-access
+        return task
+
+    @classmethod
+    def submit_many(
+        cls,
+        fitters: Iterable[DispersionFitter],
+        options: Union[FitterOptions, Iterable[FitterOptions]],
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        use_cache: bool = True,
+    ) -> List[Optional["MaterialFitterTask"]]:
+        """
+        Create and kickoff many fitter tasks concurrently.
+        Parameters
+        ----------
+        fitters: Iterable[DispersionFitter]
+            material fitter data.
+        options: Union[FitterOptions, Iterable[FitterOptions]]
+            fitter options shared by all fits, or one per fit.
+        max_workers: int
+            maximum number of concurrent submissions.
+        use_cache: bool
+            return the cached fits, see :meth:`submit`.
+        Returns
+        -------
+        List[Optional[MaterialFitterTask]]
+            the tasks in the order of ``fitters``, None for the fits which failed to submit.
+        """
+        fitters = list(fitters)
+        if isinstance(options, FitterOptions):
+            options = [options] * len(fitters)
+        else:
+            options = list(options)
+        if len(options) != len(fitters):
+            raise ValueError(f"Got {len(options)} options for {len(fitters)} fitters.")
+
+        tasks = [None] * len(fitters)
+        for index, task, error in bounded_map(
+            lambda index: cls.submit(fitters[index], options[index], use_cache),
+            range(len(fitters)),
+            max_workers,
+        ):
+            if error:
+                print(f"Fit {index} failed to submit: {error}")
+            else:
+                tasks[index] = task
+        return tasks
 
     def sync_status(self):
         """
         Sync the status from server and update self.status.
         """
         resp = http.get(f"tidy3d/fitter/{self.id}")
+        if not resp:
+            raise ValueError(f"Fit {self.id} not found.")
         self.status = resp["status"]
+        if resp.get("calcResult"):
+            self.medium = parse_obj_as(MediumType, self.parse_medium(resp["calcResult"]))
+        cache = current_fit_cache()
+        if cache is not None and self._fit_key and self.medium and self.status == "COMPLETED":
+            cache.put(
+                self._fit_key,
+                {
+                    "id": self.id,
+                    "status": self.status,
+                    "fileName": self.file_name,
+                    "resourcePath": self.resource_path,
+                    "calcResult": resp["calcResult"],
+                },
+            )
+
+    @property
+    def done(self) -> bool:
+        """Whether the fit is finished, successfully or not."""
+        return (self.status or "").upper() in FITTER_FINAL_STATES
+
+    def wait(self, timeout: float = None, policy: PollingPolicy = None) -> str:
+        """
+        Wait until the fit is finished, polling less often while it runs.
+        Parameters
+        ----------
+        timeout: float
+            maximum seconds to wait, wait forever if None.
+        policy: PollingPolicy
+            polling intervals, the default policy if None.
+        Returns
+        -------
+        str
+            the final status.
+        """
+        for _ in MaterialFitterTask.as_completed([self], timeout=timeout, policy=policy):
+            pass
+        return self.status
+
+    # pylint:disable=too-many-arguments
+    @classmethod
+    def wait_all(
+        cls,
+        tasks: Iterable["MaterialFitterTask"],
+        timeout: float = None,
+        policy: PollingPolicy = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        library_names: Dict[str, str] = None,
+        max_errors: int = 3,
+    ) -> List["MaterialFitterTask"]:
+        """
+        Wait until all fits are finished, see :meth:`as_completed`.
+        Returns
+        -------
+        List[MaterialFitterTask]
+            the tasks, with their final status.
+        """
+        tasks = list(tasks)
+        for _ in cls.as_completed(tasks, timeout, policy, max_workers, library_names, max_errors):
+            pass
+        return tasks
+
+    @classmethod
+    def as_completed(  # pylint:disable=too-many-locals
+        cls,
+        tasks: Iterable["MaterialFitterTask"],
+        timeout: float = None,
+        policy: PollingPolicy = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        library_names: Dict[str, str] = None,
+        max_errors: int = 3,
+    ) -> Iterator["MaterialFitterTask"]:
+        """
+        Yield fits as they finish. The unfinished fits are polled concurrently, less often while
+        none of them finishes.
+        Parameters
+        ----------
+        tasks: Iterable[MaterialFitterTask]
+            fitter tasks.
+        timeout: float
+            maximum seconds to wait, wait forever if None.
+        policy: PollingPolicy
+            polling intervals, the default policy if None.
+        max_workers: int
+            maximum number of concurrent requests.
+        library_names: Dict[str, str]
+            mapping of task id to material library name, successful fits are saved concurrently
+            to the library before they are yielded.
+        max_errors: int
+            consecutive failed status requests after which a fit is yielded with the ``ERROR``
+            status.
+        """
+        policy = policy or PollingPolicy()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        library_names = library_names or {}
+        pending = list(tasks)
+        errors = {task.id: 0 for task in pending}
+        interval = None
+        while pending:
+            for task, _, error in bounded_map(
+                lambda task: task.sync_status(), pending, max_workers
+            ):
+                if not error:
+                    errors[task.id] = 0
+                    continue
+                errors[task.id] += 1
+                print(f"Failed to get the status of fit {task.id}: {error}")
+                if errors[task.id] >= max_errors:
+                    # e.g. the fit was deleted, give up instead of polling forever
+                    task.status = "ERROR"
+            finished = [task for task in pending if task.done]
+            pending = [task for task in pending if not task.done]
+            saving = [
+                task
+                for task in finished
+                if task.id in library_names and task.status.upper() in FITTER_SUCCESS_STATES
+            ]
+            for task, saved, error in bounded_map(
+                lambda task: task.save_to_library(library_names[task.id]), saving, max_workers
+            ):
+                if error or not saved:
+                    print(f"Failed to save fit {task.id} to the library: {error}")
+            yield from finished
+            if not pending:
+                return
+
+            interval = policy.next_interval("running", interval, bool(finished))
+            if deadline is not None and time.monotonic() + interval > deadline:
+                raise TimeoutError(f"{len(pending)} fits are not finished after {timeout} seconds.")
+            time.sleep(interval)
 
     def save_to_library(self, name: str) -> bool:
         """
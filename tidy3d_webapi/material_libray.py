@@ -4,16 +4,19 @@ Material Library API
 import json
 from typing import List, Optional
 
-from pydantic import Field, parse_obj_as, validator
+from pydantic import Field, PrivateAttr, ValidationError, parse_obj_as
 from tidy3d.components.medium import MediumType
 
 from tidy3d_webapi.http_management import http
 from tidy3d_webapi.tidy3d_types import Queryable
 
+LAZY_FIELDS = ("medium", "json_input")
 
-class MaterialLibray(Queryable, smart_union=True):
+
+class MaterialLibray(Queryable):
     """
-    Material Library Resource interface
+    Material Library Resource interface. The medium and the original input returned by the server
+    as json strings are only parsed on first access.
     """
 
     id: str = Field(title="Material Library ID", description="Material Library ID")
@@ -26,13 +29,43 @@ class MaterialLibray(Queryable, smart_union=True):
         title="json input", description="original input", alias="jsonInput"
     )
 
-    # pylint: disable=no-self-argument
-    @validator("medium", "json_input", pre=True)
-    def parse_result(cls, values):
-        """
-        Automatically parsing medium and json_input from string to object
-        """
-        return json.loads(values)
+    _raw: dict = PrivateAttr(default_factory=dict)
+
+    class Config:  # pylint: disable=too-few-public-methods
+        """Accept the field names as well as the server aliases."""
+
+        allow_population_by_field_name = True
+        smart_union = True
+
+    def __init__(self, **data):
+        raw = {}
+        for name in LAZY_FIELDS:
+            for key in (self.__fields__[name].alias, name):
+                if isinstance(data.get(key), str):
+                    raw[name] = data.pop(key)
+        super().__init__(**data)
+        for name in raw:
+            del self.__dict__[name]
+        self.__fields_set__.update(raw)  # pylint:disable=no-member
+        self._raw = raw
+
+    def __getattr__(self, name):
+        if name not in LAZY_FIELDS or name not in self._raw:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        value, errors = self.__fields__[name].validate(
+            json.loads(self._raw.pop(name)), {}, loc=name, cls=type(self)
+        )
+        if errors:
+            raise ValidationError([errors], type(self))
+        self.__dict__[name] = value
+        values = {key: self.__dict__.pop(key) for key in self.__fields__ if key in self.__dict__}
+        self.__dict__.update(values)
+        return value
+
+    def _iter(self, *args, **kwargs):
+        for name in list(self._raw):
+            getattr(self, name)
+        return super()._iter(*args, **kwargs)
 
     @classmethod
     def list(cls):
@@ -45,3 +78,15 @@ class MaterialLibray(Queryable, smart_union=True):
         """
         resp = http.get("tidy3d/libraries")
         return parse_obj_as(List[MaterialLibray], resp) if resp else None
+
+    @classmethod
+    def list_names(cls) -> Optional[List[str]]:
+        """
+        List the names of all material libraries, without building the entries
+        Returns
+        -------
+        names : List[str]
+            Names of the material libraries, ``None`` like :meth:`list` if there is none
+        """
+        resp = http.get("tidy3d/libraries")
+        return [entry["name"] for entry in resp] if resp else None
@@ -0,0 +1,388 @@
+"""
+Local SQLite mirror of folder and task metadata.
+"""
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from os.path import expanduser
+from threading import Lock
+from typing import Dict, Iterable, List, Optional
+
+import pytz
+import requests
+from pydantic.datetime_parse import parse_datetime
+
+from tidy3d_webapi.concurrency import DEFAULT_MAX_WORKERS, bounded_map
+from tidy3d_webapi.environment import Env
+from tidy3d_webapi.simulation_task import Folder
+
+MIRROR_FILE = os.path.join(expanduser("~"), ".tidy3d", "mirror.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    env TEXT NOT NULL,
+    folder_id TEXT NOT NULL,
+    folder_name TEXT,
+    synced_at REAL,
+    watermark TEXT,
+    PRIMARY KEY (env, folder_id)
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    env TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    folder_id TEXT,
+    task_name TEXT,
+    status TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    record TEXT NOT NULL,
+    PRIMARY KEY (env, task_id)
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (env, status);
+CREATE INDEX IF NOT EXISTS tasks_name ON tasks (env, task_name);
+CREATE INDEX IF NOT EXISTS tasks_created_at ON tasks (env, created_at);
+CREATE INDEX IF NOT EXISTS tasks_folder ON tasks (env, folder_id, created_at);
+"""
+
+
+def _timestamp(value) -> Optional[str]:
+    """Normalized utc iso timestamp, ordered lexicographically."""
+    if not value:
+        return None
+    stamp = parse_datetime(value)
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=pytz.utc)
+    return stamp.astimezone(pytz.utc).isoformat()
+
+
+class TaskMirror:
+    """
+    Folders and tasks of the account, kept in a SQLite database and synced incrementally. Queries
+    are answered locally, and the last synced state remains available offline.
+
+    For example:
+        mirror = use_mirror(MIRROR_FILE)
+        mirror.sync()
+        running = mirror.query(status="running")
+    """
+
+    def __init__(self, path: str = ":memory:", max_age: float = 30.0):
+        """
+        Parameters
+        ----------
+        path: str
+            database file, in memory if ":memory:".
+        max_age: float
+            seconds a synced folder is considered up to date.
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_age = max_age
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._lock = Lock()
+
+    def close(self):
+        """Close the database."""
+        self._db.close()
+
+    def _execute(self, sql: str, params=()) -> List[tuple]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def put(self, record: dict, folder_id: str = None):
+        """
+        Insert or update the record of a task.
+        Parameters
+        ----------
+        record: dict
+            task record as returned by the server.
+        folder_id: str
+            folder of the task, ``record['projectId']`` by default.
+        """
+        with self._lock, self._db:
+            self._upsert([record], folder_id)
+
+    def _upsert(self, records: List[dict], folder_id: str = None):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    Env.current.name,
+                    record["taskId"],
+                    folder_id or record.get("projectId"),
+                    record.get("taskName"),
+                    (record.get("status") or "").lower() or None,
+                    _timestamp(record.get("createdAt")),
+                    _timestamp(record.get("updatedAt")),
+                    json.dumps(record, default=str),
+                )
+                for record in records
+            ],
+        )
+
+    def get(self, task_id: str) -> Optional[dict]:
+        """
+        Get the mirrored record of a task.
+        Parameters
+        ----------
+        task_id: str
+            task id.
+        """
+        rows = self._execute(
+            "SELECT record FROM tasks WHERE env = ? AND task_id = ?", (Env.current.name, task_id)
+        )
+        return json.loads(rows[0][0]) if rows else None
+
+    def forget(self, task_ids: Iterable[str]):
+        """
+        Drop the records of tasks, e.g. once deleted.
+        Parameters
+        ----------
+        task_ids: Iterable[str]
+            task ids.
+        """
+        with self._lock, self._db:
+            self._db.executemany(
+                "DELETE FROM tasks WHERE env = ? AND task_id = ?",
+                [(Env.current.name, task_id) for task_id in task_ids],
+            )
+
+    def folder_id(self, folder_name: str) -> Optional[str]:
+        """
+        Id of a mirrored folder.
+        Parameters
+        ----------
+        folder_name: str
+            folder name.
+        """
+        rows = self._execute(
+            "SELECT folder_id FROM folders WHERE env = ? AND folder_name = ?",
+            (Env.current.name, folder_name),
+        )
+        return rows[0][0] if rows else None
+
+    def sync_folders(self) -> List[Folder]:
+        """
+        Mirror the folder list, folders deleted on the server are dropped with their tasks.
+        """
+        folders = Folder.list() or []
+        env = Env.current.name
+        with self._lock, self._db:
+            known = {
+                row[0]
+                for row in self._db.execute("SELECT folder_id FROM folders WHERE env = ?", (env,))
+            }
+            for folder_id in known - {folder.folder_id for folder in folders}:
+                self._db.execute(
+                    "DELETE FROM folders WHERE env = ? AND folder_id = ?", (env, folder_id)
+                )
+                self._db.execute(
+                    "DELETE FROM tasks WHERE env = ? AND folder_id = ?", (env, folder_id)
+                )
+            # no upsert, it needs SQLite 3.24 which older python builds don't ship
+            self._db.executemany(
+                "UPDATE folders SET folder_name = ? WHERE env = ? AND folder_id = ?",
+                [(folder.folder_name, env, folder.folder_id) for folder in folders],
+            )
+            self._db.executemany(
+                "INSERT OR IGNORE INTO folders (env, folder_id, folder_name) VALUES (?, ?, ?)",
+                [(env, folder.folder_id, folder.folder_name) for folder in folders],
+            )
+        return folders
+
+    def sync_folder(self, folder: Folder, force: bool = False) -> int:
+        """
+        Mirror the tasks of a folder. Only the tasks created or updated since the last sync, or
+        whose status changed, are written.
+        Parameters
+        ----------
+        folder: Folder
+            folder to sync.
+        force: bool
+            sync even if the folder was synced less than ``max_age`` seconds ago.
+        Returns
+        -------
+        int
+            number of new, changed and removed tasks.
+        """
+        env = Env.current.name
+        rows = self._execute(
+            "SELECT synced_at, watermark FROM folders WHERE env = ? AND folder_id = ?",
+            (env, folder.folder_id),
+        )
+        synced_at, watermark = rows[0] if rows else (None, None)
+        if not force and synced_at and time.time() - synced_at < self.max_age:
+            return 0
+
+        records = folder.list_task_records()
+        statuses = dict(
+            self._execute(
+                "SELECT task_id, status FROM tasks WHERE env = ? AND folder_id = ?",
+                (env, folder.folder_id),
+            )
+        )
+        changed = []
+        for record in records:
+            stamp = _timestamp(record.get("updatedAt") or record.get("createdAt")) or ""
+            status = (record.get("status") or "").lower() or None
+            if (
+                record["taskId"] not in statuses
+                or statuses[record["taskId"]] != status
+                or stamp > (watermark or "")
+            ):
+                changed.append(record)
+            if stamp > (watermark or ""):
+                watermark = stamp
+        removed = set(statuses) - {record["taskId"] for record in records}
+
+        with self._lock, self._db:
+            self._upsert(changed, folder.folder_id)
+            self._db.executemany(
+                "DELETE FROM tasks WHERE env = ? AND task_id = ?",
+                [(env, task_id) for task_id in removed],
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO folders VALUES (?, ?, ?, ?, ?)",
+                (env, folder.folder_id, folder.folder_name, time.time(), watermark),
+            )
+        return len(changed) + len(removed)
+
+    def sync(self, force: bool = False, max_workers: int = DEFAULT_MAX_WORKERS) -> bool:
+        """
+        Mirror all folders and their tasks, keep the last synced state when offline.
+        Parameters
+        ----------
+        force: bool
+            sync even the folders synced less than ``max_age`` seconds ago.
+        max_workers: int
+            maximum number of folders listed concurrently.
+        Returns
+        -------
+        bool
+            False if the server could not be reached.
+        """
+        try:
+            folders = self.sync_folders()
+            for _, _, error in bounded_map(
+                lambda folder: self.sync_folder(folder, force), folders, max_workers
+            ):
+                if error:
+                    raise error
+        except requests.RequestException as err:
+            print(f"Task mirror is offline, using the last synced state: {err}")
+            return False
+        return True
+
+    # pylint:disable=too-many-arguments
+    def query(
+        self,
+        status: str = None,
+        name: str = None,
+        folder_id: str = None,
+        created_after: datetime = None,
+        created_before: datetime = None,
+        order: str = "new",
+        limit: int = None,
+    ) -> List[Dict]:
+        """
+        Query the mirrored tasks.
+        Parameters
+        ----------
+        status: str
+            task status.
+        name: str
+            task name, ``%`` and ``_`` are wildcards.
+        folder_id: str
+            folder id.
+        created_after: datetime
+            earliest creation time.
+        created_before: datetime
+            latest creation time, exclusive.
+        order: str
+            "new" for newest first, "old" for oldest first, else unordered.
+        limit: int
+            maximum number of tasks.
+        Returns
+        -------
+        List[Dict]
+            task records as returned by the server.
+        """
+        clauses = ["env = ?"]
+        params = [Env.current.name]
+        for column, operator, value in (
+            ("status", "=", status.lower() if status else None),
+            ("task_name", "LIKE", name),
+            ("folder_id", "=", folder_id),
+            ("created_at", ">=", _timestamp(created_after)),
+            ("created_at", "<", _timestamp(created_before)),
+        ):
+            if value is not None:
+                clauses.append(f"{column} {operator} ?")
+                params.append(value)
+        sql = f"SELECT record FROM tasks WHERE {' AND '.join(clauses)}"
+        if order in ("new", "old"):
+            sql += f" ORDER BY created_at {'DESC' if order == 'new' else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [json.loads(row[0]) for row in self._execute(sql, params)]
+
+    def list_tasks(self, folder_name: str, limit: int = None, order: str = "new") -> List[Dict]:
+        """
+        Sync a folder if its last sync is older than ``max_age`` and query its tasks, from the
+        last synced state when the server can't be reached.
+        Parameters
+        ----------
+        folder_name: str
+            folder name.
+        limit: int
+            maximum number of tasks.
+        order: str
+            "new" for newest first, "old" for oldest first, else unordered.
+        """
+        rows = self._execute(
+            "SELECT folder_id, synced_at FROM folders WHERE env = ? AND folder_name = ?",
+            (Env.current.name, folder_name),
+        )
+        if rows and rows[0][1] and time.time() - rows[0][1] < self.max_age:
+            return self.query(folder_id=rows[0][0], order=order, limit=limit)
+        folder_id = None
+        try:
+            folder = Folder.get(folder_name)
+            if folder:
+                self.sync_folder(folder, force=True)
+                folder_id = folder.folder_id
+        except requests.RequestException as err:
+            print(f"Task mirror is offline, using the last synced state: {err}")
+            folder_id = self.folder_id(folder_name)
+        if folder_id is None:
+            return []
+        return self.query(folder_id=folder_id, order=order, limit=limit)
+
+
+_CURRENT_MIRROR = {"mirror": None}
+
+
+def use_mirror(path: Optional[str] = MIRROR_FILE, max_age: float = 30.0) -> Optional[TaskMirror]:
+    """
+    Enable the mirror used by :func:`get_tasks` and :func:`get_info` as read-through cache.
+    Parameters
+    ----------
+    path: str
+        database file, in memory if ":memory:", the mirror is disabled if None.
+    max_age: float
+        seconds a synced folder is considered up to date.
+    """
+    if _CURRENT_MIRROR["mirror"] is not None:
+        _CURRENT_MIRROR["mirror"].close()
+    _CURRENT_MIRROR["mirror"] = TaskMirror(path, max_age) if path else None
+    return _CURRENT_MIRROR["mirror"]
+
+
+def current_mirror() -> Optional[TaskMirror]:
+    """The enabled mirror, None if disabled."""
+    return _CURRENT_MIRROR["mirror"]
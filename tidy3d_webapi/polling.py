@@ -0,0 +1,166 @@
+"""
+Adaptive status polling for simulation tasks.
+"""
+import time
+from collections import defaultdict, deque
+from typing import Dict, Iterable, Optional
+
+from pydantic import BaseModel, Field
+
+from tidy3d_webapi.concurrency import DEFAULT_MAX_WORKERS, bounded_map
+from tidy3d_webapi.simulation_task import Folder, SimulationTask
+
+
+class PollingPolicy(BaseModel):
+    """
+    Decide how long to wait before the next status check. Each state starts from its own base
+    interval, which grows by ``backoff`` while nothing changes. While running, the interval
+    follows the estimated time left when the progress rate is known.
+    """
+
+    min_interval: float = Field(1.0, title="min interval", description="Seconds.", ge=0)
+    max_interval: float = Field(60.0, title="max interval", description="Seconds.", ge=0)
+    backoff: float = Field(
+        1.5, title="backoff", description="Interval growth factor while unchanged.", ge=1
+    )
+    eta_fraction: float = Field(
+        0.25, title="eta fraction", description="Fraction of the estimated time left to wait."
+    )
+    state_intervals: Dict[str, float] = Field(
+        {"draft": 10.0, "queued": 10.0, "preprocess": 2.0, "running": 5.0, "postprocess": 2.0},
+        title="state intervals",
+        description="Base interval in seconds of each task status.",
+    )
+
+    def next_interval(
+        self,
+        status: Optional[str],
+        previous: Optional[float] = None,
+        changed: bool = True,
+        eta: Optional[float] = None,
+    ) -> float:
+        """
+        Seconds to wait before checking again.
+        Parameters
+        ----------
+        status: str
+            current task status.
+        previous: float
+            the last interval, None for the first check.
+        changed: bool
+            whether anything changed since the last check.
+        eta: float
+            estimated seconds until the task finishes, if known.
+        """
+        if eta is not None:
+            interval = eta * self.eta_fraction
+        elif changed or previous is None:
+            interval = self.state_intervals.get(status, self.min_interval)
+        else:
+            interval = previous * self.backoff
+        return min(max(interval, self.min_interval), self.max_interval)
+
+
+# pylint:disable=too-few-public-methods
+class ProgressRate:
+    """
+    Estimate the time left of a running task from its recent percentage done samples.
+    """
+
+    def __init__(self, window: int = 5):
+        self._samples = deque(maxlen=window)
+
+    def add(self, perc_done: float, when: float = None):
+        """
+        Add a sample.
+        Parameters
+        ----------
+        perc_done: float
+            percentage done of the task.
+        when: float
+            ``time.monotonic()`` of the sample, now by default.
+        """
+        self._samples.append((time.monotonic() if when is None else when, perc_done))
+
+    def eta(self, target: float = 100.0) -> Optional[float]:
+        """
+        Seconds until ``target`` percent at the current rate, None if unknown.
+        """
+        if len(self._samples) < 2:
+            return None
+        (start, first), (end, last) = self._samples[0], self._samples[-1]
+        if end <= start or last <= first:
+            return None
+        return max(target - last, 0.0) / ((last - first) / (end - start))
+
+
+# pylint:disable=too-few-public-methods
+class StatusPoller:
+    """
+    Fetch the statuses of many tasks. Tasks sharing a folder are checked with one listing of the
+    folder, other tasks with bounded concurrent detail requests.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, bulk_threshold: int = 4):
+        """
+        Parameters
+        ----------
+        max_workers: int
+            maximum number of concurrent requests.
+        bulk_threshold: int
+            minimum number of pending tasks in a folder to check them with a folder listing.
+        """
+        self.max_workers = max_workers
+        self.bulk_threshold = bulk_threshold
+        self._folder_of: Dict[str, str] = {}
+        self._folder_size: Dict[str, int] = {}
+
+    def _use_listing(self, folder_id: str, pending: int) -> bool:
+        # a listing returns every task in the folder, it must not cost more than the details
+        folder_size = self._folder_size.get(folder_id, 0)
+        return pending >= self.bulk_threshold and pending * 50 >= folder_size
+
+    def _fetch(self, request):
+        kind, key = request
+        if kind == "folder":
+            return Folder.construct(folder_id=key).list_task_statuses()
+        task = SimulationTask.get(key)
+        if task:
+            self._folder_of[key] = getattr(task, "projectId", None)
+        return {key: task.status if task else None}
+
+    def poll(self, task_ids: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Get the statuses of the tasks.
+        Parameters
+        ----------
+        task_ids: Iterable[str]
+            task ids.
+        Returns
+        -------
+        Dict[str, str]
+            Mapping of task id to lower case status, None if the task is not found.
+        """
+        task_ids = list(task_ids)
+        by_folder = defaultdict(list)
+        for task_id in task_ids:
+            by_folder[self._folder_of.get(task_id)].append(task_id)
+
+        requests = []
+        for folder_id, ids in by_folder.items():
+            if folder_id and self._use_listing(folder_id, len(ids)):
+                requests.append(("folder", folder_id))
+            else:
+                requests.extend(("task", task_id) for task_id in ids)
+
+        statuses = {}
+        for request, result, error in bounded_map(self._fetch, requests, self.max_workers):
+            if error:
+                raise error
+            if request[0] == "folder":
+                self._folder_size[request[1]] = len(result)
+            statuses.update(result)
+        return {
+            task_id: statuses[task_id].lower() if statuses.get(task_id) else None
+            for task_id in task_ids
+        }
@@ -0,0 +1,396 @@
+"""
+Solver progress of running tasks, fetched incrementally, and of whole batches.
+"""
+import time
+from datetime import timedelta
+from threading import Lock
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from botocore.exceptions import ClientError
+from pydantic import BaseModel, Field
+
+from tidy3d_webapi.cache import PROGRESS_HISTORIES
+from tidy3d_webapi.concurrency import DEFAULT_MAX_WORKERS, bounded_map
+from tidy3d_webapi.environment import Env
+from tidy3d_webapi.polling import ProgressRate, StatusPoller
+from tidy3d_webapi.s3_utils import get_object
+from tidy3d_webapi.simulation_task import FINAL_STATES, RUNNING_INFO, SUCCESS_STATES
+
+MAX_PROGRESS_HISTORIES = 4096
+DEFAULT_SHUTOFF = 1e-5
+
+_HISTORIES_LOCK = Lock()
+
+
+class ProgressForecast(BaseModel):
+    """
+    Predicted end of a running task, from the decay of its field.
+    """
+
+    perc_done: float = Field(title="perc done", description="Last percentage done.")
+    field_decay: float = Field(title="field decay", description="Last field decay.")
+    decay_rate: Optional[float] = Field(
+        None,
+        title="decay rate",
+        description="Decades of field decay per percent done, negative when decaying.",
+    )
+    shutoff_perc_done: Optional[float] = Field(
+        None,
+        title="shutoff perc done",
+        description="Percentage done at which the field decays to the shutoff, None if it "
+        "doesn't decay.",
+    )
+    eta: Optional[float] = Field(
+        None, title="eta", description="Seconds until the run ends, None if unknown."
+    )
+
+    @property
+    def reaches_shutoff(self) -> bool:
+        """Whether the run is predicted to stop on the shutoff before the last time step."""
+        return self.shutoff_perc_done is not None and self.shutoff_perc_done <= 100.0
+
+
+def _parse_row(line: bytes) -> Optional[Tuple[float, float]]:
+    try:
+        perc_done, field_decay = line.split(b",")
+        return float(perc_done), float(field_decay)
+    except ValueError:
+        return None
+
+
+def _two_columns(lines: bytes) -> bool:
+    # the separators alternate comma and newline, else the flattened values would mis-pair
+    content = np.frombuffer(lines + b"\n", dtype=np.uint8)
+    separators = content[(content == ord(",")) | (content == ord("\n"))]
+    return (
+        separators.size % 2 == 0
+        and bool(np.all(separators[0::2] == ord(",")))
+        and bool(np.all(separators[1::2] == ord("\n")))
+    )
+
+
+class ProgressHistory:  # pylint:disable=too-many-instance-attributes
+    """
+    Percentage done and field decay of each progress report of a task, from
+    ``solver_progress.csv``. Each :meth:`update` only downloads the rows written since the
+    previous one, a row is added once its line is complete.
+
+    For example:
+        history = get_progress_history(task_id)
+        history.update()
+        forecast = history.forecast(shutoff=sim.shutoff)
+        if not forecast.reaches_shutoff:
+            print(f"{task_id} won't decay below the shutoff, {forecast.field_decay:.2e} left")
+    """
+
+    def __init__(self, task_id: str, fit_points: int = 20):
+        """
+        Parameters
+        ----------
+        task_id: str
+            task id.
+        fit_points: int
+            number of the latest decaying rows the decay is fitted on.
+        """
+        self.task_id = task_id
+        self.fit_points = fit_points
+        self._offset = 0
+        self._partial = b""
+        self._perc_done = np.empty(0)
+        self._field_decay = np.empty(0)
+        self._rate = ProgressRate()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._perc_done)
+
+    @property
+    def perc_done(self) -> np.ndarray:
+        """Percentage done of each row."""
+        return self._perc_done
+
+    @property
+    def field_decay(self) -> np.ndarray:
+        """Field decay of each row."""
+        return self._field_decay
+
+    def _append(self, content: bytes) -> int:
+        # the last line is still being written unless the content ends with a newline
+        complete, _, self._partial = (self._partial + content).rpartition(b"\n")
+        if not complete:
+            return 0
+        try:
+            if not _two_columns(complete):
+                raise ValueError("Not two fields per line.")
+            rows = np.array(complete.replace(b"\n", b",").split(b","), dtype=float).reshape(-1, 2)
+        except ValueError:
+            # a header or a malformed line, parse line by line
+            rows = np.array(
+                [values for values in map(_parse_row, complete.split(b"\n")) if values],
+                dtype=float,
+            ).reshape(-1, 2)
+        if len(rows):
+            self._perc_done = np.concatenate((self._perc_done, rows[:, 0]))
+            self._field_decay = np.concatenate((self._field_decay, rows[:, 1]))
+        return len(rows)
+
+    def update(self) -> int:
+        """
+        Download the rows written since the last update.
+        Returns
+        -------
+        int
+            number of new rows.
+        """
+        with self._lock:
+            resp = get_object(self.task_id, RUNNING_INFO, start_byte=self._offset)
+            if resp is None:
+                return 0
+            content = resp["Body"].read()
+            self._offset += len(content)
+            added = self._append(content)
+            if added:
+                self._rate.add(float(self._perc_done[-1]))
+            return added
+
+    def fit_decay(self) -> Optional[Tuple[float, float]]:
+        """
+        Fit ``log10(field_decay)`` linearly to the percentage done, on the latest rows after the
+        field peak.
+        Returns
+        -------
+        Tuple[float, float]
+            slope and intercept, None if there are too few decaying rows.
+        """
+        peak = int(np.argmax(self._field_decay)) if self._perc_done.size else 0
+        perc_done = self._perc_done[peak:][-self.fit_points :]
+        field_decay = self._field_decay[peak:][-self.fit_points :]
+        positive = field_decay > 0
+        if np.count_nonzero(positive) < 3:
+            return None
+        slope, intercept = np.polyfit(perc_done[positive], np.log10(field_decay[positive]), 1)
+        return float(slope), float(intercept)
+
+    def forecast(self, shutoff: float = DEFAULT_SHUTOFF) -> Optional[ProgressForecast]:
+        """
+        Predict when the run ends, either when the field decays to ``shutoff`` or at 100%.
+        Parameters
+        ----------
+        shutoff: float
+            field decay at which the solver stops, ``Simulation.shutoff``.
+        Returns
+        -------
+        ProgressForecast
+            the prediction, None before the first row.
+        """
+        if not self._perc_done.size:
+            return None
+        forecast = ProgressForecast(
+            perc_done=self._perc_done[-1], field_decay=self._field_decay[-1]
+        )
+        fit = self.fit_decay()
+        if fit is not None:
+            forecast.decay_rate, intercept = fit
+            if forecast.decay_rate < 0 < shutoff:
+                forecast.shutoff_perc_done = max(
+                    (np.log10(shutoff) - intercept) / forecast.decay_rate, forecast.perc_done
+                )
+        end = 100.0
+        if forecast.reaches_shutoff:
+            end = forecast.shutoff_perc_done
+        forecast.eta = self._rate.eta(end)
+        return forecast
+
+
+def get_progress_history(task_id: str) -> ProgressHistory:
+    """
+    The progress history of a task, shared so repeated updates stay incremental.
+    Parameters
+    ----------
+    task_id: str
+        task id.
+    """
+    with _HISTORIES_LOCK:
+        key = (Env.current.name, task_id)
+        history = PROGRESS_HISTORIES.get(key)
+        if history is None:
+            history = PROGRESS_HISTORIES[key] = ProgressHistory(task_id)
+        PROGRESS_HISTORIES.move_to_end(key)
+        while len(PROGRESS_HISTORIES) > MAX_PROGRESS_HISTORIES:
+            PROGRESS_HISTORIES.popitem(last=False)
+        return history
+
+
+def clear_progress_histories():
+    """Drop the progress histories of all tasks."""
+    with _HISTORIES_LOCK:
+        PROGRESS_HISTORIES.clear()
+
+
+def _update_history(task_id: str) -> Tuple[float, float]:
+    history = get_progress_history(task_id)
+    try:
+        history.update()
+    except ClientError:
+        # no progress written yet
+        pass
+    if not history.perc_done.size:
+        return 0.0, np.nan
+    return history.perc_done[-1], history.field_decay[-1]
+
+
+def _format_eta(seconds: Optional[float]) -> str:
+    return "unknown" if seconds is None else str(timedelta(seconds=round(seconds)))
+
+
+class BatchProgress:  # pylint:disable=too-many-instance-attributes
+    """
+    Status, percentage done and field decay of many tasks, in one numpy array per column.
+    Statuses are checked in bulk and the progress of the running tasks is fetched concurrently,
+    the aggregates are computed over the columns.
+
+    For example:
+        progress = BatchProgress(batch.task_ids.values())
+        progress.watch(poll_interval=30)
+        print(progress.table())
+    """
+
+    def __init__(self, task_ids: Iterable[str], max_workers: int = DEFAULT_MAX_WORKERS):
+        """
+        Parameters
+        ----------
+        task_ids: Iterable[str]
+            task ids.
+        max_workers: int
+            maximum number of concurrent requests.
+        """
+        self.task_ids = np.array(list(task_ids), dtype=object)
+        self.max_workers = max_workers
+        self.status = np.full(len(self.task_ids), "unknown", dtype=object)
+        self.perc_done = np.zeros(len(self.task_ids))
+        self.field_decay = np.full(len(self.task_ids), np.nan)
+        self._index = {task_id: index for index, task_id in enumerate(self.task_ids)}
+        self._poller = StatusPoller(max_workers=max_workers)
+        self._start: Optional[Tuple[float, float, int]] = None
+        self._elapsed = 0.0
+
+    @property
+    def finished(self) -> np.ndarray:
+        """Mask of the tasks in a final state, ``missing`` if not found."""
+        return np.isin(self.status, FINAL_STATES + ("missing",))
+
+    @property
+    def succeeded(self) -> np.ndarray:
+        """Mask of the successful tasks."""
+        return np.isin(self.status, SUCCESS_STATES)
+
+    def _work(self) -> float:
+        # finished tasks have no work left, whatever their last progress
+        return float(np.where(self.finished, 100.0, self.perc_done).sum())
+
+    def update(self):
+        """
+        Fetch the status of the unfinished tasks and the new progress of the running ones.
+        """
+        pending = self.task_ids[~self.finished]
+        statuses = self._poller.poll(pending)
+        indices = np.fromiter((self._index[task_id] for task_id in pending), dtype=int)
+        self.status[indices] = [statuses[task_id] or "missing" for task_id in pending]
+
+        running = self.task_ids[self.status == "running"]
+        for task_id, result, error in bounded_map(_update_history, running, self.max_workers):
+            if error is None:
+                index = self._index[task_id]
+                self.perc_done[index], self.field_decay[index] = result
+        self.perc_done[self.succeeded] = 100.0
+
+        now = time.monotonic()
+        if self._start is None:
+            self._start = (now, self._work(), int(self.finished.sum()))
+        self._elapsed = now - self._start[0]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of tasks in each status."""
+        statuses, counts = np.unique(self.status.astype(str), return_counts=True)
+        return dict(zip(statuses.tolist(), counts.tolist()))
+
+    @property
+    def completion(self) -> float:
+        """Percentage of the work of the batch done, finished tasks count as complete."""
+        return self._work() / len(self.task_ids) if len(self.task_ids) else 100.0
+
+    @property
+    def throughput(self) -> Optional[float]:
+        """Tasks finished per second since the first update, None if unknown."""
+        if self._start is None or self._elapsed <= 0:
+            return None
+        return (int(self.finished.sum()) - self._start[2]) / self._elapsed
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Seconds until the batch finishes at the progress rate since the first update."""
+        if self._start is None or self._elapsed <= 0:
+            return None
+        rate = (self._work() - self._start[1]) / self._elapsed
+        if rate <= 0:
+            return None
+        return (100.0 * len(self.task_ids) - self._work()) / rate
+
+    def summary(self) -> str:
+        """
+        One line with the counts, completion, throughput and ETA of the batch.
+        """
+        counts = self.counts()
+        failed = int(self.finished.sum() - self.succeeded.sum())
+        throughput = self.throughput
+        return (
+            f"{int(self.succeeded.sum())}/{len(self.task_ids)} succeeded, {failed} failed, "
+            f"{counts.get('running', 0)} running, {counts.get('queued', 0)} queued, "
+            f"{self.completion:.1f}% complete, "
+            f"{'unknown' if throughput is None else f'{throughput * 60:.1f}'} tasks/min, "
+            f"ETA {_format_eta(self.eta)}"
+        )
+
+    def table(self) -> str:
+        """
+        One line per status with its count and the spread of the percentage done.
+        """
+        lines = []
+        for status, count in self.counts().items():
+            perc_done = self.perc_done[self.status == status]
+            lines.append(
+                f"{status:>12}: {count:>6} tasks, {perc_done.min():5.1f}% min, "
+                f"{np.median(perc_done):5.1f}% median, {perc_done.max():5.1f}% max done"
+            )
+        return "\n".join(lines)
+
+    def watch(
+        self, poll_interval: float = 30.0, timeout: float = None, verbose: bool = True
+    ) -> Dict[str, Optional[str]]:
+        """
+        Update until every task is finished, printing the summary line after each update.
+        Parameters
+        ----------
+        poll_interval: float
+            seconds between updates.
+        timeout: float
+            maximum seconds to wait, wait forever if None.
+        verbose: bool
+            print the summary line.
+        Returns
+        -------
+        Dict[str, str]
+            Mapping of task id to its final status, ``missing`` if the task was not found.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self.update()
+            if verbose:
+                print(self.summary())
+            if self.finished.all():
+                return dict(zip(self.task_ids.tolist(), self.status.tolist()))
+            if deadline is not None and time.monotonic() + poll_interval > deadline:
+                pending = int((~self.finished).sum())
+                raise TimeoutError(f"{pending} tasks are not finished after {timeout} seconds.")
+            time.sleep(poll_interval)
@@ -1,9 +1,12 @@
 """ handles filesystem, storage """
+import contextlib
 import io
 import os
 from enum import Enum
+from typing import Union
 
 from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
 from rich.progress import (
     BarColumn,
     DownloadColumn,
@@ -77,38 +80,53 @@ _s3_config = TransferConfig(
 )
 
 
-def upload_string(resource_id: str, content: str, remote_filename: str):
+def _progress_context(action: _S3Action, show_progress: bool):
+    """rich progress bar, or a no-op context when running quietly, e.g. from worker threads"""
+    return _get_progress(action) if show_progress else contextlib.nullcontext()
+
+
+def upload_string(
+    resource_id: str, content: Union[str, bytes], remote_filename: str, show_progress=True
+):
     """
     upload a string to a file on S3
     @param resource_id: the resource id, e.g. task id
-    @param content:     the content of the file
+    @param content:     the content of the file, str is utf-8 encoded
     @param remote_filename: the remote file name on S3
+    @param show_progress: show a progress bar, must be False when uploading concurrently
     """
-    with _get_progress(_S3Action.UPLOADING) as progress:
-        task_id = progress.add_task("upload", filename=remote_filename, total=len(content))
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    with _progress_context(_S3Action.UPLOADING, show_progress) as progress:
+        if show_progress:
+            task_id = progress.add_task("upload", filename=remote_filename, total=len(content))
 
         def _call_back(bytes_in_chunk):
             progress.update(task_id, advance=bytes_in_chunk)
 
         token = get_s3_sts_token(resource_id, remote_filename)
         token.get_client().upload_fileobj(
-            io.BytesIO(content.encode("utf-8")),
+            io.BytesIO(content),
             Bucket=token.get_bucket(),
             Key=token.get_s3_key(),
-            Callback=_call_back,
+            Callback=_call_back if show_progress else None,
             Config=_s3_config,
         )
 
 
-def upload_file(resource_id: str, path: str, remote_filename: str):
+def upload_file(resource_id: str, path: str, remote_filename: str, show_progress=True):
     """
     upload file to S3
     @param resource_id: the resource id, e.g. task id
     @param path: path to the file
     @param remote_filename: the remote file name on S3
+    @param show_progress: show a progress bar, must be False when uploading concurrently
     """
-    with _get_progress(_S3Action.UPLOADING) as progress:
-        task_id = progress.add_task("upload", filename=remote_filename, total=os.path.getsize(path))
+    with _progress_context(_S3Action.UPLOADING, show_progress) as progress:
+        if show_progress:
+            task_id = progress.add_task(
+                "upload", filename=remote_filename, total=os.path.getsize(path)
+            )
 
         def _call_back(bytes_in_chunk):
             progress.update(task_id, advance=bytes_in_chunk)
@@ -119,11 +137,36 @@ def upload_file(resource_id: str, path: str, remote_filename: str):
                 data,
                 Bucket=token.get_bucket(),
                 Key=token.get_s3_key(),
-                Callback=_call_back,
+                Callback=_call_back if show_progress else None,
                 Config=_s3_config,
             )
 
 
+def get_object(
+    resource_id: str, remote_filename: str, if_none_match: str = None, start_byte: int = None
+):
+    """
+    get a file from S3 without saving it, the content is streamed from the ``Body`` of the result
+    @param resource_id: the resource id, e.g. task id
+    @param remote_filename: the remote file name on S3
+    @param if_none_match: ETag of a local copy, None is returned if the file has this ETag
+    @param start_byte: only get the content from this offset, None is returned if the file is
+                       not longer than that
+    """
+    token = get_s3_sts_token(resource_id, remote_filename)
+    kwargs = {"IfNoneMatch": if_none_match} if if_none_match else {}
+    if start_byte:
+        kwargs["Range"] = f"bytes={start_byte}-"
+    try:
+        return token.get_client().get_object(
+            Bucket=token.get_bucket(), Key=token.get_s3_key(), **kwargs
+        )
+    except ClientError as err:
+        if err.response.get("Error", {}).get("Code") in ("304", "InvalidRange"):
+            return None
+        raise
+
+
 def download_file(resource_id: str, remote_filename: str, to_file: str = None, show_progress=True):
     """
     download file from S3
@@ -136,9 +179,8 @@ def download_file(resource_id: str, remote_filename: str, to_file: str = None, s
     client = token.get_client()
 
     meta_data = client.head_object(Bucket=token.get_bucket(), Key=token.get_s3_key())
-    with _get_progress(_S3Action.DOWNLOADING) as progress:
+    with _progress_context(_S3Action.DOWNLOADING, show_progress) as progress:
         if show_progress:
-            progress.start()
             task_id = progress.add_task(
                 "download",
                 filename=os.path.basename(remote_filename),
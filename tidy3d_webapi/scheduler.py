@@ -0,0 +1,303 @@
+"""
+Client side submission scheduler with adaptive concurrency.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from threading import Condition
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import requests
+from pydantic import BaseModel, Extra, Field
+
+from tidy3d_webapi.http_management import http
+from tidy3d_webapi.polling import StatusPoller
+from tidy3d_webapi.simulation_task import SimulationTask, TaskState
+from tidy3d_webapi.solver_version import resolve_solver_version
+from tidy3d_webapi.task_handle import TaskHandle, get_handle
+
+# responses meaning the server is overloaded or throttling, the request can be retried
+THROTTLE_STATUS = (429, 503)
+
+
+class AccountInfo(BaseModel, extra=Extra.allow):
+    """
+    Account and quota information.
+    """
+
+    credit: Optional[float] = Field(None, title="credit", description="Remaining flex units.")
+    credit_expiration: Optional[datetime] = Field(
+        None, title="credit expiration", alias="creditExpiration"
+    )
+    account_type: Optional[str] = Field(None, title="account type", alias="accountType")
+    monthly_task_count: Optional[int] = Field(
+        None, title="monthly task count", alias="monthlyTaskCount"
+    )
+    total_task_count: Optional[int] = Field(None, title="total task count", alias="totalTaskCount")
+
+    @classmethod
+    def get(cls) -> Optional["AccountInfo"]:
+        """
+        Get the account information of the current api key.
+        """
+        resp = http.get("tidy3d/account")
+        return AccountInfo(**resp) if resp else None
+
+
+# pylint:disable=too-many-instance-attributes
+class AimdLimit:
+    """
+    Concurrency limit with additive increase, multiplicative decrease: the limit grows by one
+    every ``limit`` successes and is multiplied by ``decrease`` when the server throttles.
+    """
+
+    # pylint:disable=too-many-arguments
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 32,
+        decrease: float = 0.5,
+        cooldown: float = 1.0,
+    ):
+        """
+        Parameters
+        ----------
+        initial: int
+            initial limit.
+        minimum: int
+            lowest limit.
+        maximum: int
+            highest limit.
+        decrease: float
+            factor applied to the limit on throttling.
+        cooldown: float
+            seconds during which further throttling doesn't decrease the limit again, so a burst
+            of rejections of requests sent together counts once.
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.in_flight = 0
+        self.peak = 0
+        self._last_decrease = float("-inf")
+        self._condition = Condition()
+
+    def acquire(self):
+        """Wait for a free slot."""
+        with self._condition:
+            self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+
+    def release(self):
+        """Free a slot."""
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self):
+        """Additive increase."""
+        with self._condition:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+    def on_throttle(self):
+        """Multiplicative decrease."""
+        with self._condition:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                self._last_decrease = now
+
+
+class SubmitResult(BaseModel):
+    """
+    Outcome of a scheduled submission.
+    """
+
+    submitted: List[str] = Field([], title="submitted", description="Ids of the submitted tasks.")
+    failed: Dict[str, str] = Field(
+        {}, title="failed", description="Mapping of task id to the reason it was not submitted."
+    )
+    throttled: int = Field(0, title="throttled", description="Number of throttled requests.")
+    peak_concurrency: int = Field(
+        0, title="peak concurrency", description="Maximum number of concurrent submissions."
+    )
+
+
+# pylint:disable=too-many-instance-attributes,too-few-public-methods
+class SubmissionScheduler:
+    """
+    Submit many tasks with a concurrency adapted to the server: the number of concurrent
+    submissions grows while they succeed and is halved on 429 and 5xx responses. Throttled
+    submissions are retried, the others after a server error only while the task is still a
+    draft. New submissions also wait while too many of the submitted tasks are queued.
+
+    For example:
+        result = SubmissionScheduler(max_queued=200).submit_all(task_ids)
+    """
+
+    # pylint:disable=too-many-arguments
+    def __init__(
+        self,
+        initial_concurrency: int = 4,
+        max_concurrency: int = 32,
+        max_retries: int = 5,
+        backoff: float = 1.0,
+        max_queued: int = None,
+        queue_check_interval: float = 10.0,
+        check_account: bool = True,
+    ):
+        """
+        Parameters
+        ----------
+        initial_concurrency: int
+            initial number of concurrent submissions.
+        max_concurrency: int
+            maximum number of concurrent submissions.
+        max_retries: int
+            retries of a throttled submission.
+        backoff: float
+            seconds before the first retry, doubled on each retry, unless the server sends
+            ``Retry-After``.
+        max_queued: int
+            maximum number of submitted tasks waiting in the server queue, unbounded if None.
+        queue_check_interval: float
+            seconds between checks of the queued tasks.
+        check_account: bool
+            refuse to submit when the account has no credit left.
+        """
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_queued = max_queued
+        self.queue_check_interval = queue_check_interval
+        self.check_account = check_account
+        self._poller = StatusPoller()
+
+    def _retry_delay(self, error: requests.HTTPError, attempt: int) -> float:
+        retry_after = (
+            error.response.headers.get("Retry-After") if error.response is not None else None
+        )
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            return self.backoff * 2**attempt
+
+    @staticmethod
+    def _remote_state(task: SimulationTask) -> Optional[TaskState]:
+        """State of a task on the server, None if it can't be read."""
+        try:
+            remote = SimulationTask.get(task.task_id)
+        except Exception:  # pylint:disable=broad-except
+            return None
+        return remote.state if remote else None
+
+    def _submit_one(  # pylint:disable=too-many-return-statements
+        self, task: SimulationTask, limit: AimdLimit, solver_version: str, worker_group: str
+    ) -> Tuple[Optional[str], int]:
+        """
+        Submit a task, retrying when throttled, or after a server error if the task is still a
+        draft. Return the error and the throttle count.
+        """
+        throttled = 0
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    task.submit(solver_version=solver_version, worker_group=worker_group)
+                except requests.HTTPError as err:
+                    status = err.response.status_code if err.response is not None else None
+                    if status not in THROTTLE_STATUS:
+                        if status is None or status < 500:
+                            return str(err), throttled
+                        # the submit may have reached the server, it is not idempotent: retry
+                        # only a task still in draft so it is not submitted and charged twice
+                        state = self._remote_state(task)
+                        if state == TaskState.SUBMITTED:
+                            limit.on_success()
+                            get_handle(task.task_id).invalidate()
+                            return None, throttled
+                        if state != TaskState.CREATED:
+                            return str(err), throttled
+                    throttled += 1
+                    limit.on_throttle()
+                    if attempt == self.max_retries:
+                        return str(err), throttled
+                    time.sleep(self._retry_delay(err, attempt))
+                    continue
+                except Exception as err:  # pylint:disable=broad-except
+                    return str(err), throttled
+                limit.on_success()
+                get_handle(task.task_id).invalidate()
+                return None, throttled
+        finally:
+            limit.release()
+        return None, throttled
+
+    def _wait_for_queue(self, submitted: List[str]):
+        """Block while too many submitted tasks are queued on the server."""
+        if self.max_queued is None:
+            return
+        while True:
+            statuses = self._poller.poll(submitted)
+            queued = sum(1 for status in statuses.values() if status == "queued")
+            if queued < self.max_queued:
+                return
+            time.sleep(self.queue_check_interval)
+
+    def submit_all(  # pylint:disable=too-many-locals
+        self,
+        tasks: Iterable[Union[str, TaskHandle, SimulationTask]],
+        solver_version: str = None,
+        worker_group: str = None,
+    ) -> SubmitResult:
+        """
+        Submit tasks whose simulation is uploaded, or attached to the task.
+        Parameters
+        ----------
+        tasks: Iterable[Union[str, TaskHandle, SimulationTask]]
+            task ids, handles or tasks.
+        solver_version: str
+            target solver version.
+        worker_group: str
+            worker group.
+        Returns
+        -------
+        SubmitResult
+            the submitted and failed task ids.
+        """
+        if self.check_account:
+            account = AccountInfo.get()
+            if account and account.credit is not None and account.credit <= 0:
+                raise ValueError("The account has no credit left, no task can be submitted.")
+
+        solver_version = resolve_solver_version(solver_version)
+        limit = AimdLimit(self.initial_concurrency, maximum=self.max_concurrency)
+        result = SubmitResult()
+        futures = {}
+        last_queue_check = float("-inf")
+        with ThreadPoolExecutor(self.max_concurrency) as pool:
+            for task in tasks:
+                handle = get_handle(task)
+                task = handle.peek() or SimulationTask.construct(task_id=handle.task_id)
+                if time.monotonic() - last_queue_check >= self.queue_check_interval:
+                    done = [task_id for task_id, future in futures.items() if future.done()]
+                    self._wait_for_queue(done)
+                    last_queue_check = time.monotonic()
+                limit.acquire()
+                futures[task.task_id] = pool.submit(
+                    self._submit_one, task, limit, solver_version, worker_group
+                )
+            for task_id, future in futures.items():
+                error, throttled = future.result()
+                result.throttled += throttled
+                if error is None:
+                    result.submitted.append(task_id)
+                else:
+                    result.failed[task_id] = error
+        result.peak_concurrency = limit.peak
+        return result
@@ -0,0 +1,173 @@
+"""
+Pluggable json encoding of simulations for upload.
+"""
+import math
+import os
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+Encoder = Callable[[BaseModel], bytes]
+
+
+def encode_json(model: BaseModel) -> bytes:
+    """
+    Reference encoder, pydantic ``.json()`` through the stdlib json module.
+    """
+    return model.json().encode("utf-8")
+
+
+def _quote_non_finite(obj):
+    """orjson writes non-finite floats as null, quote them like :meth:`Simulation.to_file` does."""
+    if isinstance(obj, float):
+        if math.isfinite(obj):
+            return obj
+        return "NaN" if math.isnan(obj) else ("Infinity" if obj > 0 else "-Infinity")
+    if isinstance(obj, dict):
+        return {key: _quote_non_finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_quote_non_finite(value) for value in obj]
+    if isinstance(obj, np.ndarray) and obj.dtype.kind == "f" and not np.isfinite(obj).all():
+        return _quote_non_finite(obj.tolist())
+    return obj
+
+
+def encode_orjson(model: BaseModel) -> bytes:
+    """
+    Fast encoder, orjson with native numpy array support and the model's json encoders as
+    fallback for other types.
+    """
+    # pylint:disable=no-member
+    encoder = model.__json_encoder__
+
+    def _default(obj):
+        return _quote_non_finite(encoder(obj))
+
+    return orjson.dumps(
+        _quote_non_finite(model.dict()),
+        default=_default,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+    )
+
+
+JSON_ENCODERS: Dict[str, Encoder] = {"json": encode_json}
+if orjson is not None:
+    JSON_ENCODERS["orjson"] = encode_orjson
+
+_CURRENT_ENCODER = {"name": "json"}
+
+
+def register_json_encoder(name: str, encoder: Encoder):
+    """
+    Register an encoder usable by :func:`set_json_encoder`.
+    Parameters
+    ----------
+    name: str
+        encoder name.
+    encoder: Callable[[BaseModel], bytes]
+        function encoding a model to json bytes.
+    """
+    JSON_ENCODERS[name] = encoder
+
+
+def set_json_encoder(name: str):
+    """
+    Select the encoder of simulation uploads, "json" by default, "orjson" is opt-in when installed.
+    Parameters
+    ----------
+    name: str
+        name of a registered encoder.
+    """
+    if name not in JSON_ENCODERS:
+        raise ValueError(f"Unknown json encoder {name}, available: {', '.join(JSON_ENCODERS)}.")
+    _CURRENT_ENCODER["name"] = name
+
+
+def get_json_encoder() -> str:
+    """Name of the current encoder."""
+    return _CURRENT_ENCODER["name"]
+
+
+def encode_simulation(simulation: BaseModel) -> bytes:
+    """
+    Encode a simulation to json bytes with the current encoder.
+    Parameters
+    ----------
+    simulation: :class:`.Simulation`
+        simulation to encode.
+    """
+    return JSON_ENCODERS[_CURRENT_ENCODER["name"]](simulation)
+
+
+def _encode_timed(name: str, model: BaseModel) -> Tuple[bytes, float]:
+    start = time.perf_counter()
+    content = JSON_ENCODERS[name](model)
+    return content, time.perf_counter() - start
+
+
+def encoding_executor(num_items: int, max_workers: int = None) -> Executor:
+    """
+    Executor for :func:`submit_encode`, a thread pool so uploads start while the other
+    simulations are encoded. There is no process pool: pickling a simulation to a worker costs
+    about as much as encoding it, 32 simulations of the test simulation scaled 10 times took
+    110 ms serially, 127 ms in threads and 124 ms in processes
+    (``benchmarks/bench_serialization.py``), and spawned workers fail in scripts without an
+    ``if __name__ == "__main__"`` guard.
+    Parameters
+    ----------
+    num_items: int
+        number of simulations to encode.
+    max_workers: int
+        maximum number of threads, the number of cpus if None.
+    """
+    return ThreadPoolExecutor(max(1, min(max_workers or os.cpu_count() or 1, num_items)))
+
+
+def submit_encode(executor: Executor, simulation: BaseModel) -> Future:
+    """
+    Encode a simulation with the current encoder in an executor of :func:`encoding_executor`.
+    Parameters
+    ----------
+    executor: Executor
+        executor to run the encoding.
+    simulation: :class:`.Simulation`
+        simulation to encode.
+    Returns
+    -------
+    Future
+        future of the json bytes and the seconds spent encoding.
+    """
+    return executor.submit(_encode_timed, get_json_encoder(), simulation)
+
+
+def encode_many(
+    simulations: Dict[str, BaseModel],
+    max_workers: int = None,
+) -> Iterator[Tuple[str, bytes]]:
+    """
+    Encode many simulations in parallel, see :func:`encoding_executor`.
+    Parameters
+    ----------
+    simulations: Dict[str, :class:`.Simulation`]
+        mapping of name to simulation.
+    max_workers: int
+        maximum number of threads, the number of cpus if None.
+    Returns
+    -------
+    Iterator[Tuple[str, bytes]]
+        ``(name, json bytes)`` as each simulation is encoded.
+    """
+    with encoding_executor(len(simulations), max_workers) as executor:
+        futures = {
+            submit_encode(executor, simulation): name for name, simulation in simulations.items()
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()[0]
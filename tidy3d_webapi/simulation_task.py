@@ -1,18 +1,27 @@
 """
 Tidy3d webapi types
 """
-import os.path
+import hashlib
+import json
 import tempfile
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Optional
+from enum import Enum
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
 
-from pydantic import Extra, Field, parse_obj_as
+from pydantic import Extra, Field, PrivateAttr, parse_obj_as
 from tidy3d import Simulation
 from tidy3d.version import __version__
 
-from tidy3d_webapi.cache import FOLDER_CACHE
+from tidy3d_webapi.cache import SIMULATIONS
+from tidy3d_webapi.environment import Env
+from tidy3d_webapi.folder_registry import folders
 from tidy3d_webapi.http_management import http
-from tidy3d_webapi.s3_utils import download_file, upload_file, upload_string
+from tidy3d_webapi.s3_utils import download_file, get_object, upload_file, upload_string
+from tidy3d_webapi.serialization import encode_simulation
+from tidy3d_webapi.solver_version import resolve_solver_version
 from tidy3d_webapi.tidy3d_types import (
     Queryable,
     ResourceLifecycle,
@@ -26,6 +35,55 @@ SIMULATION_HDF5 = "output/monitor_data.hdf5"
 RUNNING_INFO = "output/solver_progress.csv"
 LOG_FILE = "output/tidy3d.log"
 
+SUCCESS_STATES = ("success", "visualize")
+ERROR_STATES = ("error", "diverged", "deleted")
+FINAL_STATES = SUCCESS_STATES + ERROR_STATES
+
+MAX_CACHED_SIMULATIONS = 64
+
+_SIMULATIONS_LOCK = Lock()
+
+
+class TaskState(str, Enum):
+    """
+    Local lifecycle state of a :class:`SimulationTask`.
+    """
+
+    CREATED = "created"
+    UPLOADED = "uploaded"
+    SUBMITTED = "submitted"
+
+
+_TRANSITIONS = {
+    TaskState.CREATED: (TaskState.UPLOADED, TaskState.SUBMITTED),
+    TaskState.UPLOADED: (TaskState.UPLOADED, TaskState.SUBMITTED),
+    TaskState.SUBMITTED: (),
+}
+
+
+def _cached_simulation(task_id: str) -> Optional[Tuple[str, Simulation]]:
+    with _SIMULATIONS_LOCK:
+        key = (Env.current.name, task_id)
+        if key not in SIMULATIONS:
+            return None
+        SIMULATIONS.move_to_end(key)
+        return SIMULATIONS[key]
+
+
+def _cache_simulation(task_id: str, etag: str, simulation: Simulation):
+    with _SIMULATIONS_LOCK:
+        key = (Env.current.name, task_id)
+        SIMULATIONS[key] = (etag, simulation)
+        SIMULATIONS.move_to_end(key)
+        while len(SIMULATIONS) > MAX_CACHED_SIMULATIONS:
+            SIMULATIONS.popitem(last=False)
+
+
+def clear_simulation_cache():
+    """Drop the simulations downloaded by :meth:`SimulationTask.get_simulation`."""
+    with _SIMULATIONS_LOCK:
+        SIMULATIONS.clear()
+
 
 class Folder(Tidy3DResource, Queryable, extra=Extra.allow):
     """
@@ -89,11 +147,58 @@ class Folder(Tidy3DResource, Queryable, extra=Extra.allow):
         resp = http.post("tidy3d/projects", {"projectName": folder_name})
         return Folder(**resp) if resp else None
 
+    @classmethod
+    def get_or_create(cls, folder_name: str):
+        """
+        Get a folder from the registry of the current environment and account, or on a miss
+        create it, which returns the existing folder of the same name.
+        Parameters
+        ----------
+        folder_name : str
+            Get folder by name.
+        Returns
+        -------
+        folder : Folder
+        """
+        record = folders.get(folder_name)
+        if record:
+            return Folder(**record)
+        # one round trip, the server returns the existing folder of the same name
+        resp = http.post("tidy3d/projects", {"projectName": folder_name})
+        folder = Folder(**resp) if resp else None
+        if folder:
+            folders.put(
+                folder_name, {"projectId": folder.folder_id, "projectName": folder.folder_name}
+            )
+        return folder
+
     def delete(self):
         """
         Remove this folder
         """
         http.delete(f"tidy3d/projects/{self.folder_id}")
+        folders.forget(self.folder_name)
+
+    def list_task_records(self) -> List[dict]:
+        """
+        Raw records of every task in this folder, cheaper than :meth:`list_tasks` when only a few
+        of them are parsed.
+        Returns
+        -------
+        records : List[dict]
+            List of task records as returned by the server.
+        """
+        return http.get(f"tidy3d/projects/{self.folder_id}/tasks") or []
+
+    def list_task_statuses(self) -> Dict[str, Optional[str]]:
+        """
+        Status of every task in this folder, without parsing the full task records.
+        Returns
+        -------
+        statuses : Dict[str, str]
+            Mapping of task id to task status.
+        """
+        return {task["taskId"]: task.get("status") for task in self.list_task_records()}
 
     def list_tasks(self) -> [T]:
         """
@@ -142,6 +247,65 @@ class SimulationTask(ResourceLifecycle, Submittable, extra=Extra.allow):
         "``{'id', 'status', 'name', 'workUnit', 'solverVersion'}``.",
     )
 
+    _state: Optional[TaskState] = PrivateAttr(None)
+    _fingerprint: Optional[str] = PrivateAttr(None)
+    _uploaded_simulation: Optional[Simulation] = PrivateAttr(None)
+    _encoded: Optional[Tuple[Simulation, bytes]] = PrivateAttr(None)
+    _timings: Dict[str, float] = PrivateAttr(default_factory=dict)
+
+    @property
+    def state(self) -> TaskState:
+        """
+        Lifecycle state, derived from the server status for tasks fetched by :meth:`get`.
+        """
+        if self._state is None:
+            status = (self.status or "draft").lower()
+            return TaskState.CREATED if status == "draft" else TaskState.SUBMITTED
+        return self._state
+
+    @property
+    def fingerprint(self) -> Optional[str]:
+        """sha256 of the uploaded simulation, None if not uploaded by this instance."""
+        return self._fingerprint
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        """Seconds spent in each phase, e.g. ``serialize``, ``upload``, ``submit``."""
+        return dict(self._timings)
+
+    def encoded_simulation(self) -> bytes:
+        """
+        Json bytes of the simulation, encoded once per simulation instance until uploaded.
+        """
+        assert self.simulation
+        if self._encoded is None or self._encoded[0] is not self.simulation:
+            with self._timed("serialize"):
+                self._encoded = (self.simulation, encode_simulation(self.simulation))
+        return self._encoded[1]
+
+    def metadata_copy(self) -> "SimulationTask":
+        """
+        Copy of the task without its simulation, e.g. to keep it cached. The simulation is
+        downloaded again, or taken from the simulation cache, if needed.
+        """
+        task = self.copy(update={"simulation": None})
+        task._encoded = None  # pylint:disable=protected-access
+        task._uploaded_simulation = None  # pylint:disable=protected-access
+        return task
+
+    def _move_to(self, state: TaskState):
+        if state not in _TRANSITIONS[self.state]:
+            raise ValueError(
+                f"Task {self.task_id} is {self.state.value}, it can't be {state.value}."
+            )
+        self._state = state
+
+    @contextmanager
+    def _timed(self, phase: str):
+        start = time.perf_counter()
+        yield
+        self._timings[phase] = self._timings.get(phase, 0.0) + time.perf_counter() - start
+
     @classmethod
     def create(
         cls, simulation: Simulation, task_name: str, folder_name="default", call_back_url=None
@@ -166,18 +330,24 @@ class SimulationTask(ResourceLifecycle, Submittable, extra=Extra.allow):
         :class:`SimulationTask`
             :class:`SimulationTask` object containing info about status, size, credits of task and others.
         """
-        folder = FOLDER_CACHE.get(folder_name)
-        if not folder:
-            folder = Folder.get(folder_name)
-        if not folder:
-            folder = Folder.create(folder_name)
-        FOLDER_CACHE[folder_name] = folder
-
+        folder = Folder.get_or_create(folder_name)
+        start = time.perf_counter()
         resp = http.post(
             f"tidy3d/projects/{folder.folder_id}/tasks",
             {"task_name": task_name, "call_back_url": call_back_url},
         )
-        return SimulationTask(**resp, simulation=simulation, folder=folder)
+        if resp is None:
+            # the registered folder was deleted elsewhere
+            folders.forget(folder_name)
+            folder = Folder.get_or_create(folder_name)
+            resp = http.post(
+                f"tidy3d/projects/{folder.folder_id}/tasks",
+                {"task_name": task_name, "call_back_url": call_back_url},
+            )
+        task = SimulationTask(**resp, simulation=simulation, folder=folder)
+        task._state = TaskState.CREATED
+        task._timings["create"] = time.perf_counter() - start
+        return task
 
     @classmethod
     def get(cls, task_id: str) -> T:
@@ -207,7 +377,9 @@ class SimulationTask(ResourceLifecycle, Submittable, extra=Extra.allow):
 
     def get_simulation(self) -> Optional[Simulation]:
         """
-        Download simulation from server.
+        Download simulation from server, parsed from the response stream without a local file.
+        Downloaded simulations are cached by task id and ETag, the simulation of a submitted
+        task never changes and is returned from the cache without any request.
 
         Returns
         -------
@@ -217,12 +389,21 @@ class SimulationTask(ResourceLifecycle, Submittable, extra=Extra.allow):
         if self.simulation:
             return self.simulation
 
-        with tempfile.NamedTemporaryFile(suffix=".json") as temp:
-            self.get_simulation_json(temp.name)
-            if os.path.exists(temp.name):
-                self.simulation = Simulation.from_file(temp.name)
-                return self.simulation
-        return None
+        cached = _cached_simulation(self.task_id)
+        if cached and self.state == TaskState.SUBMITTED:
+            self.simulation = cached[1]
+            return self.simulation
+
+        obj = get_object(self.task_id, SIMULATION_JSON, if_none_match=cached[0] if cached else None)
+        if obj is None:
+            self.simulation = cached[1]
+            return self.simulation
+        try:
+            self.simulation = Simulation.parse_obj(json.load(obj["Body"]))
+        finally:
+            obj["Body"].close()
+        _cache_simulation(self.task_id, obj.get("ETag"), self.simulation)
+        return self.simulation
 
     def get_simulation_json(self, to_file: str):
         """
@@ -237,11 +418,42 @@ class SimulationTask(ResourceLifecycle, Submittable, extra=Extra.allow):
 
     def upload_simulation(self):
         """
-        Upload simulation object to Server.
+        Upload simulation object to Server. Nothing is uploaded if this simulation, or one with the
+        same content, is already uploaded.
         """
         assert self.task_id
         assert self.simulation
-        upload_string(self.task_id, self.simulation.json(), SIMULATION_JSON)
+        self._move_to(TaskState.UPLOADED)
+        if self._uploaded_simulation is self.simulation:
+            return
+        content = self.encoded_simulation()
+        fingerprint = hashlib.sha256(content).hexdigest()
+        if fingerprint != self._fingerprint:
+            with self._timed("upload"):
+                upload_string(self.task_id, content, SIMULATION_JSON)
+        self._fingerprint = fingerprint
+        self._uploaded_simulation = self.simulation
+        # the json is only needed until uploaded, cached tasks don't keep it
+        self._encoded = None
+
+    def upload_json(self, content: bytes, show_progress: bool = True):
+        """
+        Upload the json of a simulation encoded elsewhere, e.g. by a batch. Its fingerprint is
+        recorded like for :meth:`upload_simulation`, so identical simulations share their cost
+        estimate.
+        Parameters
+        ----------
+        content: bytes
+            json of the simulation.
+        show_progress: bool
+            show a progress bar, must be False when uploading concurrently.
+        """
+        assert self.task_id
+        self._move_to(TaskState.UPLOADED)
+        with self._timed("upload"):
+            upload_string(self.task_id, content, SIMULATION_JSON, show_progress)
+        self._fingerprint = hashlib.sha256(content).hexdigest()
+        self._uploaded_simulation = None
 
     def upload_file(self, local_file: str, remote_filename: str):
         """
@@ -254,33 +466,50 @@ class SimulationTask(ResourceLifecycle, Submittable, extra=Extra.allow):
             file name on the server
         """
         assert self.task_id
-
-        upload_file(self.task_id, local_file, remote_filename)
+        if remote_filename != SIMULATION_JSON:
+            upload_file(self.task_id, local_file, remote_filename)
+            return
+
+        self._move_to(TaskState.UPLOADED)
+        digest = hashlib.sha256()
+        with open(local_file, "rb") as data:
+            for chunk in iter(lambda: data.read(1024 * 1024), b""):
+                digest.update(chunk)
+        with self._timed("upload"):
+            upload_file(self.task_id, local_file, remote_filename)
+        self._fingerprint = digest.hexdigest()
+        self._uploaded_simulation = None
 
     def submit(self, solver_version=None, worker_group=None, protocol_version=__version__):
         """
-        Kick off this task. If this task instance contain a :class".simulation", it will be uploaded to server first,
-        then kick off the task. Otherwise, this method take assumption that the Simulation has been uploaded by the
-        upload_file function, so the task will be kicked off directly.
+        Kick off this task. If this task instance contain a :class".simulation" which is not uploaded yet, it will be
+        uploaded to server first, then kick off the task. Otherwise, this method take assumption that the Simulation
+        has been uploaded by :meth:`upload_simulation` or the upload_file function, so the task will be kicked off
+        directly. Raise ValueError if the task is already submitted.
         Parameters
         ----------
         solver_version: str
-            target solver version.
+            target solver version, resolved with :func:`resolve_solver_version`.
         worker_group: str
             worker group
         protocol_version: str
             protocol version
         """
-        if self.simulation:
-            upload_string(self.task_id, self.simulation.json(), SIMULATION_JSON)
-        http.post(
-            f"tidy3d/tasks/{self.task_id}/submit",
-            {
-                "solverVersion": solver_version,
-                "workerGroup": worker_group,
-                "protocolVersion": protocol_version,
-            },
-        )
+        if self.state == TaskState.SUBMITTED:
+            raise ValueError(f"Task {self.task_id} is already submitted.")
+        if self.simulation and self._uploaded_simulation is not self.simulation:
+            self.upload_simulation()
+        solver_version = resolve_solver_version(solver_version, protocol_version)
+        with self._timed("submit"):
+            http.post(
+                f"tidy3d/tasks/{self.task_id}/submit",
+                {
+                    "solverVersion": solver_version,
+                    "workerGroup": worker_group,
+                    "protocolVersion": protocol_version,
+                },
+            )
+        self._move_to(TaskState.SUBMITTED)
 
     def estimate_cost(self, solver_version=None, protocol_version=None) -> float:
         """Compute the maximum flex unit charge for a given task, assuming the simulation runs for
@@ -288,7 +517,7 @@ class SimulationTask(ResourceLifecycle, Submittable, extra=Extra.allow):
         Parameters
         ----------
         solver_version: str
-            target solver version.
+            target solver version, resolved with :func:`resolve_solver_version`.
         protocol_version: str
             protocol version
         Returns
@@ -297,6 +526,8 @@ class SimulationTask(ResourceLifecycle, Submittable, extra=Extra.allow):
             estimated cost in flex units
         """
         assert self.task_id
+        protocol_version = protocol_version or __version__
+        solver_version = resolve_solver_version(solver_version, protocol_version)
         resp = http.post(
             f"tidy3d/tasks/{self.task_id}/metadata",
             {
@@ -306,16 +537,18 @@ class SimulationTask(ResourceLifecycle, Submittable, extra=Extra.allow):
         )
         return resp
 
-    def get_simulation_hdf5(self, to_file: str):
+    def get_simulation_hdf5(self, to_file: str, show_progress=True):
         """
         Get hdf5 file from Server.
         Parameters
         ----------
         to_file: str
             save file to path.
+        show_progress: bool
+            show a progress bar, must be False when downloading concurrently.
         """
         assert self.task_id
-        download_file(self.task_id, SIMULATION_HDF5, to_file=to_file)
+        download_file(self.task_id, SIMULATION_HDF5, to_file=to_file, show_progress=show_progress)
 
     def get_running_info(self):
         """Gets the % done and field_decay for a running task.
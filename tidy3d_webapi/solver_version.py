@@ -0,0 +1,86 @@
+"""
+Solver version compatible with a protocol version, cached per environment.
+"""
+import os
+from os.path import expanduser
+from typing import Optional
+from urllib.parse import urlencode
+
+import requests
+from tidy3d.version import __version__
+
+from tidy3d_webapi.environment import Env
+from tidy3d_webapi.http_management import http
+from tidy3d_webapi.ttl_store import TtlStore
+
+SOLVER_VERSION_TTL = 3600.0
+SOLVER_VERSION_FILE = os.path.join(expanduser("~"), ".tidy3d", "solver_versions.json")
+
+
+class SolverVersionResolver(TtlStore):
+    """
+    Resolve the solver version of a protocol version with ``tidy3d/version/solver``, cached in
+    memory and optionally on disk, by environment, protocol version and requested solver version.
+
+    For example, to share the resolved versions between processes:
+        solver_versions.path = SOLVER_VERSION_FILE
+    """
+
+    def __init__(self, ttl: float = SOLVER_VERSION_TTL, path: str = None):
+        """
+        Parameters
+        ----------
+        ttl: float
+            seconds a resolved version is trusted, new solvers are deployed without notice.
+        path: str
+            json file the versions are persisted to, in memory only if None.
+        """
+        super().__init__(ttl, path)
+
+    def resolve(
+        self, solver_version: str = None, protocol_version: str = __version__
+    ) -> Optional[str]:
+        """
+        Get the solver version to run a simulation of a protocol version.
+        Parameters
+        ----------
+        solver_version: str
+            requested solver version, the server default if None.
+        protocol_version: str
+            protocol version of the simulation.
+        Returns
+        -------
+        str
+            the resolved solver version, ``solver_version`` if it can't be resolved.
+        """
+        key = f"{Env.current.name}:{protocol_version}:{solver_version or ''}"
+        resolved = self.get(key)
+        if resolved:
+            return resolved
+        params = {"protocolVersion": protocol_version}
+        if solver_version:
+            params["solverVersion"] = solver_version
+        try:
+            resp = http.get(f"tidy3d/version/solver?{urlencode(params)}")
+        except requests.RequestException:
+            return solver_version
+        resolved = (resp or {}).get("solverVersion")
+        if not resolved:
+            return solver_version
+        self.put(key, resolved)
+        # callers pass the resolved version on, e.g. Batch to SimulationTask.submit, which then
+        # finds it without a second request
+        self.put(f"{Env.current.name}:{protocol_version}:{resolved}", resolved)
+        return resolved
+
+
+solver_versions = SolverVersionResolver()
+
+
+def resolve_solver_version(
+    solver_version: str = None, protocol_version: str = __version__
+) -> Optional[str]:
+    """
+    Resolve a solver version with the shared resolver, see :meth:`SolverVersionResolver.resolve`.
+    """
+    return solver_versions.resolve(solver_version, protocol_version)
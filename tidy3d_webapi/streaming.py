@@ -0,0 +1,137 @@
+"""
+Stream the results of many tasks in completion order.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import AsyncIterator, Iterable, Iterator, Optional, Tuple, Union
+
+from tidy3d import SimulationData
+
+from tidy3d_webapi.concurrency import DEFAULT_MAX_WORKERS
+from tidy3d_webapi.polling import StatusPoller
+from tidy3d_webapi.simulation_task import FINAL_STATES, SUCCESS_STATES
+from tidy3d_webapi.task_handle import TaskHandle, get_handle
+
+_DONE = object()
+
+
+def _download_and_load(task_id: str, path: str) -> SimulationData:
+    get_handle(task_id).task.get_simulation_hdf5(path, show_progress=False)
+    return SimulationData.from_file(path)
+
+
+# pylint:disable=too-many-arguments,too-many-locals,too-many-branches
+def as_completed(
+    task_ids: Iterable[Union[str, TaskHandle]],
+    path_dir: str = ".",
+    max_in_flight: int = 4,
+    free_data: bool = False,
+    poll_interval: float = 5.0,
+    timeout: float = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> Iterator[Tuple[str, Optional[SimulationData]]]:
+    """
+    Yield the results of tasks as they finish, whatever the order of ``task_ids``. Results of
+    finished tasks are downloaded and loaded in the background, at most ``max_in_flight`` of them
+    are downloading or waiting to be consumed.
+    Parameters
+    ----------
+    task_ids: Iterable[Union[str, TaskHandle]]
+        tasks to wait for.
+    path_dir: str
+        directory of the downloaded ``{task_id}.hdf5`` files.
+    max_in_flight: int
+        maximum number of results downloaded ahead of the consumer.
+    free_data: bool
+        delete the downloaded file and drop the data once the consumer asks for the next result.
+    poll_interval: float
+        seconds between status checks.
+    timeout: float
+        maximum seconds to wait, wait forever if None.
+    max_workers: int
+        maximum number of concurrent status requests.
+    Returns
+    -------
+    Iterator[Tuple[str, SimulationData]]
+        ``(task_id, data)``, data is None if the task or its download failed.
+    """
+    os.makedirs(path_dir, exist_ok=True)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    poller = StatusPoller(max_workers=max_workers)
+    pending = {get_handle(task_id).task_id for task_id in task_ids}
+    finished = deque()
+    loading = {}
+    next_poll = time.monotonic()
+    with ThreadPoolExecutor(max_in_flight) as pool:
+        try:
+            while pending or finished or loading:
+                if pending and time.monotonic() >= next_poll:
+                    next_poll = time.monotonic() + poll_interval
+                    for task_id, status in poller.poll(pending).items():
+                        if status in SUCCESS_STATES:
+                            pending.discard(task_id)
+                            finished.append(task_id)
+                        elif status is None or status in FINAL_STATES:
+                            pending.discard(task_id)
+                            print(f"Task {task_id} failed, status is {status}.")
+                            yield task_id, None
+
+                while finished and len(loading) < max_in_flight:
+                    task_id = finished.popleft()
+                    path = os.path.join(path_dir, f"{task_id}.hdf5")
+                    loading[pool.submit(_download_and_load, task_id, path)] = (task_id, path)
+
+                if deadline is not None and time.monotonic() >= deadline and pending:
+                    raise TimeoutError(
+                        f"{len(pending)} tasks are not finished after {timeout} seconds."
+                    )
+                wait_for = max(0.0, next_poll - time.monotonic()) if pending else None
+                if deadline is not None and wait_for is not None:
+                    wait_for = min(wait_for, max(0.0, deadline - time.monotonic()))
+                if not loading:
+                    time.sleep(wait_for or 0.0)
+                    continue
+                done = list(wait(loading, timeout=wait_for, return_when=FIRST_COMPLETED)[0])
+                while done:
+                    future = done.pop()
+                    task_id, path = loading.pop(future)
+                    error = future.exception()
+                    data = None if error else future.result()
+                    # the future would keep the data alive after the consumer moved on
+                    del future
+                    if error:
+                        print(f"Failed to load the results of task {task_id}: {error}")
+                    yield task_id, data
+                    if free_data:
+                        del data
+                        if os.path.exists(path):
+                            os.remove(path)
+        finally:
+            # the consumer stopped early, don't start the downloads which are not running yet
+            for future in loading:
+                future.cancel()
+
+
+async def as_completed_async(
+    task_ids: Iterable[Union[str, TaskHandle]], **kwargs
+) -> AsyncIterator[Tuple[str, Optional[SimulationData]]]:
+    """
+    Asynchronous :func:`as_completed`, the waits and downloads don't block the event loop.
+
+    For example:
+        async for task_id, sim_data in as_completed_async(task_ids, max_in_flight=2):
+            ...
+    """
+    loop = asyncio.get_running_loop()
+    results = as_completed(task_ids, **kwargs)
+    try:
+        while True:
+            result = await loop.run_in_executor(None, next, results, _DONE)
+            if result is _DONE:
+                return
+            yield result
+    finally:
+        results.close()
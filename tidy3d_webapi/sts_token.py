@@ -3,14 +3,21 @@ STS token management
 """
 import urllib
 from datetime import datetime
+from threading import Lock
 
 import boto3
 from pydantic import BaseModel, Field
 
-from tidy3d_webapi.cache import S3_STS_TOKENS
+from tidy3d_webapi.cache import S3_CLIENTS, S3_STS_TOKENS
 from tidy3d_webapi.environment import Env
 from tidy3d_webapi.http_management import http
 
+MAX_S3_CLIENTS = 16
+
+# the boto3 session is not thread safe, clients are created under the lock, then used concurrently
+_CLIENTS_LOCK = Lock()
+_SESSION = {"session": None}
+
 
 class _UserCredential(BaseModel):
     access_key_id: str = Field(alias="accessKeyId")
@@ -37,16 +44,33 @@ class _S3STSToken(BaseModel):
 
     def get_client(self) -> boto3.client:
         """
-        @return: boto3 client
-
+        @return: boto3 client, shared by the tokens with the same credentials until they are
+        refreshed
         """
-        return boto3.client(
-            "s3",
-            region_name=Env.current.aws_region,
-            aws_access_key_id=self.user_credential.access_key_id,
-            aws_secret_access_key=self.user_credential.secret_access_key,
-            aws_session_token=self.user_credential.session_token,
+        credential = self.user_credential
+        key = (
+            Env.current.aws_region,
+            credential.access_key_id,
+            credential.session_token,
+            credential.expiration,
         )
+        with _CLIENTS_LOCK:
+            if key in S3_CLIENTS:
+                S3_CLIENTS.move_to_end(key)
+                return S3_CLIENTS[key]
+            if _SESSION["session"] is None:
+                _SESSION["session"] = boto3.session.Session()
+            client = _SESSION["session"].client(
+                "s3",
+                region_name=Env.current.aws_region,
+                aws_access_key_id=credential.access_key_id,
+                aws_secret_access_key=credential.secret_access_key,
+                aws_session_token=credential.session_token,
+            )
+            S3_CLIENTS[key] = client
+            while len(S3_CLIENTS) > MAX_S3_CLIENTS:
+                S3_CLIENTS.popitem(last=False)
+            return client
 
     def is_expired(self) -> bool:
         """
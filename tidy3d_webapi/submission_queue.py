@@ -0,0 +1,233 @@
+"""
+Priority submission queues with weighted fair sharing and worker group routing.
+"""
+import heapq
+import itertools
+import time
+from threading import Condition, Thread
+from typing import Dict, List, Optional, Tuple, Union
+
+from pydantic import BaseModel, Field
+
+from tidy3d_webapi.simulation_task import SimulationTask
+from tidy3d_webapi.solver_version import resolve_solver_version
+from tidy3d_webapi.task_handle import TaskHandle, get_handle
+
+
+class QueueStats(BaseModel):
+    """
+    Submissions and wait times of a queue.
+    """
+
+    submitted: int = Field(0, title="submitted", description="Number of submitted tasks.")
+    failed: int = Field(0, title="failed", description="Number of failed submissions.")
+    total_wait: float = Field(0.0, title="total wait", description="Seconds waited by all tasks.")
+    max_wait: float = Field(0.0, title="max wait", description="Longest wait in seconds.")
+
+    @property
+    def mean_wait(self) -> float:
+        """Mean seconds between queueing and submission."""
+        count = self.submitted + self.failed
+        return self.total_wait / count if count else 0.0
+
+
+class _Queue:  # pylint:disable=too-few-public-methods
+    """A named queue, its heap of ``(-priority, order, enqueued at, task)`` and its pass value."""
+
+    def __init__(self, name: str, weight: float, worker_group: Optional[str]):
+        self.name = name
+        self.weight = weight
+        self.worker_group = worker_group
+        self.heap: List[Tuple[int, int, float, SimulationTask]] = []
+        self.pass_value = 0.0
+        self.stats = QueueStats()
+
+
+# pylint:disable=too-many-instance-attributes
+class SubmissionQueue:
+    """
+    Submit tasks from named queues, each routed to its worker group. Queues share the submission
+    workers in proportion to their weight (stride scheduling), tasks of a queue are submitted by
+    decreasing priority, then in order.
+
+    For example:
+        with SubmissionQueue(max_workers=4) as queue:
+            queue.add_queue("interactive", weight=10, worker_group="interactive")
+            queue.add_queue("sweep", weight=1)
+            for task_id in sweep_task_ids:
+                queue.put(task_id, "sweep")
+            queue.put(urgent_task_id, "interactive", priority=1)
+        print(queue.summary())
+    """
+
+    def __init__(self, max_workers: int = 4, solver_version: str = None):
+        """
+        Parameters
+        ----------
+        max_workers: int
+            number of concurrent submissions.
+        solver_version: str
+            solver version of the submissions.
+        """
+        self.max_workers = max_workers
+        self.solver_version = solver_version
+        self.errors: Dict[str, str] = {}
+        self._queues: Dict[str, _Queue] = {}
+        self._order = itertools.count()
+        self._condition = Condition()
+        self._virtual_time = 0.0
+        self._active = 0
+        self._stopped = False
+        self._threads: List[Thread] = []
+        self.add_queue("default")
+
+    def add_queue(self, name: str, weight: float = 1.0, worker_group: str = None):
+        """
+        Add or reconfigure a queue.
+        Parameters
+        ----------
+        name: str
+            queue name.
+        weight: float
+            share of the submissions when other queues are busy.
+        worker_group: str
+            worker group the tasks of this queue are submitted to.
+        """
+        if weight <= 0:
+            raise ValueError(f"The weight of queue {name} must be positive, got {weight}.")
+        with self._condition:
+            queue = self._queues.get(name)
+            if queue is None:
+                self._queues[name] = _Queue(name, weight, worker_group)
+            else:
+                queue.weight = weight
+                queue.worker_group = worker_group
+
+    def put(
+        self,
+        task: Union[str, TaskHandle, SimulationTask],
+        queue: str = "default",
+        priority: int = 0,
+    ):
+        """
+        Queue a task whose simulation is uploaded, or attached to the task.
+        Parameters
+        ----------
+        task: Union[str, TaskHandle, SimulationTask]
+            task id, handle or task.
+        queue: str
+            queue name.
+        priority: int
+            tasks with higher priority are submitted first within the queue.
+        """
+        handle = get_handle(task)
+        task = handle.peek() or SimulationTask.construct(task_id=handle.task_id)
+        with self._condition:
+            if queue not in self._queues:
+                raise ValueError(f"Unknown queue {queue}, add it with add_queue.")
+            target = self._queues[queue]
+            if not target.heap:
+                # an idle queue doesn't accumulate credit while others are served
+                target.pass_value = max(target.pass_value, self._virtual_time)
+            heapq.heappush(target.heap, (-priority, next(self._order), time.monotonic(), task))
+            self._condition.notify()
+
+    def _next(self) -> Tuple[_Queue, float, SimulationTask]:
+        queue = min(
+            (queue for queue in self._queues.values() if queue.heap),
+            key=lambda queue: (queue.pass_value, -queue.weight),
+        )
+        _, _, enqueued_at, task = heapq.heappop(queue.heap)
+        self._virtual_time = queue.pass_value
+        queue.pass_value += 1.0 / queue.weight
+        return queue, enqueued_at, task
+
+    def _pending(self) -> bool:
+        return any(queue.heap for queue in self._queues.values())
+
+    def _work(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._stopped or self._pending())
+                if self._stopped:
+                    return
+                queue, enqueued_at, task = self._next()
+                self._active += 1
+            wait = time.monotonic() - enqueued_at
+            error = None
+            try:
+                task.submit(solver_version=self.solver_version, worker_group=queue.worker_group)
+                get_handle(task.task_id).invalidate()
+            except Exception as err:  # pylint:disable=broad-except
+                error = str(err)
+            with self._condition:
+                self._active -= 1
+                queue.stats.total_wait += wait
+                queue.stats.max_wait = max(queue.stats.max_wait, wait)
+                if error is None:
+                    queue.stats.submitted += 1
+                else:
+                    queue.stats.failed += 1
+                    self.errors[task.task_id] = error
+                self._condition.notify_all()
+
+    def start(self):
+        """Start the submission workers."""
+        with self._condition:
+            self._stopped = False
+            self.solver_version = resolve_solver_version(self.solver_version)
+        while len(self._threads) < self.max_workers:
+            thread = Thread(target=self._work, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def join(self, timeout: float = None) -> bool:
+        """
+        Wait until every queued task is submitted.
+        Parameters
+        ----------
+        timeout: float
+            maximum seconds to wait, wait forever if None.
+        Returns
+        -------
+        bool
+            False on timeout.
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._pending() and not self._active, timeout
+            )
+
+    def stop(self):
+        """Stop the workers once their current submission is done, queued tasks are kept."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.join()
+        self.stop()
+
+    @property
+    def stats(self) -> Dict[str, QueueStats]:
+        """Statistics of each queue."""
+        with self._condition:
+            return {name: queue.stats.copy() for name, queue in self._queues.items()}
+
+    def summary(self) -> str:
+        """
+        One line per queue with its submissions and wait times.
+        """
+        return "\n".join(
+            f"{name:>12}: {stats.submitted:>5} submitted, {stats.failed:>3} failed, "
+            f"{stats.mean_wait:8.2f} s mean wait, {stats.max_wait:8.2f} s max wait"
+            for name, stats in self.stats.items()
+        )
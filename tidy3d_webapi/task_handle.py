@@ -0,0 +1,186 @@
+"""
+Memoized task handles, so a sequence of calls on one task fetches its detail only when needed.
+"""
+import time
+from itertools import islice
+from threading import Lock
+from typing import Optional, Union
+
+from tidy3d_webapi.cache import TASK_HANDLES
+from tidy3d_webapi.environment import Env
+from tidy3d_webapi.simulation_task import FINAL_STATES, SimulationTask, TaskState
+
+MAX_TASK_HANDLES = 1024
+# only the most recently used handles keep the simulation of their task, the others keep its
+# metadata so a large sweep doesn't hold every simulation
+MAX_HANDLE_SIMULATIONS = 32
+
+# seconds a status is trusted, finished tasks never change. A draft only changes when it is
+# submitted, which invalidates the status of the handle.
+STATUS_TTL = {
+    "draft": 300.0,
+    "queued": 5.0,
+    "preprocess": 2.0,
+    "running": 2.0,
+    "postprocess": 2.0,
+}
+DEFAULT_STATUS_TTL = 2.0
+
+_HANDLES_LOCK = Lock()
+
+
+class TaskHandle:
+    """
+    A :class:`SimulationTask` fetched once and reused. Fields that never change (id, name, creation
+    time, folder) are cached forever, the status is refreshed when it is older than its TTL.
+    """
+
+    def __init__(self, task_id: str, task: SimulationTask = None):
+        """
+        Parameters
+        ----------
+        task_id: str
+            task id.
+        task: SimulationTask
+            an already fetched or created task, fetched lazily if None.
+        """
+        self.task_id = task_id
+        self._task = task
+        self._fetched_at = time.monotonic() if task else None
+        self._lock = Lock()
+
+    def __repr__(self):
+        return f"TaskHandle({self.task_id!r})"
+
+    def _fetch(self) -> SimulationTask:
+        task = SimulationTask.get(self.task_id)
+        if not task:
+            raise ValueError(f"Task {self.task_id} not found.")
+        if self._task is None:
+            self._task = task
+        else:
+            # keep the identity and local state, e.g. the simulation, of the cached task
+            for name, value in task.__dict__.items():
+                if value is not None:
+                    setattr(self._task, name, value)
+        self._fetched_at = time.monotonic()
+        return self._task
+
+    @property
+    def task(self) -> SimulationTask:
+        """The cached task, without refreshing its status."""
+        with self._lock:
+            return self._task if self._task is not None else self._fetch()
+
+    def peek(self) -> Optional[SimulationTask]:
+        """The cached task, None if not fetched yet."""
+        return self._task
+
+    def is_stale(self) -> bool:
+        """Whether the cached status may be out of date."""
+        if self._task is None or self._fetched_at is None:
+            return True
+        status = (self._task.status or "").lower()
+        if status in FINAL_STATES:
+            return False
+        ttl = STATUS_TTL.get(status, DEFAULT_STATUS_TTL)
+        return time.monotonic() - self._fetched_at > ttl
+
+    def refresh(self, force: bool = False) -> SimulationTask:
+        """
+        Get the task with an up to date status.
+        Parameters
+        ----------
+        force: bool
+            fetch the detail even if the cached status is still fresh.
+        """
+        with self._lock:
+            if force or self.is_stale():
+                return self._fetch()
+            return self._task
+
+    @property
+    def status(self) -> Optional[str]:
+        """Up to date lower case status."""
+        status = self.refresh().status
+        return status.lower() if status else None
+
+    def attach(self, task: SimulationTask):
+        """
+        Cache a task fetched or created elsewhere, if none is cached yet.
+        Parameters
+        ----------
+        task: SimulationTask
+            the task of this handle.
+        """
+        with self._lock:
+            if self._task is None:
+                self._task = task
+                self._fetched_at = time.monotonic()
+
+    def release_simulation(self):
+        """
+        Keep only the metadata of the cached task once its simulation is uploaded. The task given
+        to :meth:`attach` is replaced by a copy, so it is not changed.
+        """
+        with self._lock:
+            task = self._task
+            if task is None or task.simulation is None or task.state == TaskState.CREATED:
+                return
+            self._task = task.metadata_copy()
+
+    def invalidate(self):
+        """Mark the status as stale, e.g. after the task is submitted."""
+        with self._lock:
+            self._fetched_at = None
+
+
+def _key(task_id: str):
+    return Env.current.name, task_id
+
+
+def get_handle(task: Union[str, TaskHandle, SimulationTask]) -> TaskHandle:
+    """
+    Get the shared handle of a task.
+    Parameters
+    ----------
+    task: Union[str, TaskHandle, SimulationTask]
+        task id, handle, or a task to cache in the handle.
+    """
+    if isinstance(task, TaskHandle):
+        return task
+    task_id = task.task_id if isinstance(task, SimulationTask) else task
+    with _HANDLES_LOCK:
+        key = _key(task_id)
+        handle = TASK_HANDLES.get(key)
+        if handle is None:
+            handle = TaskHandle(task_id)
+            TASK_HANDLES[key] = handle
+        TASK_HANDLES.move_to_end(key)
+        while len(TASK_HANDLES) > MAX_TASK_HANDLES:
+            TASK_HANDLES.popitem(last=False)
+        # at most one handle leaves the most recently used ones per call
+        released = next(islice(reversed(TASK_HANDLES.values()), MAX_HANDLE_SIMULATIONS, None), None)
+    if released is not None:
+        released.release_simulation()
+    if isinstance(task, SimulationTask):
+        handle.attach(task)
+    return handle
+
+
+def forget_handle(task_id: str):
+    """
+    Drop the handle of a task, e.g. after it is deleted.
+    Parameters
+    ----------
+    task_id: str
+        task id.
+    """
+    with _HANDLES_LOCK:
+        TASK_HANDLES.pop(_key(task_id), None)
+
+
+def clear_handles():
+    """Drop all handles."""
+    with _HANDLES_LOCK:
+        TASK_HANDLES.clear()
@@ -0,0 +1,109 @@
+"""
+Key value store with expiry, optionally persisted to a json file shared by processes.
+"""
+import json
+import os
+import tempfile
+import time
+from threading import Lock
+from typing import Any, Dict
+
+
+class TtlStore:
+    """
+    Mapping of string keys to json values, each trusted for ``ttl`` seconds.
+    """
+
+    def __init__(self, ttl: float, path: str = None):
+        """
+        Parameters
+        ----------
+        ttl: float
+            seconds a value is trusted.
+        path: str
+            json file the values are persisted to, in memory only if None.
+        """
+        self.ttl = ttl
+        self.path = path
+        self._entries: Dict[str, dict] = {}
+        self._lock = Lock()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                entries = json.load(file)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, entry in entries.items():
+            known = self._entries.get(key)
+            # the fresher entry wins, e.g. written by another process after ours expired
+            if entry["expires_at"] > now and (
+                known is None or known["expires_at"] < entry["expires_at"]
+            ):
+                self._entries[key] = entry
+
+    def _save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # atomic replace, other processes never read a partial file
+        with tempfile.NamedTemporaryFile(
+            "w", dir=os.path.dirname(self.path) or ".", delete=False, encoding="utf-8"
+        ) as file:
+            json.dump(self._entries, file)
+        os.replace(file.name, self.path)
+
+    def get(self, key: str) -> Any:
+        """
+        Get an unexpired value, None if missing.
+        Parameters
+        ----------
+        key: str
+            key.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["expires_at"] <= time.time():
+                self._load()
+                entry = self._entries.get(key)
+            if entry is None or entry["expires_at"] <= time.time():
+                self._entries.pop(key, None)
+                return None
+            return entry["value"]
+
+    def put(self, key: str, value: Any):
+        """
+        Store a value.
+        Parameters
+        ----------
+        key: str
+            key.
+        value: Any
+            json serializable value.
+        """
+        with self._lock:
+            self._load()
+            self._entries[key] = {"value": value, "expires_at": time.time() + self.ttl}
+            self._save()
+
+    def forget(self, key: str):
+        """
+        Drop a value.
+        Parameters
+        ----------
+        key: str
+            key.
+        """
+        with self._lock:
+            self._load()
+            if self._entries.pop(key, None) is not None:
+                self._save()
+
+    def clear(self):
+        """Drop all values, including the persisted ones."""
+        with self._lock:
+            self._entries.clear()
+            self._save()
@@ -1,15 +1,36 @@
 """Provides lowest level, user-facing interface to server."""
 
+import heapq
 import os
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
 
 import pytz
+import requests
+from botocore.exceptions import ClientError
+from pydantic.datetime_parse import parse_datetime
 from tidy3d import Simulation, SimulationData
 from tidy3d.web.task import TaskId, TaskInfo
 from typing_extensions import Literal
 
 from tidy3d_webapi import Folder, SimulationTask
+from tidy3d_webapi.bulk_delete import delete_tasks
+from tidy3d_webapi.concurrency import DEFAULT_MAX_WORKERS, bounded_map
+from tidy3d_webapi.cost import CostSummary, estimate_costs
+from tidy3d_webapi.mirror import current_mirror
+from tidy3d_webapi.polling import PollingPolicy, StatusPoller
+from tidy3d_webapi.progress import (
+    DEFAULT_SHUTOFF,
+    ProgressHistory,
+    get_progress_history,
+)
+from tidy3d_webapi.simulation_task import FINAL_STATES
+from tidy3d_webapi.task_handle import TaskHandle, forget_handle, get_handle
+
+TaskRef = Union[TaskId, TaskHandle]
+
+_NO_DATE = datetime.min.replace(tzinfo=pytz.utc)
 
 
 def upload(  # pylint:disable=too-many-locals,too-many-arguments
@@ -40,35 +61,56 @@ def upload(  # pylint:disable=too-many-locals,too-many-arguments
     """
     task = SimulationTask.create(simulation, task_name, folder_name, callback_url)
     task.upload_simulation()
+    get_handle(task)
     return task.task_id
 
 
-def get_info(task_id: TaskId) -> TaskInfo:
+def _task_info(task: SimulationTask) -> TaskInfo:
+    return TaskInfo(**{"taskId": task.task_id, **task.dict(exclude={"simulation", "folder"})})
+
+
+def get_info(task_id: TaskRef) -> TaskInfo:
     """Return information about a task.
 
     Parameters
     ----------
-    task_id : str
+    task_id : Union[str, :class:`TaskHandle`]
         Unique identifier of task on server.  Returned by :meth:`upload`.
 
     Returns
     -------
     :class:`TaskInfo`
         Object containing information about status, size, credits of task.
-    """
-    task = SimulationTask.get(task_id)
-    if not task:
-        raise ValueError("Task not found.")
-    return TaskInfo(**{"taskId": task.task_id, **task.dict()})
 
-
-def start(task_id: TaskId) -> None:
+    Note
+    ----
+    With a mirror enabled by :func:`tidy3d_webapi.mirror.use_mirror`, finished tasks are read from
+    the mirror, other tasks are fetched and written to it, or read from it when offline.
+    """
+    handle = get_handle(task_id)
+    mirror = current_mirror()
+    if mirror is None:
+        return _task_info(handle.refresh())
+    record = mirror.get(handle.task_id)
+    if record and (record.get("status") or "").lower() in FINAL_STATES:
+        return _task_info(SimulationTask(**record))
+    try:
+        task = handle.refresh()
+    except requests.ConnectionError:
+        if record is None:
+            raise
+        return _task_info(SimulationTask(**record))
+    mirror.put(task.dict(by_alias=True, exclude={"simulation", "folder"}))
+    return _task_info(task)
+
+
+def start(task_id: TaskRef) -> None:
     """Start running the simulation associated with task.
 
     Parameters
     ----------
 
-    task_id : str
+    task_id : Union[str, :class:`TaskHandle`]
         Unique identifier of task on server.  Returned by :meth:`upload`.
     solver_version : str
         Supply or override a specific solver version to the task.
@@ -76,18 +118,17 @@ def start(task_id: TaskId) -> None:
     ----
     To monitor progress, can call :meth:`monitor` after starting simulation.
     """
-    task = SimulationTask.get(task_id)
-    if not task:
-        raise ValueError("Task not found.")
-    task.submit()
+    handle = get_handle(task_id)
+    handle.task.submit()
+    handle.invalidate()
 
 
-def get_run_info(task_id: TaskId):
+def get_run_info(task_id: TaskRef):
     """Gets the % done and field_decay for a running task.
 
     Parameters
     ----------
-    task_id : str
+    task_id : Union[str, :class:`TaskHandle`]
         Unique identifier of task on server.  Returned by :meth:`upload`.
 
     Returns
@@ -99,31 +140,162 @@ def get_run_info(task_id: TaskId):
         Average field intensity normlized to max value (1.0).
         Is ``None`` if run info not available.
     """
-    task = SimulationTask.get(task_id)
-    if not task:
-        raise ValueError("Task not found.")
-    return task.get_running_info()
+    return get_handle(task_id).task.get_running_info()
 
 
-def download(task_id: TaskId, path: str = "simulation_data.hdf5") -> None:
+def get_run_history(task_id: TaskRef) -> ProgressHistory:
+    """Gets the progress history of a running task, only the rows written since the previous
+    call are downloaded.
+
+    Parameters
+    ----------
+    task_id : Union[str, :class:`TaskHandle`]
+        Unique identifier of task on server.  Returned by :meth:`upload`.
+
+    Returns
+    -------
+    :class:`ProgressHistory`
+        Percentage done and field decay arrays of the task, and the forecast of its end with
+        :meth:`ProgressHistory.forecast`.
+    """
+    history = get_progress_history(get_handle(task_id).task_id)
+    history.update()
+    return history
+
+
+def monitor(
+    task_id: TaskRef, timeout: float = None, policy: PollingPolicy = None, verbose: bool = True
+) -> str:
+    """Wait until a task is finished, polling less often when the task is not expected to change.
+
+    Parameters
+    ----------
+    task_id : Union[str, :class:`TaskHandle`]
+        Unique identifier of task on server.  Returned by :meth:`upload`.
+    timeout : float = None
+        Maximum seconds to wait, wait forever if ``None``.
+    policy : :class:`PollingPolicy` = None
+        Polling intervals, the default policy if ``None``.
+    verbose : bool = True
+        Print status changes and progress.
+
+    Returns
+    -------
+    str
+        The final status of the task.
+    """
+    policy = policy or PollingPolicy()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    handle = get_handle(task_id)
+    history = get_progress_history(handle.task_id)
+    status, interval = None, None
+    while True:
+        task = handle.refresh(force=status is not None)
+        new_status = (task.status or "").lower()
+        changed = new_status != status
+        status = new_status
+        if changed and verbose:
+            print(f"status = {status}")
+        if status in FINAL_STATES:
+            return status
+
+        eta = None
+        if status == "running":
+            try:
+                added = history.update()
+            except ClientError:
+                added = 0
+            forecast = history.forecast(getattr(task.simulation, "shutoff", DEFAULT_SHUTOFF))
+            if forecast is not None:
+                eta = forecast.eta
+                if verbose and added:
+                    print(
+                        f"{forecast.perc_done:.1f}% done, "
+                        f"field decay = {forecast.field_decay:.2e}"
+                    )
+        interval = policy.next_interval(status, interval, changed, eta)
+        if deadline is not None and time.monotonic() + interval > deadline:
+            raise TimeoutError(f"Task {handle.task_id} is still {status} after {timeout} seconds.")
+        time.sleep(interval)
+
+
+def monitor_many(
+    task_ids: Iterable[TaskId],
+    timeout: float = None,
+    policy: PollingPolicy = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    verbose: bool = True,
+) -> Dict[TaskId, Optional[str]]:
+    """Wait until all tasks are finished, checking many tasks per request where possible.
+
+    Parameters
+    ----------
+    task_ids : Iterable[str]
+        Unique identifiers of tasks on server.
+    timeout : float = None
+        Maximum seconds to wait, wait forever if ``None``.
+    policy : :class:`PollingPolicy` = None
+        Polling intervals, the default policy if ``None``.
+    max_workers : int
+        Maximum number of concurrent status requests.
+    verbose : bool = True
+        Print the number of tasks in each status when it changes.
+
+    Returns
+    -------
+    Dict[str, str]
+        Mapping of task id to its final status, ``None`` if the task was not found.
+    """
+    policy = policy or PollingPolicy()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    poller = StatusPoller(max_workers=max_workers)
+    pending = set(task_ids)
+    statuses = {}
+    interval = None
+    while True:
+        new_statuses = poller.poll(pending)
+        changed = any(statuses.get(task_id) != status for task_id, status in new_statuses.items())
+        statuses.update(new_statuses)
+        pending = {
+            task_id
+            for task_id, status in new_statuses.items()
+            if status is not None and status not in FINAL_STATES
+        }
+        if changed and verbose:
+            counts = {}
+            for status in statuses.values():
+                counts[status] = counts.get(status, 0) + 1
+            print(
+                ", ".join(f"{status}: {count}" for status, count in sorted(counts.items(), key=str))
+            )
+        if not pending:
+            return statuses
+
+        # wake up for the most urgent of the pending states
+        interval = min(
+            policy.next_interval(statuses[task_id], interval, changed) for task_id in pending
+        )
+        if deadline is not None and time.monotonic() + interval > deadline:
+            raise TimeoutError(f"{len(pending)} tasks are not finished after {timeout} seconds.")
+        time.sleep(interval)
+
+
+def download(task_id: TaskRef, path: str = "simulation_data.hdf5") -> None:
     """Download results of task and log to file.
 
     Parameters
     ----------
-    task_id : str
+    task_id : Union[str, :class:`TaskHandle`]
         Unique identifier of task on server.  Returned by :meth:`upload`.
     path : str = "simulation_data.hdf5"
         Download path to .hdf5 data file (including filename).
 
     """
-    task = SimulationTask.get(task_id)
-    if not task:
-        raise ValueError(f"Task {task_id} not found.")
-    task.get_simulation_hdf5(path)
+    get_handle(task_id).task.get_simulation_hdf5(path)
 
 
 def load(
-    task_id: TaskId,
+    task_id: TaskRef,
     path: str = "simulation_data.hdf5",
     replace_existing: bool = True,
 ) -> SimulationData:
@@ -131,7 +303,7 @@ def load(
 
     Parameters
     ----------
-    task_id : str
+    task_id : Union[str, :class:`TaskHandle`]
         Unique identifier of task on server.  Returned by :meth:`upload`.
     path : str, optional
         Path to save simulation data to.  Defaults to "simulation_data.hdf5".
@@ -144,8 +316,9 @@ def load(
     SimulationData
         Object containing simulation data.
     """
-    task = SimulationTask.get(task_id)
-    if not task:
+    try:
+        task = get_handle(task_id).task
+    except ValueError:
         return None
     if not os.path.exists(path) or replace_existing:
         task.get_simulation_hdf5(path)
@@ -162,12 +335,12 @@ def load(
     return sim_data
 
 
-def delete(task_id: TaskId) -> TaskInfo:
+def delete(task_id: TaskRef) -> TaskInfo:
     """Delete server-side data associated with task.
 
     Parameters
     ----------
-    task_id : str
+    task_id : Union[str, :class:`TaskHandle`]
         Unique identifier of task on server.  Returned by :meth:`upload`.
 
     Returns
@@ -176,67 +349,91 @@ def delete(task_id: TaskId) -> TaskInfo:
         Object containing information about status, size, credits of task.
     """
 
-    task = SimulationTask.get(task_id)
+    task = get_handle(task_id).task
     task.delete()
-    return TaskInfo(**{"taskId": task.task_id, **task.dict()})
+    forget_handle(task.task_id)
+    mirror = current_mirror()
+    if mirror is not None:
+        mirror.forget([task.task_id])
+    return _task_info(task)
 
 
-def estimate_cost(task_id: str) -> float:
+def estimate_cost(task_id: TaskRef) -> float:
     """
     Estimate cost of a task.
-    :param task_id:
+    :param task_id: task id or :class:`TaskHandle`
     :return:
     """
-    task = SimulationTask.get(task_id)
-    if not task:
-        raise ValueError("Task not found.")
-    resp = task.estimate_cost()
+    resp = get_handle(task_id).task.estimate_cost()
     if not resp:
         raise ValueError("Failed to estimate cost.")
     return resp.get("flex_unit") or 0.0
 
 
-def download_json(task_id: TaskId, path: str = "simulation.json") -> None:
+def estimate_cost_many(
+    task_ids: Iterable[TaskRef],
+    solver_version: str = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    budget: float = None,
+) -> CostSummary:
+    """
+    Estimate cost of many tasks concurrently, identical simulations uploaded by this process are
+    estimated once.
+    :param task_ids: task ids or :class:`TaskHandle`
+    :param solver_version: target solver version, the server default if None
+    :param max_workers: maximum number of concurrent requests
+    :param budget: flex unit budget to compare the total cost with
+    :return: the cost of each task, the total and the failed estimates
+    """
+    return estimate_costs(task_ids, solver_version, max_workers, budget)
+
+
+def download_json(task_id: TaskRef, path: str = "simulation.json") -> None:
     """Download the `.json` file associated with the :class:`.Simulation` of a given task.
 
     Parameters
     ----------
-    task_id : str
+    task_id : Union[str, :class:`TaskHandle`]
         Unique identifier of task on server.  Returned by :meth:`upload`.
     path : str = SIM_FILE_NAME
         Download path to .json file of simulation (including filename).
     """
-    task = SimulationTask.get(task_id)
-    if not task:
-        raise ValueError("Task not found.")
-    task.get_simulation_json(path)
+    get_handle(task_id).task.get_simulation_json(path)
 
 
-def load_simulation(task_id: TaskId, path: str = "simulation.json") -> Simulation:
+def load_simulation(
+    task_id: TaskRef, path: str = "simulation.json", in_memory: bool = False
+) -> Simulation:
     """Download the `.json` file of a task and load the associated :class:`.Simulation`.
 
+    The simulation is parsed in memory and cached across calls.
+
     Parameters
     ----------
-    task_id : str
+    task_id : Union[str, :class:`TaskHandle`]
         Unique identifier of task on server.  Returned by :meth:`upload`.
     path : str = SIM_FILE_NAME
         Download path to .json file of simulation (including filename).
+    in_memory : bool = False
+        If ``True``, only load the simulation and don't save it to ``path``.
 
     Returns
     -------
     :class:`.Simulation`
         Simulation loaded from downloaded json file.
     """
-    download_json(task_id, path)
-    return Simulation.from_file(path)
+    simulation = get_handle(task_id).task.get_simulation()
+    if not in_memory:
+        simulation.to_file(path)
+    return simulation
 
 
-def download_log(task_id: TaskId, path: str = "tidy3d.log") -> None:
+def download_log(task_id: TaskRef, path: str = "tidy3d.log") -> None:
     """Download the tidy3d log file associated with a task.
 
     Parameters
     ----------
-    task_id : str
+    task_id : Union[str, :class:`TaskHandle`]
         Unique identifier of task on server.  Returned by :meth:`upload`.
     path : str = "tidy3d.log"
         Download path to log file (including filename).
@@ -245,48 +442,120 @@ def download_log(task_id: TaskId, path: str = "tidy3d.log") -> None:
     ----
     To load downloaded results into data, call :meth:`load` with option `replace_existing=False`.
     """
-    task = SimulationTask.get(task_id)
-    if not task:
-        raise ValueError("Task not found.")
-    task.get_log(path)
+    get_handle(task_id).task.get_log(path)
+
+
+def _folder_task_records(folder: Folder) -> List[dict]:
+    return folder.list_task_records()
+
+
+def iter_tasks(  # pylint:disable=too-many-arguments
+    status: Union[str, Iterable[str]] = None,
+    created_after: datetime = None,
+    created_before: datetime = None,
+    folders: Iterable[str] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> Iterator[Dict]:
+    """Lazily get the raw task records of many folders, listed concurrently.
+
+    Parameters
+    ----------
+    status : Union[str, Iterable[str]] = None
+        Only yield the tasks with this status, or one of these statuses.
+    created_after : datetime = None
+        Only yield the tasks created at or after this time.
+    created_before : datetime = None
+        Only yield the tasks created before this time.
+    folders : Iterable[str] = None
+        Names of the folders to list, or all folders if ``None``.
+    max_workers : int
+        Maximum number of folders listed concurrently.
+
+    Note
+    ----
+    Records are yielded folder by folder, as soon as each folder listing arrives, so the order
+    of the folders is not preserved.
+    """
+    if folders is None:
+        folder_list = Folder.list() or []
+    else:
+        folder_list = [Folder.get(name) for name in folders]
+    if isinstance(status, str):
+        status = [status]
+    statuses = {value.lower() for value in status or ()}
+    for _, records, error in bounded_map(
+        _folder_task_records, filter(None, folder_list), max_workers
+    ):
+        if error:
+            raise error
+        for record in records:
+            if statuses and (record.get("status") or "").lower() not in statuses:
+                continue
+            if created_after or created_before:
+                if not record.get("createdAt"):
+                    continue
+                created_at = _created_at(record)
+                if created_after and created_at < created_after:
+                    continue
+                if created_before and created_at >= created_before:
+                    continue
+            yield record
 
 
 def delete_old(
     days_old: int = 100,
-    folder: str = "default",
+    folder: Optional[str] = "default",
+    dry_run: bool = False,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    on_progress: Callable[[int, int], None] = None,
 ) -> int:
     """Delete all tasks older than a given amount of days.
 
     Parameters
     ----------
-    folder : str
-        Only allowed to delete in one folder at a time.
     days_old : int = 100
         Minimum number of days since the task creation.
+    folder : Optional[str] = "default"
+        Folder to delete tasks from, or all folders if ``None``.
+    dry_run : bool = False
+        Only count the tasks which would be deleted.
+    max_workers : int
+        Maximum number of concurrent requests.
+    on_progress : Callable[[int, int], None] = None
+        Called with the number of processed tasks and the total as the deletion goes.
 
     Returns
     -------
     int
-        Total number of tasks deleted.
+        Total number of tasks deleted, or which would be deleted if ``dry_run``.
+
+    Note
+    ----
+    Use :func:`tidy3d_webapi.bulk_delete.delete_tasks` to get the ids of deleted and failed tasks.
     """
-    folder = Folder.get(folder)
-    if not folder:
-        return 0
-    tasks = folder.list_tasks()
-    if not tasks:
-        return 0
-    tasks = list(
-        filter(lambda t: t.created_at < datetime.now(pytz.utc) - timedelta(days=days_old), tasks)
+    cutoff = datetime.now(pytz.utc) - timedelta(days=days_old)
+    records = iter_tasks(
+        created_before=cutoff,
+        folders=None if folder is None else [folder],
+        max_workers=max_workers,
+    )
+    result = delete_tasks(
+        records, dry_run=dry_run, max_workers=max_workers, on_progress=on_progress
     )
-    for task in tasks:
-        task.delete()
-    return len(tasks)
+    if result.failed:
+        print(f"Failed to delete {len(result.failed)} of {result.total} tasks.")
+    return len(result.deleted)
+
+
+def _created_at(record: dict) -> datetime:
+    created_at = record.get("createdAt")
+    return parse_datetime(created_at) if created_at else _NO_DATE
 
 
 def get_tasks(
     num_tasks: int = None, order: Literal["new", "old"] = "new", folder: str = "default"
-) -> List[Dict]:
-    """Get a list with the metadata of the last ``num_tasks`` tasks.
+) -> Iterator[Dict]:
+    """Lazily get the metadata of the last ``num_tasks`` tasks.
 
     Parameters
     ----------
@@ -296,13 +565,31 @@ def get_tasks(
         Return the tasks in order of newest-first or oldest-first.
     folder: str = "default"
         Folder from which to get the tasks.
+
+    Note
+    ----
+    The task listing of the server is neither paginated nor ordered, so the folder is listed once
+    and the ``num_tasks`` newest or oldest raw records are selected with a heap. Only the selected
+    records are parsed, one at a time as the iterator is consumed. With a mirror enabled by
+    :func:`tidy3d_webapi.mirror.use_mirror`, the folder is synced incrementally and queried locally.
     """
+    mirror = current_mirror()
+    if mirror is not None:
+        for record in mirror.list_tasks(folder, num_tasks, order):
+            yield SimulationTask(**record).dict()
+        return
     folder = Folder.get(folder)
-    tasks = folder.list_tasks()
-    if order == "new":
-        tasks = sorted(tasks, key=lambda t: t.created_at, reverse=True)
+    if not folder:
+        return
+    records = folder.list_task_records()
+    if num_tasks is None:
+        if order in ("new", "old"):
+            records = sorted(records, key=_created_at, reverse=order == "new")
+    elif order == "new":
+        records = heapq.nlargest(num_tasks, records, key=_created_at)
     elif order == "old":
-        tasks = sorted(tasks, key=lambda t: t.created_at)
-    if num_tasks is not None:
-        tasks = tasks[:num_tasks]
-    return [task.dict() for task in tasks]
+        records = heapq.nsmallest(num_tasks, records, key=_created_at)
+    else:
+        records = records[:num_tasks]
+    for record in records:
+        yield SimulationTask(**record).dict()